@@ -1,4 +1,6 @@
 import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
@@ -9,12 +11,22 @@ from dotenv import load_dotenv
 
 import logging
 
-from utils import save_json_to_folder
+from consts import VT_RESULTS_FILE
+from scanCatalogue import ScanCatalogue, VT_STATUS_CLEAN, VT_STATUS_DETECTED, VT_STATUS_ERROR
+from utils import save_json_to_folder, get_base_path, load_json_from_file, load_dump_manifest
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 API_KEY = os.getenv('VT_API_KEY')
-VT_RESULTS_FILE = "vt_results.txt"
+# Can be pointed at a local stand-in for the VT API
+API_URL = os.getenv('VT_API_URL', 'https://www.virustotal.com/api/v3')
+VT_CACHE_FILE = os.path.join(get_base_path(), "cache", "vt_verdicts.json")
+
+MAX_WORKERS = 8
+HASH_CHUNK_SIZE = 1024 * 1024
+POLL_INITIAL_DELAY = 5
+POLL_MAX_DELAY = 60
+POLL_TIMEOUT = 30 * 60
 
 
 def get_dnr_files(directory):
@@ -23,26 +35,192 @@ def get_dnr_files(directory):
     return dnr_files
 
 
+def sha256_file(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_verdict_cache():
+    if not os.path.exists(VT_CACHE_FILE):
+        return {}
+    return load_json_from_file(VT_CACHE_FILE) or {}
+
+
+def save_verdict_cache(cache: dict):
+    cache_folder = os.path.dirname(VT_CACHE_FILE)
+    os.makedirs(cache_folder, exist_ok=True)
+    save_json_to_folder(cache, cache_folder, os.path.basename(VT_CACHE_FILE))
+
+
+def get_detections(results: dict):
+    return [
+        {'engine_name': value['engine_name'], 'category': value['category'], 'result': value['result']}
+        for value in results.values() if value['result'] is not None
+    ]
+
+
+class VTClient:
+    """
+    A concurrent VirusTotal client: reports are looked up by hash first, only unknown files are uploaded, and all
+    pending analyses are polled together with backoff.
+    """
+
+    def __init__(self, api_key: str, api_url: str = API_URL, max_workers: int = MAX_WORKERS):
+        self.api_url = api_url.rstrip('/')
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['X-Apikey'] = api_key
+
+    def close(self):
+        self.session.close()
+
+    def get_report(self, file_hash):
+        """Returns the detections of an existing report, or None if VT has not analyzed the file yet."""
+        url = f'{self.api_url}/files/{file_hash}'
+        logger.info(f"looking up existing VT report for {file_hash}")
+        response = self.session.get(url)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        results = response.json()['data']['attributes'].get('last_analysis_results')
+        if not results:
+            return None
+        return get_detections(results)
+
+    def upload_file(self, file_path):
+        url = f'{self.api_url}/files'
+        logger.info(f'uploading {file_path}')
+        with open(file_path, 'rb') as file:
+            response = self.session.post(url, files={'file': (os.path.basename(file_path), file)})
+        response.raise_for_status()
+        return response.json()['data']['id']
+
+    def get_analysis(self, analysis_id):
+        """Returns the detections of a completed analysis, or None if it is still in progress."""
+        url = f'{self.api_url}/analyses/{analysis_id}'
+        response = self.session.get(url)
+        response.raise_for_status()
+        attributes = response.json()['data']['attributes']
+        if attributes['status'] != 'completed':
+            return None
+        return get_detections(attributes['results'])
+
+    @staticmethod
+    def _try(func, *args):
+        try:
+            return func(*args), None
+        except (requests.RequestException, KeyError, ValueError) as e:
+            return None, e
+
+    def get_verdicts(self, files_by_hash: dict):
+        """
+        Returns the detections for each hash in files_by_hash (hash -> file path) that VT could analyze, and the
+        errors of those that it couldn't.
+        """
+        verdicts = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            hashes = list(files_by_hash)
+            unknown_hashes = []
+            for file_hash, (report, error) in zip(hashes, executor.map(lambda h: self._try(self.get_report, h),
+                                                                       hashes)):
+                if error:
+                    errors[file_hash] = error
+                elif report is None:
+                    unknown_hashes.append(file_hash)
+                else:
+                    verdicts[file_hash] = report
+
+            pending = {}
+            for file_hash, (analysis_id, error) in zip(
+                    unknown_hashes,
+                    executor.map(lambda h: self._try(self.upload_file, files_by_hash[h]), unknown_hashes)):
+                if error:
+                    errors[file_hash] = error
+                else:
+                    pending[file_hash] = analysis_id
+
+            if pending:
+                logger.info(f"querying results of {len(pending)} VT analyses. This may take few minutes")
+            delay = POLL_INITIAL_DELAY
+            deadline = time.monotonic() + POLL_TIMEOUT
+            # A failed poll is retried with the same backoff, and only reported if the analysis never completes
+            poll_errors = {}
+            while pending:
+                if time.monotonic() > deadline:
+                    for file_hash in pending:
+                        errors[file_hash] = poll_errors.get(file_hash) or \
+                            TimeoutError("VT analysis did not complete in time")
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_DELAY)
+                polled = list(pending.items())
+                for (file_hash, _), (detections, error) in zip(
+                        polled, executor.map(lambda item: self._try(self.get_analysis, item[1]), polled)):
+                    if error:
+                        logger.debug(f"polling the VT analysis of {file_hash} failed, retrying: {error}")
+                        poll_errors[file_hash] = error
+                        continue
+                    poll_errors.pop(file_hash, None)
+                    if detections is not None:
+                        verdicts[file_hash] = detections
+                        del pending[file_hash]
+        return verdicts, errors
+
+
 def analyze(directory):
-    if not API_KEY:
-        input("Couldn't find ENV variable VT_API_KEY, press ENTER to return")
-        return None
     files = get_dnr_files(directory)
-    ids = {}
-    ret = ""
-    for file in files:
-        ids[upload_file(file)] = os.path.basename(file)
-    for file_id in ids.keys():
-        ret += f"\n----{ids[file_id]}----\n"
-        found = False
-        results = get_scan_results(file_id)
-        for key, value in results.items():
-            if value['result'] is not None:
-                ret += f"{ids[file_id]}:{value['engine_name']} detects {value['category']} with {value['result']}\n"
-                found = True
-        if not found:
-            ret += f"{ids[file_id]}:no detection found\n"
+    # Dumps listed in the scan's manifest were hashed by MED already
+    manifest = load_dump_manifest(directory)
+    known_hashes = {file: manifest[os.path.basename(file)]['sha256'] for file in files
+                    if os.path.basename(file) in manifest}
+    unknown_files = [file for file in files if file not in known_hashes]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        hashes = dict(zip(unknown_files, executor.map(sha256_file, unknown_files)))
+    hashes = {file: known_hashes.get(file) or hashes[file] for file in files}
+
+    cache = load_verdict_cache()
+    uncached = {file_hash: file for file, file_hash in hashes.items() if file_hash not in cache}
+    errors = {}
+    if uncached:
+        if not API_KEY:
+            input("Couldn't find ENV variable VT_API_KEY, press ENTER to return")
+            return None
+        client = VTClient(API_KEY, API_URL)
+        try:
+            verdicts, errors = client.get_verdicts(uncached)
+        finally:
+            client.close()
+        for file_hash, detections in verdicts.items():
+            cache[file_hash] = {'detections': detections, 'date': datetime.now().isoformat()}
+        save_verdict_cache(cache)
+    else:
+        logger.info("All VT verdicts found in the local cache")
 
+    ret = ""
+    vt_status = VT_STATUS_CLEAN
+    for file, file_hash in hashes.items():
+        name = os.path.basename(file)
+        ret += f"\n----{name}----\n"
+        if file_hash not in cache:
+            logger.error(f"Error getting VT results for {name}: {errors.get(file_hash)}")
+            ret += f"{name}:unable to get VT results\n"
+            if vt_status != VT_STATUS_DETECTED:
+                vt_status = VT_STATUS_ERROR
+            continue
+        detections = cache[file_hash]['detections']
+        if detections:
+            vt_status = VT_STATUS_DETECTED
+        for detection in detections:
+            ret += f"{name}:{detection['engine_name']} detects {detection['category']} with {detection['result']}\n"
+        if not detections:
+            ret += f"{name}:no detection found\n"
 
     now = datetime.now().strftime('%H:%M:%S %d/%m/%Y')
     results = {
@@ -51,58 +229,15 @@ def analyze(directory):
     }
     logger.info(f"Saving VT results to folder '{directory}', file: {VT_RESULTS_FILE}")
     save_json_to_folder(results, directory, VT_RESULTS_FILE)
-
-
-def upload_file(file_path):
-    url = 'https://www.virustotal.com/api/v3/files'
-    headers = {
-        'X-Apikey': API_KEY
-    }
-    files = {'file': (file_path, open(file_path, 'rb'))}
-    logger.info(f'uploading {file_path}')
-    response = requests.post(url, headers=headers, files=files)
-    if response.status_code == 200:
-        file_id = response.json()['data']['id']
-        return file_id
-    else:
-        print(f"Error uploading file: {response.status_code}")
-        print(response.json())
-        input("press ENTER to return")
-        return None
-
-
-def get_scan_results(file_id):
-    url = f'https://www.virustotal.com/api/v3/analyses/{file_id}'
-    headers = {
-        'X-Apikey': API_KEY
-    }
-    logger.info(f"querying results from url: '{url}'. This may take few minutes")
-    while True:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            result = response.json()
-            if result['data']['attributes']['status'] == 'completed':
-                return result['data']['attributes']['results']
-            else:
-                # print("Scan in progress, waiting for 10 seconds...")
-                time.sleep(10)
-        else:
-            logger.error(f"Error getting scan results: {response.status_code}:\n{response.json()}")
-            input("press ENTER to return")
-            return None
+    ScanCatalogue().update_vt_status(directory, vt_status)
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Upload a file to VirusTotal and get the scan results.")
-    parser.add_argument('directory', type=str, help="The path to the file to be scanned.")
+    parser = argparse.ArgumentParser(description="Upload a folder's dump files to VirusTotal and get the scan results.")
+    parser.add_argument('directory', type=str, help="The path to the folder of dump files to be scanned.")
 
     args = parser.parse_args()
-    logger.info(analyze(args.directory))
-    file_id = upload_file(args.file_path)
-    if file_id:
-        results = get_scan_results(file_id)
-        if results:
-            logger.info(results)
+    analyze(args.directory)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,142 @@
+import glob
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from colorama import Fore
+
+from configLogger import write_to_log_files
+from consts import MEMORY_IMAGE_EXTENSIONS
+from scanCatalogue import ScanCatalogue
+from scanWorker import ScanWorker
+from utils import create_folder, clear_screen, image_fingerprint, load_results
+
+PROGRESS_PATTERN = re.compile(r'^Progress:\s+([\d.]+)\s*(.*)$')
+REFRESH_INTERVAL = 1
+
+
+def get_max_parallel_scans():
+    max_parallel_scans = os.getenv("MED_MAX_PARALLEL_SCANS")
+    if max_parallel_scans:
+        return max(1, int(max_parallel_scans))
+    return os.cpu_count() or 1
+
+
+def find_images(path_or_pattern: str):
+    if os.path.isdir(path_or_pattern):
+        entries = [os.path.join(path_or_pattern, entry) for entry in os.listdir(path_or_pattern)]
+    else:
+        entries = glob.glob(path_or_pattern)
+    return sorted(entry for entry in entries
+                  if os.path.isfile(entry) and os.path.splitext(entry)[1].lower() in MEMORY_IMAGE_EXTENSIONS)
+
+
+class ImageScan:
+    def __init__(self, image_path: str):
+        self.image_path = image_path
+        self.out_folder = None
+        self.status = "queued"
+        self.progress = 0.0
+        self.description = ""
+        self.hits = 0
+
+    def update_progress(self, log_line: str):
+        """
+        Parses a volatility progress line (as written to stderr by vol.py) into the image's progress.
+        Returns False if the line isn't a progress line.
+        """
+        match = PROGRESS_PATTERN.match(log_line)
+        if not match:
+            return False
+        self.progress = float(match.group(1))
+        self.description = match.group(2).strip()
+        return True
+
+
+class BatchScan:
+    """
+    Scans a batch of images, one windows.med run per image, on a bounded pool of scan workers.
+    Each image gets its own output folder, unless it was already scanned by the same MED version and force_rescan
+    isn't set, in which case the stored results are reused.
+    """
+
+    def __init__(self, image_paths: list, max_parallel_scans: int = None, force_rescan: bool = False):
+        self.force_rescan = force_rescan
+        self.scans = [ImageScan(image_path) for image_path in image_paths]
+        self.max_parallel_scans = min(max_parallel_scans or get_max_parallel_scans(), len(self.scans)) or 1
+        self.workers = queue.Queue()
+        self.log_lock = threading.Lock()
+        # Opened before the scan threads start, so they all share it
+        ScanCatalogue()
+
+    def run(self):
+        for _ in range(self.max_parallel_scans):
+            self.workers.put(ScanWorker())
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel_scans) as executor:
+                futures = [executor.submit(self.scan_image, image_scan) for image_scan in self.scans]
+                while not all(future.done() for future in futures):
+                    self.print_progress()
+                    time.sleep(REFRESH_INTERVAL)
+                self.print_progress()
+        finally:
+            while not self.workers.empty():
+                self.workers.get().stop()
+
+    def scan_image(self, image_scan: ImageScan):
+        scan_worker = self.workers.get()
+        try:
+            fingerprint = image_fingerprint(image_scan.image_path)
+            previous_out_folder = None if self.force_rescan else scan_worker.find_previous_scan(fingerprint)
+            if previous_out_folder:
+                image_scan.out_folder = previous_out_folder
+                image_scan.hits = len(load_results(previous_out_folder) or [])
+                image_scan.progress = 100.0
+                image_scan.status = "reused"
+                self.log(f"'{image_scan.image_path}' was already scanned by this MED version, "
+                         f"reusing the results saved to {previous_out_folder}")
+                return
+            image_scan.out_folder = create_folder()
+            image_scan.status = "scanning"
+            self.log(f"Starting a MED scan on file: '{image_scan.image_path}', saving to {image_scan.out_folder}")
+            for message in scan_worker.med_scan(image_scan.image_path, image_scan.out_folder, fingerprint):
+                if message["type"] == "log":
+                    clean_output = message["message"].strip()
+                    if clean_output and not image_scan.update_progress(clean_output):
+                        self.log(f"{os.path.basename(image_scan.image_path)}: {clean_output}")
+                elif message["type"] == "error":
+                    self.log(f"{os.path.basename(image_scan.image_path)}: {message['message']}", logging.ERROR)
+                elif message["type"] == "row":
+                    image_scan.hits += 1
+                elif message["type"] == "done":
+                    image_scan.status = "done" if message["status"] == 0 else "failed"
+        except Exception as e:
+            image_scan.status = "failed"
+            self.log(f"MED scan of '{image_scan.image_path}' failed: {e}", logging.ERROR)
+        finally:
+            self.workers.put(scan_worker)
+
+    def log(self, message: str, level: int = logging.INFO):
+        # Written to the log files only, so the console keeps showing the progress table
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.log_lock:
+            write_to_log_files(f"{timestamp} - {__name__} - {logging.getLevelName(level)} - {message}\n")
+
+    def print_progress(self):
+        clear_screen()
+        print(f"MED batch scan - {len(self.scans)} images, {self.max_parallel_scans} parallel scans\n")
+        for image_scan in self.scans:
+            if image_scan.status == "failed":
+                color = Fore.RED
+            elif image_scan.status in ("done", "reused"):
+                color = Fore.GREEN
+            else:
+                color = Fore.RESET
+            print(f"{color}{image_scan.status:>8}{Fore.RESET} {image_scan.progress:6.2f}% "
+                  f"hits: {image_scan.hits:<4} {os.path.basename(image_scan.image_path)} "
+                  f"{image_scan.description}")
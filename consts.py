@@ -1,2 +1,15 @@
 VOLATILITY_TOP_BANNER = "Volatility Foundation Volatility Framework 2.6.1"
 VOLATILITY_LOG_PATH = "volatility.log"
+RESULTS_FILE = "results.jsonl"
+LEGACY_RESULTS_FILE = "results.json"
+SCAN_STATUS_FILE = "scan_status.json"
+SCAN_INFO_FILE = "scan_info.json"
+SCAN_STATUS_RUNNING = "running"
+SCAN_STATUS_COMPLETED = "completed"
+SCAN_STATUS_FAILED = "failed"
+VT_RESULTS_FILE = "vt_results.txt"
+# Written by the MED volatility plugin, which runs in the volatility3 tree and can't import this module: keep it equal
+# to DUMP_MANIFEST_FILE in volatility3/volatility3/framework/plugins/windows/med.py
+DUMP_MANIFEST_FILE = "dumps.manifest.json"
+MEMORY_IMAGE_EXTENSIONS = (".raw", ".mem", ".dmp", ".vmem", ".vmss", ".vmsn", ".lime", ".bin", ".img", ".dd",
+                           ".elf", ".core")
@@ -0,0 +1,123 @@
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+from consts import SCAN_STATUS_COMPLETED, VT_RESULTS_FILE
+from singletonMeta import SingletonMeta
+from utils import get_outputs_folder, get_folder_names, parse_folder_datetime, load_results, get_scan_status, \
+    read_file_content
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_FILE = "catalogue.sqlite"
+
+VT_STATUS_NOT_SCANNED = "not scanned"
+VT_STATUS_CLEAN = "clean"
+VT_STATUS_DETECTED = "detected"
+VT_STATUS_ERROR = "error"
+
+SORT_ORDERS = {
+    'newest first': 'scan_time DESC',
+    'oldest first': 'scan_time ASC',
+    'most hits': 'hit_count DESC, scan_time DESC',
+    'image path': 'image_path ASC, scan_time DESC',
+}
+
+
+class ScanCatalogue(metaclass=SingletonMeta):
+    """
+    An SQLite index of the scans in the outputs folder, updated when scans finish, so browsing thousands of historical
+    scans doesn't need to touch each results file.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_outputs_folder(), CATALOGUE_FILE)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        self.execute('''
+            CREATE TABLE IF NOT EXISTS scans (
+                folder TEXT PRIMARY KEY,
+                scan_time TEXT NOT NULL,
+                image_path TEXT,
+                image_hash TEXT,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                malicious INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                vt_status TEXT NOT NULL DEFAULT 'not scanned'
+            )''')
+        self.execute('CREATE INDEX IF NOT EXISTS scans_scan_time ON scans (scan_time)')
+        self.execute('CREATE INDEX IF NOT EXISTS scans_image_hash ON scans (image_hash)')
+        if is_new:
+            self.backfill()
+
+    def execute(self, sql: str, params: tuple = ()):
+        # A connection per statement keeps the catalogue usable from the batch scan threads
+        with closing(sqlite3.connect(self.path)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def record_scan(self, out_folder: str, status: str, image_path: str = None, image_hash: str = None,
+                    hit_count: int = 0):
+        folder = os.path.basename(out_folder)
+        self.execute('''
+            INSERT INTO scans (folder, scan_time, image_path, image_hash, hit_count, malicious, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (folder) DO UPDATE SET
+                image_path = COALESCE(excluded.image_path, image_path),
+                image_hash = COALESCE(excluded.image_hash, image_hash),
+                hit_count = excluded.hit_count,
+                malicious = excluded.malicious,
+                status = excluded.status''',
+                     (folder, parse_folder_datetime(folder).isoformat(sep=' '), image_path, image_hash, hit_count,
+                      int(hit_count > 0), status))
+
+    def update_vt_status(self, out_folder: str, vt_status: str):
+        self.execute('UPDATE scans SET vt_status = ? WHERE folder = ?', (vt_status, os.path.basename(out_folder)))
+
+    def find_completed_scans(self, image_hash: str):
+        """Returns the folders of the completed scans of images with the given sampled hash, newest first."""
+        rows = self.execute('SELECT folder FROM scans WHERE image_hash = ? AND status = ? ORDER BY scan_time DESC',
+                            (image_hash, SCAN_STATUS_COMPLETED))
+        return [row['folder'] for row in rows]
+
+    @staticmethod
+    def build_filter(text_filter: str = None, malicious_only: bool = False):
+        conditions = []
+        params = []
+        if text_filter:
+            conditions.append("(image_path LIKE ? OR folder LIKE ?)")
+            params += [f"%{text_filter}%"] * 2
+        if malicious_only:
+            conditions.append("malicious = 1")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+
+    def list_scans(self, offset: int = 0, limit: int = 20, sort_order: str = 'newest first', text_filter: str = None,
+                   malicious_only: bool = False):
+        where, params = self.build_filter(text_filter, malicious_only)
+        return self.execute(f'SELECT * FROM scans {where} ORDER BY {SORT_ORDERS[sort_order]} LIMIT ? OFFSET ?',
+                            params + (limit, offset))
+
+    def count_scans(self, text_filter: str = None, malicious_only: bool = False):
+        where, params = self.build_filter(text_filter, malicious_only)
+        return self.execute(f'SELECT COUNT(*) AS count FROM scans {where}', params)[0]['count']
+
+    def backfill(self):
+        """Indexes the scans that were made before the catalogue existed (done once, when it is created)."""
+        outputs_folder = get_outputs_folder()
+        folders = get_folder_names(outputs_folder)
+        logger.info(f"Indexing {len(folders)} existing scans into the results catalogue")
+        for folder in folders:
+            out_folder = os.path.join(outputs_folder, folder)
+            try:
+                results = load_results(out_folder) or []
+                self.record_scan(out_folder, get_scan_status(out_folder) or SCAN_STATUS_COMPLETED,
+                                 hit_count=len(results))
+            except ValueError:
+                logger.warning(f"Skipping unrecognised folder '{folder}' while indexing the results catalogue")
+                continue
+            vt_results = read_file_content(os.path.join(out_folder, VT_RESULTS_FILE))
+            if vt_results:
+                self.update_vt_status(out_folder, VT_STATUS_DETECTED if " detects " in vt_results else VT_STATUS_CLEAN)
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import subprocess
+import threading
+
+from consts import RESULTS_FILE, SCAN_STATUS_RUNNING, SCAN_STATUS_COMPLETED, SCAN_STATUS_FAILED, SCAN_INFO_FILE
+from scanCatalogue import ScanCatalogue
+from utils import get_base_path, format_result, append_json_line, set_scan_status, image_fingerprint, \
+    save_json_to_folder, load_scan_info, get_outputs_folder, link_duplicate_dumps
+
+logger = logging.getLogger(__name__)
+
+
+class ScanWorker:
+    """
+    A long-lived volatility process that keeps the framework, plugins and symbol tables loaded between scans.
+    Requests and replies are exchanged as JSON lines over the worker's stdin/stdout pipes.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.plugin_versions = {}
+        # Held while a request is answered, so scans run in the background don't interleave their replies
+        self.lock = threading.Lock()
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        base_path = get_base_path()
+        python_path = os.getenv("PYTHON_PATH")
+        script_path = os.path.join(base_path, "volatility3", "volworker.py")
+        logger.info("Starting the MED scan worker")
+        self.process = subprocess.Popen([python_path, script_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, encoding="utf-8")
+
+    def stop(self):
+        if not self.is_running():
+            return
+        if not self.lock.acquire(blocking=False):
+            # A scan is still running in the background, which would finish before the shutdown is read
+            self.kill()
+            return
+        self.lock.release()
+        try:
+            self.send({"command": "shutdown"})
+        except OSError:
+            pass
+        self.process.stdin.close()
+        self.process.wait()
+
+    def send(self, request: dict):
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+
+    def scan(self, target_path: str, out_folder_path: str, plugin: str = 'windows.med', config: dict = None):
+        """
+        Runs a plugin in the worker, yielding its 'log', 'row' and 'error' messages as they arrive,
+        followed by a final 'done' message holding the return code.
+        If the caller stops iterating before the 'done' message, the worker is restarted, so the rest of this scan's
+        replies can't be read as replies to the next request.
+        """
+        with self.lock:
+            yield from self._scan(target_path, out_folder_path, plugin, config)
+
+    def _scan(self, target_path: str, out_folder_path: str, plugin: str, config: dict):
+        if not self.is_running():
+            self.start()
+        self.send({
+            "plugin": plugin,
+            "file": target_path,
+            "output_dir": out_folder_path,
+            "config": config or {}
+        })
+        finished = False
+        try:
+            while True:
+                line = self.process.stdout.readline()
+                if line == '':
+                    finished = True
+                    yield {"type": "error", "message": "MED scan worker exited unexpectedly"}
+                    yield {"type": "done", "status": 1}
+                    return
+                message = json.loads(line)
+                if message["type"] == "done":
+                    finished = True
+                yield message
+                if finished:
+                    return
+        finally:
+            if not finished:
+                self.kill()
+
+    def kill(self):
+        """Stops the worker without waiting for its current request, it's started again by the next one."""
+        if not self.is_running():
+            return
+        logger.info("Stopping the MED scan worker in the middle of a scan")
+        self.process.kill()
+        self.process.wait()
+
+    def get_plugin_version(self, plugin: str = 'windows.med'):
+        """Returns the version of a plugin as loaded by the worker, or None if the worker can't load it."""
+        if plugin not in self.plugin_versions:
+            with self.lock:
+                if not self.is_running():
+                    self.start()
+                self.send({"command": "version", "plugin": plugin})
+                line = self.process.stdout.readline()
+            message = json.loads(line) if line else {"type": "error", "message": "MED scan worker exited unexpectedly"}
+            if message["type"] != "version":
+                logger.warning(f"Unable to get the version of {plugin}: {message['message']}")
+                return None
+            self.plugin_versions[plugin] = message["version"]
+        return self.plugin_versions[plugin]
+
+    def find_previous_scan(self, fingerprint: dict):
+        """
+        Returns the output folder of a completed MED scan of an identical image (by its fingerprint), made by the
+        same MED plugin version, or None if there is none.
+        """
+        if not fingerprint:
+            return None
+        plugin_version = self.get_plugin_version()
+        if plugin_version is None:
+            return None
+        for folder in ScanCatalogue().find_completed_scans(fingerprint["sampled_hash"]):
+            out_folder_path = os.path.join(get_outputs_folder(), folder)
+            scan_info = load_scan_info(out_folder_path)
+            if scan_info and scan_info.get("image_fingerprint") == fingerprint \
+                    and scan_info.get("plugin_version") == plugin_version:
+                return out_folder_path
+        return None
+
+    def med_scan(self, target_path: str, out_folder_path: str, fingerprint: dict = None):
+        """
+        Runs a MED scan, appending each (formatted) row to the results file in out_folder_path as it arrives and
+        tracking the scan status there. The image fingerprint (computed if not given) and the MED plugin version are
+        saved with the results, so later scans of the same image can reuse them. Yields the same messages as scan().
+        """
+        fingerprint = fingerprint or image_fingerprint(target_path)
+        save_json_to_folder({
+            "image_path": target_path,
+            "image_fingerprint": fingerprint,
+            "plugin": "windows.med",
+            "plugin_version": self.get_plugin_version()
+        }, out_folder_path, SCAN_INFO_FILE)
+        set_scan_status(out_folder_path, SCAN_STATUS_RUNNING)
+        catalogue = ScanCatalogue()
+        catalogue.record_scan(out_folder_path, SCAN_STATUS_RUNNING, target_path,
+                              fingerprint["sampled_hash"] if fingerprint else None)
+        hit_count = 0
+        with open(os.path.join(out_folder_path, RESULTS_FILE), 'w') as results_file:
+            for message in self.scan(target_path, out_folder_path, 'windows.med', {'dump': True}):
+                if message["type"] == "row":
+                    append_json_line(format_result(message["row"]), results_file)
+                    hit_count += 1
+                elif message["type"] == "done":
+                    results_file.close()
+                    status = SCAN_STATUS_COMPLETED if message["status"] == 0 else SCAN_STATUS_FAILED
+                    set_scan_status(out_folder_path, status)
+                    catalogue.record_scan(out_folder_path, status, hit_count=hit_count)
+                    linked = link_duplicate_dumps(out_folder_path)
+                    if linked:
+                        logger.info(f"{linked} dumps are identical to dumps of earlier scans and were hard-linked")
+                yield message
+
+
+_scan_worker = ScanWorker()
+
+
+def get_scan_worker():
+    return _scan_worker
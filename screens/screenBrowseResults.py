@@ -1,34 +1,90 @@
 import os
 
+from colorama import Fore
+
+from scanCatalogue import ScanCatalogue, SORT_ORDERS
 from screens.screenMgmt import ScreenMgmt
 from singletonMeta import SingletonMeta
-from utils import get_outputs_folder, get_folder_names, convert_folder_format
+from utils import get_outputs_folder, convert_folder_format
+
+PAGE_SIZE = 20
 
 
 class ScreenBrowseResults(ScreenMgmt, metaclass=SingletonMeta):
     def __init__(self):
         super().__init__(frame_id="browse_results", main_title="Browse Results", sub_title="")
-
-    @staticmethod
-    def build_list_options():
-        outputs_folder = get_outputs_folder()
-        folders = get_folder_names(outputs_folder)
-        return folders
+        self.page = 0
+        self.sort_order = next(iter(SORT_ORDERS))
+        self.text_filter = ""
+        self.malicious_only = False
+        self.scan_count = 0
+        self.list_options = {}
 
     @staticmethod
     def is_options_choice():
         return False
 
+    def build_list_options(self):
+        return list(self.list_options)
+
+    def generate_sub_title(self):
+        self.scan_count = ScanCatalogue().count_scans(self.text_filter, self.malicious_only)
+        page_count = max(1, -(-self.scan_count // PAGE_SIZE))
+        self.page = min(self.page, page_count - 1)
+        self.sub_title = f"Page {self.page + 1}/{page_count} - {self.scan_count} scans, sorted by {self.sort_order}"
+        if self.text_filter:
+            self.sub_title += f", matching '{self.text_filter}'"
+        if self.malicious_only:
+            self.sub_title += ", malicious only"
+
     def build_options_params(self):
-        folders = self.build_list_options()
-        return self.format_folders(folders)
+        scans = ScanCatalogue().list_scans(self.page * PAGE_SIZE, PAGE_SIZE, self.sort_order, self.text_filter,
+                                           self.malicious_only)
+        self.list_options = {self.format_scan(scan): scan['folder'] for scan in scans}
+        if (self.page + 1) * PAGE_SIZE < self.scan_count:
+            self.list_options[f"{Fore.CYAN}Next page{Fore.RESET}"] = self.next_page
+        if self.page > 0:
+            self.list_options[f"{Fore.CYAN}Previous page{Fore.RESET}"] = self.previous_page
+        self.list_options[f"{Fore.CYAN}Sort by: {self.sort_order}{Fore.RESET}"] = self.cycle_sort_order
+        self.list_options[f"{Fore.CYAN}Filter by image path{Fore.RESET}"] = self.set_text_filter
+        self.list_options[f"{Fore.CYAN}Show {'all' if self.malicious_only else 'malicious only'}{Fore.RESET}"] = \
+            self.toggle_malicious_only
+        return self.build_list_options()
 
     def run_list_option_func(self, choice: str):
-        outputs_folder = get_outputs_folder()
-        result_folder_path = os.path.join(outputs_folder, choice)
-        self.passed_params["out_folder"] = result_folder_path
+        option = self.list_options[choice]
+        if callable(option):
+            option()
+            ScreenMgmt.get_screen("browse_results", self.passed_params)
+            return
+        self.passed_params["out_folder"] = os.path.join(get_outputs_folder(), option)
         ScreenMgmt.get_screen("results", self.passed_params)
 
+    def next_page(self):
+        self.page += 1
+
+    def previous_page(self):
+        self.page -= 1
+
+    def cycle_sort_order(self):
+        sort_orders = list(SORT_ORDERS)
+        self.sort_order = sort_orders[(sort_orders.index(self.sort_order) + 1) % len(sort_orders)]
+        self.page = 0
+
+    def set_text_filter(self):
+        self.text_filter = input("Please enter a part of the image path (ENTER to clear): ").strip()
+        self.page = 0
+
+    def toggle_malicious_only(self):
+        self.malicious_only = not self.malicious_only
+        self.page = 0
+
     @staticmethod
-    def format_folders(list_folders: list):
-        return [convert_folder_format(entry) for entry in list_folders]
+    def format_scan(scan: dict):
+        image_name = os.path.basename(scan['image_path']) if scan['image_path'] else "unknown image"
+        if scan['malicious']:
+            verdict = f"{Fore.RED}malicious{Fore.RESET}"
+        else:
+            verdict = f"{Fore.GREEN}clean{Fore.RESET}"
+        return (f"{convert_folder_format(scan['folder']).split(' - ')[0]} - {image_name} - "
+                f"{scan['hit_count']} hits, {verdict}, VT: {scan['vt_status']}")
@@ -1,4 +1,5 @@
 import sys
+from scanWorker import get_scan_worker
 from screens.screenMgmt import ScreenMgmt
 from singletonMeta import SingletonMeta
 
@@ -14,4 +15,5 @@ class ScreenExit(ScreenMgmt, metaclass=SingletonMeta):
 
     @staticmethod
     def real_exit():
+        get_scan_worker().stop()
         sys.exit()
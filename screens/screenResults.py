@@ -1,37 +1,52 @@
-import os
-
 from colorama import Fore
 
+from consts import SCAN_STATUS_RUNNING, SCAN_STATUS_FAILED
 from screens.screenMgmt import ScreenMgmt
 from singletonMeta import SingletonMeta
-from utils import load_json_from_file
+from utils import load_results, get_scan_status
 
 
 class ScreenResults(ScreenMgmt, metaclass=SingletonMeta):
     def __init__(self):
         super().__init__(frame_id="results", main_title="Results", sub_title="")
         self.current_results = None
+        self.scan_status = None
 
-    def build_data_replace_params(self):
+    def load_results(self):
         out_folder = self.passed_params.get("out_folder")
-        results_file = os.path.join(out_folder, "results.json")
-        self.current_results = load_json_from_file(results_file)
+        self.scan_status = get_scan_status(out_folder)
+        self.current_results = load_results(out_folder)
+
+    def build_data_replace_params(self):
         return self.current_results
 
     def generate_sub_title(self):
-        if self.build_data_replace_params():
+        # The sub title is built first, so the results are loaded once per render, here
+        self.load_results()
+        if self.current_results:
             self.sub_title = f"{Fore.RED}Malicious activity detected{Fore.RESET}"
         else:
             self.sub_title = f"{Fore.GREEN}No malicious activity detected{Fore.RESET}"
+        if self.scan_status == SCAN_STATUS_RUNNING:
+            self.sub_title += f" {Fore.YELLOW}(scan still running){Fore.RESET}"
+        elif self.scan_status == SCAN_STATUS_FAILED:
+            self.sub_title += f" {Fore.YELLOW}(scan failed, results may be partial){Fore.RESET}"
 
     def build_options_params(self):
+        options = {}
+        if self.scan_status == SCAN_STATUS_RUNNING:
+            options['Refresh'] = self.refresh
         if not self.current_results:
-            return {}
+            return options
 
-        return {
+        options.update({
             'Upload results to VT': self.upload_results_to_vt,
             'Peek': self.peek
-        }
+        })
+        return options
+
+    def refresh(self):
+        ScreenMgmt.get_screen("results", self.passed_params)
 
     def upload_results_to_vt(self):
         # Todo: Lugasi, do your magic here, self.last_out_folder is the results
@@ -1,13 +1,14 @@
 import threading
 
+from batchScan import BatchScan, find_images
 from configLogger import write_to_log_files, get_relative_log_folder
-from consts import VOLATILITY_TOP_BANNER, VOLATILITY_LOG_PATH
+from consts import VOLATILITY_TOP_BANNER, VOLATILITY_LOG_PATH, SCAN_STATUS_RUNNING, SCAN_STATUS_FAILED
 from screens.screenMgmt import ScreenMgmt
+from scanWorker import get_scan_worker
 from singletonMeta import SingletonMeta
-from utils import create_folder, get_base_path, save_json_to_folder, format_results
+from utils import create_folder, get_base_path, image_fingerprint, set_scan_status
 
 import subprocess
-import json
 import time
 import os
 import logging
@@ -23,6 +24,8 @@ class ScreenStartScan(ScreenMgmt, metaclass=SingletonMeta):
     def build_options_params(self):
         return {
             'scan dump file': self.scan_dump_file,
+            'rescan dump file (ignore stored results)': self.rescan_dump_file,
+            'batch scan dump files': self.batch_scan_dump_files,
             'live scan': self.live_scan
         }
 
@@ -36,51 +39,103 @@ class ScreenStartScan(ScreenMgmt, metaclass=SingletonMeta):
         process.wait()
         ScreenMgmt.get_screen("results", self.passed_params)
 
-    def scan_dump_file(self):
+    def scan_dump_file(self, force_rescan: bool = False):
         dump_file_path = input("Please enter dump file path: ").strip().strip('"').strip("'")
         logger.info(f"Starting a MED scan on file: '{dump_file_path}'")
-        self.scan(dump_file_path)
+        # The results screen is opened while the scan runs, and shows the hits found so far
+        self.scan(dump_file_path, force_rescan, background=True)
         ScreenMgmt.get_screen("results", self.passed_params)
 
-    def scan(self, target_path: str):
-        base_path = get_base_path()
-        python_path = os.getenv("PYTHON_PATH")
-        out_folder_path = create_folder()
-        script_path = os.path.join(base_path, "volatility3", "vol.py")
-        command = 'windows.med'
-        cmd = [
-            python_path,
-            script_path,
-            '-r=json',
-            '-o', out_folder_path,
-            '-f', target_path,
-            command,
-            '--dump'
-        ]
-
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        while True:
-            output = process.stderr.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                clean_output = output.strip()
-                if clean_output:
-                    logger.info(clean_output)
-
-        return_code = process.poll()
-
-        stdout = process.stdout.read()
+    def rescan_dump_file(self):
+        self.scan_dump_file(force_rescan=True)
+
+    def batch_scan_dump_files(self):
+        path_or_pattern = input("Please enter a directory or glob of dump files: ").strip().strip('"').strip("'")
+        image_paths = find_images(path_or_pattern)
+        if not image_paths:
+            logger.error(f"No dump files found in '{path_or_pattern}'\n"
+                         f"Press ENTER to return to the main menu:\n")
+            input()
+            return ScreenMgmt.get_screen("main")
+
+        batch_scan = BatchScan(image_paths)
+        logger.info(f"Starting a MED batch scan on {len(image_paths)} files from '{path_or_pattern}' "
+                    f"with {batch_scan.max_parallel_scans} parallel scans")
+        batch_scan.run()
+        for image_scan in batch_scan.scans:
+            logger.info(f"MED scan of '{image_scan.image_path}' {image_scan.status} with {image_scan.hits} hits, "
+                        f"results saved to {image_scan.out_folder}")
+        input("Press ENTER to browse the results:\n")
+        ScreenMgmt.get_screen("browse_results")
+
+    def scan(self, target_path: str, force_rescan: bool = False, background: bool = False):
+        """
+        Scans a target, or finds an earlier scan of it, and passes on its output folder. A background scan streams
+        its results to the output folder on another thread, and its output is only written to the log files.
+        """
+        scan_worker = get_scan_worker()
+        fingerprint = image_fingerprint(target_path)
+        if not force_rescan:
+            previous_out_folder_path = scan_worker.find_previous_scan(fingerprint)
+            if previous_out_folder_path:
+                logger.info(f"'{target_path}' was already scanned by this MED version, "
+                            f"reusing the results saved to {previous_out_folder_path}")
+                self.passed_params["out_folder"] = previous_out_folder_path
+                return
 
+        out_folder_path = create_folder()
+        self.passed_params["out_folder"] = out_folder_path
+        if background:
+            # Marked as running before the results screen first looks at it
+            set_scan_status(out_folder_path, SCAN_STATUS_RUNNING)
+            threading.Thread(target=self.run_scan, args=(scan_worker, target_path, out_folder_path, fingerprint, True),
+                             daemon=True).start()
+            logger.info(f"MED scan of '{target_path}' is running in the background, "
+                        f"its results are saved to {out_folder_path} as they are found")
+            return
+
+        return_code = self.run_scan(scan_worker, target_path, out_folder_path, fingerprint)
         if return_code != 0:
             logger.error(f"MED dump scan resulted error\n"
                          f"Press ENTER to return to the main menu:\n")
             input()
             return ScreenMgmt.get_screen("main")
         else:
-            formatted_results = format_results(json.loads(stdout))
-            logger.info(f"MED dump scan finished successfully, saving results to {out_folder_path}")
-            save_json_to_folder(formatted_results, out_folder_path, "results.json")
-            self.passed_params["out_folder"] = out_folder_path
-
-
+            logger.info(f"MED dump scan finished successfully, results saved to {out_folder_path}")
+
+    def run_scan(self, scan_worker, target_path: str, out_folder_path: str, fingerprint: dict,
+                 background: bool = False):
+        """Runs a MED scan, logging its output and hits, and returns its return code."""
+        def log_info(message: str):
+            # Background scans don't print over the screen the user is on
+            if background:
+                write_to_log_files(f"{message}\n")
+            else:
+                logger.info(message)
+
+        return_code = 1
+        hits = 0
+        try:
+            for message in scan_worker.med_scan(target_path, out_folder_path, fingerprint):
+                if message["type"] == "log":
+                    clean_output = message["message"].strip()
+                    if clean_output:
+                        log_info(clean_output)
+                elif message["type"] == "error":
+                    logger.error(message["message"])
+                elif message["type"] == "row":
+                    result = message["row"]
+                    hits += 1
+                    log_info(f"MED {result['Detector']} hit #{hits}: process {result['Process']} "
+                             f"(PID {result['PID']}) at {hex(result['Address'])}")
+                elif message["type"] == "done":
+                    return_code = message["status"]
+        except Exception as e:
+            if not background:
+                raise
+            logger.error(f"MED scan of '{target_path}' failed: {e}")
+            set_scan_status(out_folder_path, SCAN_STATUS_FAILED)
+        if background:
+            status = "finished successfully" if return_code == 0 else "failed"
+            logger.info(f"MED scan of '{target_path}' {status} with {hits} hits, results saved to {out_folder_path}")
+        return return_code
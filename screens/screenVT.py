@@ -3,6 +3,7 @@ import os
 from colorama import Fore
 
 from analyzers import vt
+from consts import VT_RESULTS_FILE
 from screens.screenMgmt import ScreenMgmt
 from singletonMeta import SingletonMeta
 from utils import load_json_from_file
@@ -14,7 +15,7 @@ class ScreenVT(ScreenMgmt, metaclass=SingletonMeta):
         super().__init__(frame_id="vt", main_title="VirusTotal", sub_title="")
 
     def get_vt_results_path(self):
-        return os.path.join(self.passed_params.get("out_folder"), vt.VT_RESULTS_FILE)
+        return os.path.join(self.passed_params.get("out_folder"), VT_RESULTS_FILE)
 
     def is_results_available(self):
         return os.path.exists(self.get_vt_results_path())
@@ -0,0 +1,28 @@
+import ast
+import os
+import unittest
+
+import consts
+
+MED_PLUGIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "volatility3", "volatility3", "framework", "plugins", "windows", "med.py")
+
+
+def read_plugin_constant(name):
+    """Reads a string constant from the MED plugin's source, as the plugin can only be imported inside volatility3."""
+    with open(MED_PLUGIN_PATH, encoding="utf-8") as plugin_file:
+        tree = ast.parse(plugin_file.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == name
+                                                for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError(f"{name} isn't defined in {MED_PLUGIN_PATH}")
+
+
+class PluginConstsTest(unittest.TestCase):
+    def test_dump_manifest_file_matches_plugin(self):
+        self.assertEqual(consts.DUMP_MANIFEST_FILE, read_plugin_constant("DUMP_MANIFEST_FILE"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from analyzers import vt
+
+KNOWN_DUMP = b"known dump"
+UNKNOWN_DUMP = b"unknown dump"
+DETECTION = {'engine_name': 'E1', 'category': 'malicious', 'result': 'Evil'}
+
+
+class StubVTHandler(BaseHTTPRequestHandler):
+    """A stand-in for the VT API: one file already has a report, any other file is uploaded and then analyzed."""
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, content):
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests.append(('GET', self.path))
+        if self.path.startswith('/files/'):
+            if self.path == f'/files/{hashlib.sha256(KNOWN_DUMP).hexdigest()}':
+                return self.reply(200, {'data': {'attributes': {'last_analysis_results': {
+                    'e1': DETECTION, 'e2': {'engine_name': 'E2', 'category': 'undetected', 'result': None}}}}})
+            return self.reply(404, {'error': {'code': 'NotFoundError'}})
+        if self.path.startswith('/analyses/'):
+            status, attributes = stub.poll_replies.pop(0) if stub.poll_replies else \
+                (200, {'status': 'completed', 'results': {}})
+            return self.reply(status, {'data': {'attributes': attributes}})
+        self.reply(404, {})
+
+    def do_POST(self):
+        stub = self.server.stub
+        stub.requests.append(('POST', self.path))
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.reply(200, {'data': {'id': 'analysis-1'}})
+
+
+class StubVT:
+    def __init__(self, poll_replies=None):
+        self.requests = []
+        self.poll_replies = list(poll_replies or [])
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubVTHandler)
+        self.server.stub = self
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class VTClientTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.files = {}
+        for name, content in (('known.dmp', KNOWN_DUMP), ('unknown.dmp', UNKNOWN_DUMP)):
+            path = os.path.join(self.folder.name, name)
+            with open(path, 'wb') as file:
+                file.write(content)
+            self.files[hashlib.sha256(content).hexdigest()] = path
+        self.known_hash = hashlib.sha256(KNOWN_DUMP).hexdigest()
+        self.unknown_hash = hashlib.sha256(UNKNOWN_DUMP).hexdigest()
+        self.sleeps = []
+        for patch in (mock.patch.object(vt, 'POLL_INITIAL_DELAY', 0.01),
+                      mock.patch.object(vt, 'POLL_MAX_DELAY', 0.04),
+                      mock.patch.object(vt.time, 'sleep', self.sleeps.append)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def start_stub(self, poll_replies=None):
+        stub = StubVT(poll_replies)
+        self.addCleanup(stub.close)
+        return stub
+
+    def test_known_hash_is_looked_up_without_upload(self):
+        stub = self.start_stub()
+        client = vt.VTClient('key', stub.url)
+        self.addCleanup(client.close)
+        verdicts, errors = client.get_verdicts({self.known_hash: self.files[self.known_hash]})
+        self.assertEqual(verdicts, {self.known_hash: [DETECTION]})
+        self.assertEqual(errors, {})
+        self.assertEqual(stub.requests, [('GET', f'/files/{self.known_hash}')])
+
+    def test_unknown_hash_is_uploaded_and_polled_with_backoff(self):
+        # A failed poll is retried, and the delay between polls doubles up to the maximum
+        stub = self.start_stub([(500, {}), (200, {'status': 'queued'}), (200, {'status': 'queued'}),
+                                (200, {'status': 'completed', 'results': {'e1': DETECTION}})])
+        client = vt.VTClient('key', stub.url)
+        self.addCleanup(client.close)
+        verdicts, errors = client.get_verdicts({self.unknown_hash: self.files[self.unknown_hash]})
+        self.assertEqual(verdicts, {self.unknown_hash: [DETECTION]})
+        self.assertEqual(errors, {})
+        self.assertEqual(stub.requests, [('GET', f'/files/{self.unknown_hash}'), ('POST', '/files')] +
+                         [('GET', '/analyses/analysis-1')] * 4)
+        self.assertEqual(self.sleeps, [0.01, 0.02, 0.04, 0.04])
+
+    def test_analyze_caches_verdicts(self):
+        stub = self.start_stub()
+        cache_file = os.path.join(self.folder.name, 'cache', 'vt_verdicts.json')
+        with mock.patch.object(vt, 'API_KEY', 'key'), mock.patch.object(vt, 'API_URL', stub.url), \
+                mock.patch.object(vt, 'VT_CACHE_FILE', cache_file), mock.patch.object(vt, 'ScanCatalogue') as catalogue:
+            vt.analyze(self.folder.name)
+            requests_made = len(stub.requests)
+            self.assertEqual(requests_made, 4)
+            catalogue().update_vt_status.assert_called_with(self.folder.name, vt.VT_STATUS_DETECTED)
+
+            # Both verdicts now come from the cache, without asking VT again
+            vt.analyze(self.folder.name)
+            self.assertEqual(len(stub.requests), requests_made)
+        with open(os.path.join(self.folder.name, vt.VT_RESULTS_FILE)) as results_file:
+            results = json.load(results_file)['results']
+        self.assertIn('known.dmp:E1 detects malicious with Evil', results)
+        self.assertIn('unknown.dmp:no detection found', results)
+
+
+if __name__ == '__main__':
+    unittest.main()
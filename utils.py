@@ -1,10 +1,16 @@
+import hashlib
 import json
 import os
 import datetime
 import uuid
 import re
 
+from consts import RESULTS_FILE, LEGACY_RESULTS_FILE, SCAN_STATUS_FILE, SCAN_STATUS_COMPLETED, SCAN_INFO_FILE, \
+    DUMP_MANIFEST_FILE
+
 MINIMUM_LINE_LENGTH = 45
+SAMPLE_COUNT = 64
+SAMPLE_SIZE = 64 * 1024
 
 
 def read_file_content(file_path):
@@ -117,13 +123,51 @@ def load_json_from_file(file_path):
         return None
 
 
-def format_results(results: dict):
-    for result in results:
-        result["Hexdump"] = result["Hexdump"].strip('"')
-        result["Disassembly"] = result["Disassembly"].strip('"')
+def format_result(result: dict):
+    result["Hexdump"] = result["Hexdump"].strip('"')
+    result["Disassembly"] = result["Disassembly"].strip('"')
+    return result
+
+
+def append_json_line(data: dict, file):
+    file.write(json.dumps(data) + "\n")
+    file.flush()
+
+
+def load_json_lines_from_file(file_path):
+    results = []
+    try:
+        with open(file_path, 'r') as file:
+            for line in file:
+                # The last line of a scan that is still running may not be complete yet
+                if not line.endswith("\n"):
+                    break
+                results.append(json.loads(line))
+    except FileNotFoundError:
+        pass
     return results
 
 
+def load_results(out_folder: str):
+    legacy_results_file = os.path.join(out_folder, LEGACY_RESULTS_FILE)
+    if os.path.exists(legacy_results_file):
+        return load_json_from_file(legacy_results_file)
+    return load_json_lines_from_file(os.path.join(out_folder, RESULTS_FILE))
+
+
+def set_scan_status(out_folder: str, status: str):
+    save_json_to_folder({"status": status}, out_folder, SCAN_STATUS_FILE)
+
+
+def get_scan_status(out_folder: str):
+    status_file = os.path.join(out_folder, SCAN_STATUS_FILE)
+    if not os.path.exists(status_file):
+        # Scans from before status tracking only have a results file once they completed
+        return SCAN_STATUS_COMPLETED
+    status = load_json_from_file(status_file)
+    return status.get("status") if status else SCAN_STATUS_COMPLETED
+
+
 # def prettify_hexdump(hexdump_dict: dict):
 #     text = ""
 #     for entry in hexdump_dict:
@@ -155,8 +199,88 @@ def get_folder_names(directory):
         return []
 
 
+def parse_folder_datetime(entry):
+    datetime_str, _ = entry.rsplit('_', 1)
+    return datetime.datetime.strptime(datetime_str, '%Y-%m-%d_%H-%M-%S')
+
+
 def convert_folder_format(entry):
-    datetime_str, uuid_str = entry.rsplit('_', 1)
-    dt_object = datetime.datetime.strptime(datetime_str, '%Y-%m-%d_%H-%M-%S')
-    new_datetime_format = dt_object.strftime('%H:%M:%S %d/%m/%Y')
+    _, uuid_str = entry.rsplit('_', 1)
+    new_datetime_format = parse_folder_datetime(entry).strftime('%H:%M:%S %d/%m/%Y')
     return f"{new_datetime_format} - {uuid_str}"
+
+
+def sampled_file_hash(file_path, sample_count: int = SAMPLE_COUNT, sample_size: int = SAMPLE_SIZE):
+    """
+    Hashes the size of a file plus evenly spaced samples of its content, so multi-GB memory images can be identified
+    without reading them entirely. Returns None for targets that are not regular files (e.g. live scans).
+    """
+    if not os.path.isfile(file_path):
+        return None
+    file_size = os.path.getsize(file_path)
+    sha256 = hashlib.sha256(str(file_size).encode())
+    with open(file_path, 'rb') as file:
+        if file_size <= sample_count * sample_size:
+            sha256.update(file.read())
+        else:
+            step = (file_size - sample_size) // (sample_count - 1)
+            for i in range(sample_count):
+                file.seek(i * step)
+                sha256.update(file.read(sample_size))
+    return sha256.hexdigest()
+
+
+def image_fingerprint(file_path):
+    """
+    Identifies the content of an image by its sampled hash, size and modification time.
+    Returns None for targets that are not regular files (e.g. live scans).
+    """
+    sampled_hash = sampled_file_hash(file_path)
+    if sampled_hash is None:
+        return None
+    stat = os.stat(file_path)
+    return {"sampled_hash": sampled_hash, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def load_scan_info(out_folder: str):
+    scan_info_path = os.path.join(out_folder, SCAN_INFO_FILE)
+    if not os.path.exists(scan_info_path):
+        return None
+    return load_json_from_file(scan_info_path)
+
+
+def get_dump_store_folder():
+    return os.path.join(get_base_path(), "cache", "dumps")
+
+
+def load_dump_manifest(out_folder: str):
+    """Returns the dumped files of a scan (file name -> details, including the SHA-256 of the file)."""
+    manifest_path = os.path.join(out_folder, DUMP_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    return load_json_from_file(manifest_path) or {}
+
+
+def link_duplicate_dumps(out_folder: str):
+    """
+    Replaces the dumps of a scan that are identical to dumps of earlier scans by hard links to a shared,
+    content-addressed copy, so repeated dumps of the same code take disk space once.
+    """
+    dump_store_folder = get_dump_store_folder()
+    os.makedirs(dump_store_folder, exist_ok=True)
+    linked = 0
+    for file_name, details in load_dump_manifest(out_folder).items():
+        file_path = os.path.join(out_folder, file_name)
+        stored_path = os.path.join(dump_store_folder, f"{details['sha256']}.dmp")
+        try:
+            if not os.path.exists(stored_path):
+                os.link(file_path, stored_path)
+            elif not os.path.samefile(file_path, stored_path):
+                linked_path = f"{file_path}.link"
+                os.link(stored_path, linked_path)
+                os.replace(linked_path, file_path)
+                linked += 1
+        except OSError:
+            # Hard links aren't supported everywhere (e.g. across drives), the dump is simply kept as is
+            continue
+    return linked
@@ -15,6 +15,8 @@ import hashlib
 import ntpath
 import json
 
+import pytest
+
 #
 # HELPER FUNCTIONS
 #
@@ -53,6 +55,29 @@ def runvol_plugin(plugin, img, volatility, python, pluginargs=[], globalargs=[])
     return runvol(args, volatility, python)
 
 
+def construct_plugin(plugin_name, img, volatility):
+    """Constructs a plugin against an image in this process, for tests of
+    the framework's internals."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(volatility)))
+    from volatility3 import framework, plugins
+    from volatility3.framework import automagic, contexts
+    from volatility3.framework import plugins as framework_plugins
+    from volatility3.framework.configuration import requirements
+
+    framework.require_interface_version(2, 0, 0)
+    framework.import_files(plugins, True)
+    plugin = framework.list_plugins()[plugin_name]
+
+    ctx = contexts.Context()
+    ctx.config["automagic.LayerStacker.single_location"] = (
+        requirements.URIRequirement.location_from_file(img)
+    )
+    automagics = automagic.choose_automagic(automagic.available(ctx), plugin)
+    return framework_plugins.construct_plugin(
+        ctx, automagics, plugin, "plugins", None, None
+    )
+
+
 #
 # TESTS
 #
@@ -273,6 +298,73 @@ def test_windows_devicetree(image, volatility, python):
     assert rc == 0
 
 
+def test_windows_gargoyle_timer_decoder(image, volatility, python):
+    # The decoder reads the timers' APC fields from raw bytes, and must agree with the object model
+    plugin = construct_plugin("windows.timers.Timers", image, volatility)
+    from volatility3.framework import symbols
+    from volatility3.framework.layers import intel
+    from volatility3.plugins.windows import gargoyle
+
+    ctx = plugin.context
+    kernel = ctx.modules[plugin.config["kernel"]]
+    if not isinstance(
+        ctx.layers[kernel.layer_name], intel.Intel32e
+    ) or not symbols.symbol_table_is_64bit(ctx, kernel.symbol_table_name):
+        pytest.skip("The decoder is compared on x64 kernels")
+
+    decoder = gargoyle.TimerAPCDecoder(ctx, kernel, True, lambda *args: None)
+    compared = 0
+    for _, timer_data in plugin._generator():
+        timer = kernel.object("_ETIMER", offset=timer_data[0], absolute=True)
+        apc = kernel.object(
+            decoder.apcTypeName, offset=timer.TimerApc.vol.offset, absolute=True
+        )
+        thread = kernel.object("_ETHREAD", offset=int(apc.Thread), absolute=True)
+        if int(apc.NormalRoutine) == 0 or not thread.is_valid():
+            assert decoder.decode(timer_data[0]) is None
+            continue
+        process = thread.owning_process()
+        if not process.is_valid():
+            continue
+
+        timer_apc = decoder.decode(timer_data[0])
+        routine = int(apc.NormalRoutine)
+        if ((routine >> 32) | 0x01) == 0xFFFFFFFF:
+            routine = (-(routine >> 2)) & 0xFFFFFFFF
+        assert timer_apc.routine == routine
+        assert timer_apc.thread_offset == int(apc.Thread)
+        assert timer_apc.process_offset == process.vol.offset
+        assert timer_apc.normal_context == int(apc.NormalContext)
+        assert timer_apc.normal_context_offset == apc.NormalContext.vol.offset
+        compared += 1
+
+    if not compared:
+        pytest.skip("The image has no timers with user-mode APCs")
+
+
+def test_windows_intel_page_map(image, volatility, python):
+    # Kernel addresses are canonical (sign extended), and must map the same from the page map
+    plugin = construct_plugin("windows.pslist.PsList", image, volatility)
+    from volatility3.framework.layers import intel
+
+    kernel = plugin.context.modules[plugin.config["kernel"]]
+    layer = plugin.context.layers[kernel.layer_name]
+    if not isinstance(layer, intel.Intel32e):
+        pytest.skip("Canonical addresses are tested on x64 kernels")
+    assert kernel.offset > layer.address_mask
+
+    length = 0x1000000
+    chunk_size = layer._page_map_threshold // 2
+    layer.flush_tlb()
+    expected = b"".join(
+        layer.read(offset, chunk_size, pad=True)
+        for offset in range(kernel.offset, kernel.offset + length, chunk_size)
+    )
+    assert layer.get_page_map() is not None
+    assert layer.read(kernel.offset, length, pad=True) == expected
+    assert expected.count(0) != len(expected)
+
+
 # LINUX
 
 
@@ -0,0 +1,284 @@
+# This file is Copyright 2024 Volatility Foundation and licensed under the Volatility Software License 1.0
+# which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
+#
+"""A long-lived scan worker for the volatility framework.
+
+The worker imports the framework and all of its plugins once, and then answers scan
+requests from the process that started it over its standard input and output pipes.
+Each request runs a single plugin against an image in a fresh context, so consecutive
+scans do not pay the interpreter start-up, plugin import and symbol table parsing costs
+again.
+
+Requests are single lines of JSON of the form::
+
+    {"plugin": "windows.med", "file": "/path/to/image", "output_dir": "/path/to/output",
+     "config": {"dump": true}}
+
+and are answered with lines of JSON, each with a ``type`` of ``log`` (a line that the
+command line interface would have written to stderr), ``row`` (a top-level row of the
+plugin's output, as rendered by the JSONL renderer, sent as soon as it is complete) or
+``error``, followed by a final ``done`` message carrying the return code.  A request of
+``{"command": "version", "plugin": "windows.med"}`` is answered with a single ``version``
+message holding the plugin's version (or an ``error`` if the plugin is not available), so
+clients can tell whether stored results were produced by the same plugin.  A request of
+``{"command": "shutdown"}``, or the client closing the worker's standard input, stops the
+worker.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import traceback
+from typing import Any, Dict, TextIO, Type, Union
+
+import volatility3.plugins
+from volatility3 import cli, framework
+from volatility3.cli import text_renderer
+from volatility3.framework import (
+    automagic,
+    constants,
+    contexts,
+    exceptions,
+    interfaces,
+    plugins,
+)
+from volatility3.framework.automagic import stacker
+from volatility3.framework.configuration import requirements
+
+vollog = logging.getLogger(__name__)
+
+
+class ReplyLogHandler(logging.Handler):
+    """A logging handler that forwards formatted records to the client of the worker."""
+
+    def __init__(self, worker: "ScanWorker", level: int = logging.WARNING):
+        super().__init__(level)
+        self._worker = worker
+        self.setFormatter(cli.formatter)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._worker.reply({"type": "log", "message": self.format(record)})
+        except (OSError, ValueError):
+            self.handleError(record)
+
+
+class ReplyProgress:
+    """A progress handler that forwards progress lines to the client of the worker.
+
+    The lines match those printed by :class:`~volatility3.cli.PrintedProgress`, and are
+    only sent when the displayed value changes to avoid flooding the client.
+    """
+
+    def __init__(self, worker: "ScanWorker"):
+        self._worker = worker
+        self._last_message = None
+
+    def __call__(self, progress: Union[int, float], description: str = None):
+        message = f"Progress: {round(progress, 2): 7.2f}\t\t{description or ''}"
+        if message != self._last_message:
+            self._last_message = message
+            self._worker.reply({"type": "log", "message": message})
+
+
+class ReplyJsonLinesRenderer(text_renderer.JsonLinesRenderer):
+    """A JSON lines renderer that sends each row to the client of the worker."""
+
+    def __init__(self, worker: "ScanWorker", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._worker = worker
+
+    def output_line(self, outfd, line: Dict[str, Any]) -> None:
+        self._worker.reply({"type": "row", "row": line})
+
+
+class ScanWorker(cli.CommandLine):
+    """Serves plugin runs to a client, keeping the framework warm between them."""
+
+    CLI_NAME = "volworker"
+
+    def __init__(self, replies: TextIO):
+        super().__init__()
+        self._replies = replies
+        self.plugin_list = {}
+
+    @classmethod
+    def setup_logging(cls):
+        # Records are forwarded to the client per request, rather than written to the console
+        cli.rootlog.setLevel(1)
+
+    def reply(self, message: Dict[str, Any]) -> None:
+        """Sends a single message to the client."""
+        self._replies.write(json.dumps(message) + "\n")
+        self._replies.flush()
+
+    def load_framework(self) -> None:
+        """Imports every plugin once, for the lifetime of the worker."""
+        volatility3.framework.require_interface_version(2, 0, 0)
+        failures = framework.import_files(volatility3.plugins, True)
+        if failures:
+            vollog.info(
+                "The following plugins could not be loaded: "
+                + ", ".join(sorted(failures))
+            )
+        self.plugin_list = framework.list_plugins()
+
+    def serve(self, requests: TextIO) -> None:
+        """Answers requests until the client asks the worker to stop or goes away.
+
+        Args:
+            requests: The stream from which requests are read, one per line
+        """
+        self.load_framework()
+        for line in requests:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as excp:
+                self.reply({"type": "error", "message": f"Invalid request: {excp}"})
+                continue
+            if request.get("command") == "shutdown":
+                return None
+            if request.get("command") == "version":
+                self.reply_version(request["plugin"])
+                continue
+            # The client waits for the done message, so it is sent even if the request
+            # is interrupted part way through
+            return_code = 1
+            try:
+                return_code = self.handle_request(request)
+            finally:
+                self.reply({"type": "done", "status": return_code})
+
+    def reply_version(self, plugin_name: str) -> None:
+        """Sends the version of a plugin to the client."""
+        try:
+            version = self.find_plugin(plugin_name).version
+        except ValueError as excp:
+            self.reply({"type": "error", "message": str(excp)})
+            return None
+        self.reply({"type": "version", "version": list(version)})
+
+    def handle_request(self, request: Dict[str, Any]) -> int:
+        """Runs a single plugin request, forwarding its logs and output to the client.
+
+        Returns:
+            The return code the command line interface would have exited with
+        """
+        log_handler = ReplyLogHandler(self)
+        cli.rootlog.addHandler(log_handler)
+        try:
+            self.run_plugin(
+                request["plugin"],
+                request["file"],
+                request.get("output_dir", os.getcwd()),
+                request.get("config", {}),
+                ReplyProgress(self),
+            )
+            return 0
+        except exceptions.UnsatisfiedException as excp:
+            message = f"Unable to validate the plugin requirements: {[x for x in excp.unsatisfied]}"
+        except Exception as excp:
+            vollog.debug(
+                "".join(
+                    traceback.TracebackException.from_exception(excp).format(chain=True)
+                )
+            )
+            message = f"Volatility encountered an error: {excp}"
+        finally:
+            cli.rootlog.removeHandler(log_handler)
+            self.release_caches()
+        self.reply({"type": "error", "message": message})
+        return 1
+
+    def find_plugin(self, plugin_name: str) -> Type[interfaces.plugins.PluginInterface]:
+        """Finds a plugin by name, matching names the same way the command line does."""
+        matched_plugins = [name for name in self.plugin_list if plugin_name in name]
+        if plugin_name in self.plugin_list:
+            matched_plugins = [plugin_name]
+        if len(matched_plugins) != 1:
+            raise ValueError(
+                f"Plugin {plugin_name} matches {len(matched_plugins)} plugins"
+            )
+        return self.plugin_list[matched_plugins[0]]
+
+    def run_plugin(
+        self,
+        plugin_name: str,
+        file_name: str,
+        output_dir: str,
+        config: Dict[str, Any],
+        progress_callback: constants.ProgressCallback,
+    ) -> None:
+        """Runs a plugin against an image in a fresh context, streaming its rows to the client."""
+        plugin = self.find_plugin(plugin_name)
+        if not os.path.exists(output_dir):
+            raise ValueError(
+                f"The output directory specified does not exist: {output_dir}"
+            )
+
+        base_config_path = "plugins"
+        plugin_config_path = interfaces.configuration.path_join(
+            base_config_path, plugin.__name__
+        )
+
+        ctx = contexts.Context()
+        automagics = automagic.choose_automagic(automagic.available(ctx), plugin)
+        ctx.config["automagic.LayerStacker.single_location"] = (
+            requirements.URIRequirement.location_from_file(file_name)
+        )
+        ctx.config["automagic.LayerStacker.stackers"] = stacker.choose_os_stackers(
+            plugin
+        )
+        self.output_dir = output_dir
+        self.populate_config(
+            ctx,
+            {plugin.__name__: plugin},
+            argparse.Namespace(**config),
+            plugin_config_path,
+        )
+
+        constructed = plugins.construct_plugin(
+            ctx,
+            automagics,
+            plugin,
+            base_config_path,
+            progress_callback,
+            self.file_handler_class_factory(),
+        )
+
+        ReplyJsonLinesRenderer(self).render(constructed.run())
+        page_cache = ctx.layers.page_cache
+        vollog.debug(
+            f"Page cache: {page_cache.hits} hits, {page_cache.misses} misses, {page_cache.size} bytes held"
+        )
+
+    @staticmethod
+    def release_caches() -> None:
+        """Drops per-layer caches so that layers from finished scans can be freed,
+        along with the decompressed ISF files the scan read.
+
+        Pages read from the image are held by the page cache of the scan's own
+        context, and are freed along with it, as are the VAD indexes built from it.
+        """
+        from volatility3.framework.layers import intel
+        from volatility3.framework.symbols import intermed
+
+        intel.Intel._get_valid_table.cache_clear()
+        intermed._read_isf_data.cache_clear()
+
+
+def main():
+    """A convenience function for constructing and running a :class:`ScanWorker`."""
+    argparse.ArgumentParser(
+        prog=ScanWorker.CLI_NAME,
+        description="A long-lived volatility worker that runs plugins on requests read from stdin",
+    ).parse_args()
+
+    # Replies go to the original stdout, anything plugins print directly is moved to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    ScanWorker(replies).serve(sys.stdin)
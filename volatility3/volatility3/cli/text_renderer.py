@@ -421,6 +421,22 @@ class JsonRenderer(CLIRenderer):
         """Outputs the JSON data to a file in a particular format"""
         outfd.write("{}\n".format(json.dumps(result, indent=2, sort_keys=True)))
 
+    def node_dict(
+        self, grid: interfaces.renderers.TreeGrid, node: interfaces.renderers.TreeNode
+    ) -> Dict[str, Any]:
+        """Renders the values of a single node into a dictionary keyed by column name"""
+        node_dict: Dict[str, Any] = {"__children": []}
+        for column_index in range(len(grid.columns)):
+            column = grid.columns[column_index]
+            renderer = self._type_renderers.get(
+                column.type, self._type_renderers["default"]
+            )
+            data = renderer(list(node.values)[column_index])
+            if isinstance(data, interfaces.renderers.BaseAbsentValue):
+                data = None
+            node_dict[column.name] = data
+        return node_dict
+
     def render(self, grid: interfaces.renderers.TreeGrid):
         outfd = sys.stdout
 
@@ -436,16 +452,7 @@ class JsonRenderer(CLIRenderer):
         ) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
             # Nodes always have a path value, giving them a path_depth of at least 1, we use max just in case
             acc_map, final_tree = accumulator
-            node_dict: Dict[str, Any] = {"__children": []}
-            for column_index in range(len(grid.columns)):
-                column = grid.columns[column_index]
-                renderer = self._type_renderers.get(
-                    column.type, self._type_renderers["default"]
-                )
-                data = renderer(list(node.values)[column_index])
-                if isinstance(data, interfaces.renderers.BaseAbsentValue):
-                    data = None
-                node_dict[column.name] = data
+            node_dict = self.node_dict(grid, node)
             if node.parent:
                 acc_map[node.parent.path]["__children"].append(node_dict)
             else:
@@ -468,5 +475,41 @@ class JsonLinesRenderer(JsonRenderer):
     def output_result(self, outfd, result):
         """Outputs the JSON results as JSON lines"""
         for line in result:
-            outfd.write(json.dumps(line, sort_keys=True))
-            outfd.write("\n")
+            self.output_line(outfd, line)
+
+    def output_line(self, outfd, line: Dict[str, Any]) -> None:
+        """Outputs a single top-level row (with its children) as a JSON line"""
+        outfd.write(json.dumps(line, sort_keys=True))
+        outfd.write("\n")
+        outfd.flush()
+
+    def render(self, grid: interfaces.renderers.TreeGrid):
+        """Outputs each top-level row as soon as it is complete, rather than once the whole grid is populated"""
+        outfd = sys.stdout
+
+        # A top-level row is complete (including all its children) once the next top-level row arrives
+        pending: List[Dict[str, Any]] = []
+
+        def visitor(
+            node: interfaces.renderers.TreeNode,
+            acc_map: Dict[str, Dict[str, Any]],
+        ) -> Dict[str, Dict[str, Any]]:
+            node_dict = self.node_dict(grid, node)
+            if node.parent:
+                acc_map[node.parent.path]["__children"].append(node_dict)
+            else:
+                if pending:
+                    self.output_line(outfd, pending.pop())
+                acc_map.clear()
+                pending.append(node_dict)
+            acc_map[node.path] = node_dict
+
+            return acc_map
+
+        if not grid.populated:
+            grid.populate(visitor, {})
+        else:
+            grid.visit(node=None, function=visitor, initial_accumulator={})
+
+        for line in pending:
+            self.output_line(outfd, line)
@@ -103,6 +103,9 @@ class Parallelism(enum.IntEnum):
 PARALLELISM = Parallelism.Off
 """Default value to the parallelism setting used throughout volatility"""
 
+PAGE_CACHE_SIZE = 64 * 1024 * 1024
+"""The total size in bytes of the pages cached from the data layers of a context (0 disables the cache)"""
+
 ISF_MINIMUM_SUPPORTED = (2, 0, 0)
 """The minimum supported version of the Intermediate Symbol Format"""
 ISF_MINIMUM_DEPRECATED = (3, 9, 9)
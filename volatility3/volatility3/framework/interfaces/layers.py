@@ -8,22 +8,40 @@ or map a procedure (such as decryption) across another layer of data.
 """
 import collections.abc
 import functools
+import itertools
 import logging
 import math
 import multiprocessing
 import multiprocessing.managers
+import multiprocessing.pool
+import os
+import pickle
 import threading
 import traceback
-import types
 from abc import ABCMeta, abstractmethod
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from volatility3.framework import constants, exceptions, interfaces
 
 vollog = logging.getLogger(__name__)
 
-ProgressValue = Union["DummyProgress", multiprocessing.managers.ValueProxy]
+ProgressValue = Union[
+    "DummyProgress", "SharedProgress", multiprocessing.managers.ValueProxy
+]
 IteratorValue = Tuple[List[Tuple[str, int, int]], int]
+WritableBuffer = Union[bytearray, memoryview]
 
 
 class ScannerInterface(
@@ -172,6 +190,20 @@ class DataLayerInterface(
             The bytes read from the layer, starting at offset for length bytes
         """
 
+    def readinto(self, offset: int, buffer: WritableBuffer, pad: bool = False) -> int:
+        """Reads len(buffer) bytes from offset into a writable buffer (such as
+        a bytearray or a slice of a memoryview of one), as :meth:`read` does.
+
+        Args:
+            offset: The offset at which to being reading within the layer
+            buffer: The buffer to fill, its length determines the number of bytes read
+            pad: A boolean indicating whether exceptions should be raised or bad bytes replaced with null characters
+
+        Returns:
+            The number of bytes read into the buffer
+        """
+        return _copy_into(buffer, self.read(offset, len(buffer), pad))
+
     @abstractmethod
     def write(self, offset: int, data: bytes) -> None:
         """Writes a chunk of data at offset.
@@ -206,6 +238,9 @@ class DataLayerInterface(
 
     # ## General scanning methods
 
+    _scan_chunks_per_worker = 4
+    """The number of chunks per worker that parallel scans keep in flight"""
+
     def scan(
         self,
         context: interfaces.context.ContextInterface,
@@ -257,26 +292,70 @@ class DataLayerInterface(
                         )
                     yield from scan_chunk(value)
             else:
-                progress = multiprocessing.Manager().Value("Q", 0)
-                parallel_module: types.ModuleType = multiprocessing
+                processes = os.cpu_count() or 1
+                window = processes * self._scan_chunks_per_worker
+                # The first chunks are found before any workers start, so that anything built
+                # translating them (such as the page map of an Intel layer) is in the copy of the
+                # layers that each worker unpickles. Anything built later stays in this process, but
+                # the chunks of a linearly mapped layer name the layer below it, so workers don't
+                # translate through the scanned layer
+                chunks = iter(scan_iterator())
+                first_chunks = list(itertools.islice(chunks, window))
+                pool: multiprocessing.pool.Pool
+                scan_chunk: Callable[[IteratorValue], List[Any]]
                 if constants.PARALLELISM == constants.Parallelism.Threading:
-                    progress = DummyProgress()
-                    parallel_module = threading
-                scan_chunk = functools.partial(self._scan_chunk, scanner, progress)
-                with parallel_module.Pool() as pool:
-                    result = pool.map_async(scan_chunk, scan_iterator())
-                    while not result.ready():
-                        if progress_callback:
-                            # Run the progress_callback
-                            progress_callback(
-                                scan_metric(progress.value),
-                                f"Scanning {self.name} using {scanner.__class__.__name__}",
-                            )
-                        # Ensures we don't burn CPU cycles going round in a ready waiting loop
-                        # without delaying the user too long between progress updates/results
-                        result.wait(0.1)
-                    for result_value in result.get():
-                        yield from result_value
+                    progress = monitor = DummyProgress()
+                    scan_chunk = functools.partial(self._scan_chunk, scanner, progress)
+                    pool = multiprocessing.pool.ThreadPool(processes)
+                else:
+                    # The layers (and scanner) are pickled once rather than with each chunk, and each
+                    # worker unpickles its own copy of them when it starts. Only the image file's pages
+                    # are shared, by every worker mapping the same file. Workers inherit the shared
+                    # progress value when they start, rather than each chunk carrying a proxy
+                    self._build_page_maps(
+                        {
+                            layer_name
+                            for data_to_scan, _ in first_chunks
+                            for layer_name, _, _ in data_to_scan
+                        }
+                    )
+                    monitor = multiprocessing.Value("Q", 0, lock=False)
+                    worker_state = pickle.dumps(
+                        functools.partial(self._scan_chunk, scanner, SharedProgress())
+                    )
+                    scan_chunk = _scan_worker_chunk
+                    pool = multiprocessing.Pool(
+                        processes,
+                        initializer=_initialize_scan_worker,
+                        initargs=(monitor, worker_state),
+                    )
+                with pool:
+                    # Only a few chunks per worker are in flight at once, and each chunk's hits are
+                    # yielded (in order) as soon as it's done, so memory use doesn't grow with the layer.
+                    # Closing this generator early terminates the pool, and so the scan.
+                    chunks = itertools.chain(first_chunks, chunks)
+                    pending: Deque[multiprocessing.pool.AsyncResult] = (
+                        collections.deque()
+                    )
+                    while True:
+                        for value in chunks:
+                            pending.append(pool.apply_async(scan_chunk, (value,)))
+                            if len(pending) >= window:
+                                break
+                        if not pending:
+                            break
+                        result = pending.popleft()
+                        while not result.ready():
+                            if progress_callback:
+                                # Run the progress_callback
+                                progress_callback(
+                                    scan_metric(monitor.value),
+                                    f"Scanning {self.name} using {scanner.__class__.__name__}",
+                                )
+                            # Ensures we don't burn CPU cycles going round in a ready waiting loop
+                            # without delaying the user too long between progress updates/results
+                            result.wait(0.1)
+                        yield from result.get()
         except Exception as e:
             # We don't care the kind of exception, so catch and report on everything, yielding nothing further
             vollog.debug(f"Scan Failure: {str(e)}")
@@ -355,16 +434,25 @@ class DataLayerInterface(
         iterator_value: IteratorValue,
     ) -> List[Any]:
         data_to_scan, chunk_end = iterator_value
-        data = b""
+        # The blocks are read into a single buffer, rather than concatenated
+        buffer = bytearray(sum(chunk_size for _, _, chunk_size in data_to_scan))
+        view = memoryview(buffer)
+        position = 0
         for layer_name, address, chunk_size in data_to_scan:
             try:
-                data += self.context.layers[layer_name].read(address, chunk_size)
+                position += self.context.layers.readinto(
+                    layer_name, address, view[position : position + chunk_size]
+                )
             except exceptions.InvalidAddressException:
                 vollog.debug(
                     "Invalid address in layer {} found scanning {} at address {:x}".format(
                         layer_name, self.name, address
                     )
                 )
+        view.release()
+        if position < len(buffer):
+            del buffer[position:]
+        data = bytes(buffer)
 
         if len(data) > scanner.chunk_size + scanner.overlap:
             vollog.debug(f"Scan chunk too large: {hex(len(data))}")
@@ -372,6 +460,27 @@ class DataLayerInterface(
         progress.value = chunk_end
         return list(scanner(data, chunk_end - len(data)))
 
+    def _build_page_maps(self, layer_names: Iterable[str]) -> None:
+        """Builds the page maps of the layers that scan chunks are read from,
+        and of the layers those translate through.
+
+        This is done before the layers are pickled for multiprocessing scan
+        workers, so that the page tables are walked once, rather than in
+        every worker.
+        """
+        pending = list(layer_names)
+        seen: Set[str] = set()
+        while pending:
+            layer_name = pending.pop()
+            if layer_name in seen:
+                continue
+            seen.add(layer_name)
+            layer = self.context.layers[layer_name]
+            get_page_map = getattr(layer, "get_page_map", None)
+            if get_page_map is not None:
+                get_page_map()
+            pending.extend(layer.dependencies)
+
     def _scan_metric(
         self, _scanner: "ScannerInterface", sections: List[Tuple[int, int]]
     ) -> Callable[[int], float]:
@@ -468,12 +577,21 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
 
     # ## Read/Write functions for mapped pages
 
-    @functools.lru_cache(maxsize=512)
     def read(self, offset: int, length: int, pad: bool = False) -> bytes:
         """Reads an offset for length bytes and returns 'bytes' (not 'str') of
         length size."""
+        buffer = bytearray(length)
+        self.readinto(offset, buffer, pad)
+        return bytes(buffer)
+
+    def readinto(self, offset: int, buffer: WritableBuffer, pad: bool = False) -> int:
+        """Reads len(buffer) bytes from offset into a writable buffer, filling
+        it one mapped segment at a time (and any gaps with null bytes)."""
+        length = len(buffer)
+        view = memoryview(buffer)
         current_offset = offset
-        output: bytes = b""
+        # The position within the buffer, separate from current_offset (see below)
+        position = 0
         for (
             layer_offset,
             sublength,
@@ -488,7 +606,10 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
                     f"Layer {self.name} cannot map offset: {current_offset}",
                 )
             elif layer_offset > current_offset:
-                output += b"\x00" * (layer_offset - current_offset)
+                gap = layer_offset - current_offset
+                fill = max(min(gap, length - position), 0)
+                view[position : position + fill] = bytes(fill)
+                position += gap
                 current_offset = layer_offset
             # The layer_offset can be less than the current_offset in non-linearly mapped layers
             # it does not suggest an overlap, but that the data is in an encoded block
@@ -503,9 +624,14 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
                     raise ValueError(
                         "ProcessedData length does not match expected length of chunk"
                     )
-                output += processed_data
+                # Only as much of a chunk as the buffer holds is kept, if the mapping runs past it
+                kept = max(min(sublength, length - position), 0)
+                view[position : position + kept] = memoryview(processed_data)[:kept]
+                position += sublength
                 current_offset += sublength
-        return output + (b"\x00" * (length - len(output)))
+        position = min(position, length)
+        view[position:] = bytes(length - position)
+        return length
 
     def write(self, offset: int, value: bytes) -> None:
         """Writes a value at offset, distributing the writing across any
@@ -615,11 +741,149 @@ class TranslationLayerInterface(DataLayerInterface, metaclass=ABCMeta):
                 yield output, chunk_position
 
 
+class PageCache:
+    """A cache of the pages read from data layers (those which don't translate
+    to another layer).
+
+    Pages are keyed by layer name and page number, and are evicted least
+    recently used first whenever the cached pages exceed the byte budget.
+    Every translation layer stacked on a data layer reads it through the
+    same cache.
+    """
+
+    page_size = 0x1000
+    """The size of the pages held by the cache"""
+    max_read_pages = 16
+    """Reads spanning more pages than this bypass the cache, so that bulk
+    reads don't flush it"""
+
+    def __init__(self, budget: Optional[int] = None) -> None:
+        if budget is None:
+            budget = constants.PAGE_CACHE_SIZE
+        self._budget = budget
+        self._pages: "collections.OrderedDict[Tuple[str, int], bytes]" = (
+            collections.OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def budget(self) -> int:
+        """The total number of bytes of page data the cache may hold."""
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int) -> None:
+        with self._lock:
+            self._budget = value
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        """The number of bytes of page data currently held by the cache."""
+        return self._size
+
+    def read(
+        self, layer: DataLayerInterface, offset: int, length: int, pad: bool = False
+    ) -> bytes:
+        """Reads from a data layer at offset for length bytes, through the
+        cache.
+
+        Reads reaching outside the layer are passed straight to the layer, which
+        determines whether they're padded or raise an exception.
+        """
+        first_page = offset // self.page_size
+        last_page = (offset + length - 1) // self.page_size
+        if (
+            length <= 0
+            or self._budget < self.page_size
+            or last_page - first_page >= self.max_read_pages
+            or offset < layer.minimum_address
+            or offset + length - 1 > layer.maximum_address
+        ):
+            return layer.read(offset, length, pad)
+        start = offset - (first_page * self.page_size)
+        if first_page == last_page:
+            return self._read_page(layer, first_page)[start : start + length]
+        data = b"".join(
+            [self._read_page(layer, page) for page in range(first_page, last_page + 1)]
+        )
+        return data[start : start + length]
+
+    def _read_page(self, layer: DataLayerInterface, page: int) -> bytes:
+        key = (layer.name, page)
+        with self._lock:
+            data = self._pages.get(key)
+            if data is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        # Pages are clipped to the layer, anything before its minimum address is never returned
+        page_start = page * self.page_size
+        start = max(page_start, layer.minimum_address)
+        end = min(page_start + self.page_size, layer.maximum_address + 1)
+        data = (b"\x00" * (start - page_start)) + layer.read(start, end - start)
+        with self._lock:
+            if key not in self._pages:
+                self._pages[key] = data
+                self._size += len(data)
+                self._evict()
+        return data
+
+    def _evict(self) -> None:
+        while self._size > self._budget and self._pages:
+            _, data = self._pages.popitem(last=False)
+            self._size -= len(data)
+
+    def discard(
+        self, layer_name: str, offset: Optional[int] = None, length: int = 1
+    ) -> None:
+        """Drops the cached pages of a layer, or only those covering length
+        bytes at offset if an offset is given."""
+        with self._lock:
+            for key in list(self._pages):
+                name, page = key
+                if name != layer_name:
+                    continue
+                if offset is not None and not (
+                    offset // self.page_size
+                    <= page
+                    <= (offset + max(length, 1) - 1) // self.page_size
+                ):
+                    continue
+                self._size -= len(self._pages.pop(key))
+
+    def clear(self) -> None:
+        """Drops all cached pages and resets the hit/miss counters."""
+        with self._lock:
+            self._pages.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Only the budget is kept, the pages and the lock are not copied to
+        other processes."""
+        return {"budget": self._budget}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["budget"])
+
+
 class LayerContainer(collections.abc.Mapping):
-    """Container for multiple layers of data."""
+    """Container for multiple layers of data.
+
+    Reads of data layers made through the container (which includes those
+    made by the translation layers stacked on them) are served from its
+    shared :class:`PageCache`.
+    """
 
     def __init__(self) -> None:
         self._layers: Dict[str, DataLayerInterface] = {}
+        self.page_cache = PageCache()
 
     def read(self, layer: str, offset: int, length: int, pad: bool = False) -> bytes:
         """Reads from a particular layer at offset for length bytes.
@@ -635,7 +899,32 @@ class LayerContainer(collections.abc.Mapping):
         Returns:
             The result of reading from the requested layer
         """
-        return self[layer].read(offset, length, pad)
+        data_layer = self[layer]
+        if isinstance(data_layer, TranslationLayerInterface):
+            return data_layer.read(offset, length, pad)
+        return self.page_cache.read(data_layer, offset, length, pad)
+
+    def readinto(
+        self, layer: str, offset: int, buffer: WritableBuffer, pad: bool = False
+    ) -> int:
+        """Reads from a particular layer at offset into a writable buffer, for
+        len(buffer) bytes.
+
+        Args:
+            layer: The name of the layer to read from
+            offset: Where to begin reading within the layer
+            buffer: The buffer to fill, its length determines the number of bytes read
+            pad: Whether to raise exceptions or return null bytes when errors occur
+
+        Returns:
+            The number of bytes read into the buffer
+        """
+        data_layer = self[layer]
+        if isinstance(data_layer, TranslationLayerInterface):
+            return data_layer.readinto(offset, buffer, pad)
+        return _copy_into(
+            buffer, self.page_cache.read(data_layer, offset, len(buffer), pad)
+        )
 
     def __eq__(self, other):
         return dict(self) == dict(other)
@@ -643,6 +932,7 @@ class LayerContainer(collections.abc.Mapping):
     def write(self, layer: str, offset: int, data: bytes) -> None:
         """Writes to a particular layer at offset for length bytes."""
         self[layer].write(offset, data)
+        self.page_cache.discard(layer, offset, len(data))
 
     def add_layer(self, layer: DataLayerInterface) -> None:
         """Adds a layer to memory model.
@@ -686,6 +976,7 @@ class LayerContainer(collections.abc.Mapping):
         # Otherwise, wipe out the layer
         self._layers[name].destroy()
         del self._layers[name]
+        self.page_cache.discard(name)
 
     def free_layer_name(self, prefix: str = "layer") -> str:
         """Returns an unused layer name to ensure no collision occurs when
@@ -721,6 +1012,73 @@ class LayerContainer(collections.abc.Mapping):
         raise NotImplementedError("Cycle checking has not yet been implemented")
 
 
+def _copy_into(buffer: WritableBuffer, data: bytes) -> int:
+    """Copies the data read for a buffer into it, null filling anything it
+    falls short of (so no stale bytes are left in a reused buffer).
+
+    Returns:
+        The number of bytes that were read
+    """
+    if len(data) > len(buffer):
+        raise ValueError(
+            f"Read returned {len(data)} bytes for a buffer of {len(buffer)} bytes"
+        )
+    buffer[: len(data)] = data
+    buffer[len(data) :] = bytes(len(buffer) - len(data))
+    return len(data)
+
+
+_worker_scan_chunk: Optional[Callable[[IteratorValue], List[Any]]] = None
+_worker_scan_error: Optional[Exception] = None
+
+
+def _initialize_scan_worker(shared_value: Any, scan_chunk_state: bytes) -> None:
+    """Sets up a multiprocessing scan worker, unpickling the scan's chunk
+    function (and so its layers) once for the worker."""
+    global _worker_scan_chunk, _worker_scan_error
+    SharedProgress.attach(shared_value)
+    try:
+        _worker_scan_chunk = pickle.loads(scan_chunk_state)
+    except Exception as excp:
+        # A pool restarts workers whose initializer fails endlessly, so fail each chunk instead
+        _worker_scan_chunk = None
+        _worker_scan_error = excp
+
+
+def _scan_worker_chunk(iterator_value: IteratorValue) -> List[Any]:
+    """Scans a chunk in a multiprocessing scan worker."""
+    if _worker_scan_chunk is None:
+        raise _worker_scan_error or RuntimeError("Scan worker was not initialized")
+    return _worker_scan_chunk(iterator_value)
+
+
+class SharedProgress(object):
+    """A progress value held in shared memory, for scans run by a
+    multiprocessing pool.
+
+    The shared value can't be pickled along with each chunk, so each worker
+    is handed it once, when it starts, through :meth:`attach`.  Instances
+    hold no state of their own and refer to the value of the process that
+    they're in.
+    """
+
+    _shared_value: Optional[Any] = None
+
+    @staticmethod
+    def attach(shared_value: Any) -> None:
+        """Sets the shared value of the current process (used as a pool
+        initializer)."""
+        SharedProgress._shared_value = shared_value
+
+    @property
+    def value(self) -> int:
+        return self._shared_value.value
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._shared_value.value = value
+
+
 class DummyProgress(object):
     """A class to emulate Multiprocessing/threading Value objects."""
 
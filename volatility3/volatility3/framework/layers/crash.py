@@ -2,9 +2,11 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 import contextlib
+import hashlib
 import logging
+import os
 import struct
-from typing import Tuple, Optional
+from typing import List, Optional, Tuple
 
 from volatility3.framework import constants, exceptions, interfaces
 from volatility3.framework.layers import segmented
@@ -34,6 +36,7 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
     dump_header_name = "_DUMP_HEADER"
 
     _magic_struct = struct.Struct("<II")
+    _segment_cache_struct = struct.Struct("<QQQ")
     headerpages = 1
 
     def __init__(
@@ -129,79 +132,7 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
                 offset += run.PageCount
 
         elif self.dump_type == 0x05:
-            summary_header = self.get_summary_header()
-            seg_first_bit = None  # First bit in a run
-            seg_first_offset = 0  # File offset of first bit
-            offset = (
-                summary_header.HeaderSize
-            )  # Offset to the start of actual memory dump
-            ulong_bitmap_array = summary_header.get_buffer_long()
-            # outer_index points to a 32 bits array inside a list of arrays,
-            # each bit indicating a page mapping state
-            for outer_index in range(0, ulong_bitmap_array.vol.count):
-                ulong_bitmap = ulong_bitmap_array[outer_index]
-                # All pages in this 32 bits array are mapped (speedup iteration process)
-                if ulong_bitmap == 0xFFFFFFFF:
-                    # New segment
-                    if seg_first_bit is None:
-                        seg_first_offset = offset
-                        seg_first_bit = outer_index * 32
-                    offset += 32 * self._page_size
-                # No pages in this 32 bits array are mapped (speedup iteration process)
-                elif ulong_bitmap == 0:
-                    # End of segment
-                    if seg_first_bit is not None:
-                        last_bit = (outer_index - 1) * 32 + 31
-                        segment_length = (
-                            last_bit - seg_first_bit + 1
-                        ) * self._page_size
-                        segments.append(
-                            (
-                                seg_first_bit * self._page_size,
-                                seg_first_offset,
-                                segment_length,
-                                segment_length,
-                            )
-                        )
-                        seg_first_bit = None
-                # Some pages in this 32 bits array are mapped and some aren't
-                else:
-                    for inner_bit_position in range(0, 32):
-                        current_bit = outer_index * 32 + inner_bit_position
-                        page_mapped = ulong_bitmap & (1 << inner_bit_position)
-                        if page_mapped:
-                            # New segment
-                            if seg_first_bit is None:
-                                seg_first_offset = offset
-                                seg_first_bit = current_bit
-                            offset += self._page_size
-                        else:
-                            # End of segment
-                            if seg_first_bit is not None:
-                                segment_length = (
-                                    current_bit - 1 - seg_first_bit + 1
-                                ) * self._page_size
-                                segments.append(
-                                    (
-                                        seg_first_bit * self._page_size,
-                                        seg_first_offset,
-                                        segment_length,
-                                        segment_length,
-                                    )
-                                )
-                                seg_first_bit = None
-                last_bit_seen = outer_index * 32 + 31
-
-            if seg_first_bit is not None:
-                segment_length = (last_bit_seen - seg_first_bit + 1) * self._page_size
-                segments.append(
-                    (
-                        seg_first_bit * self._page_size,
-                        seg_first_offset,
-                        segment_length,
-                        segment_length,
-                    )
-                )
+            segments = self._load_bitmap_segments()
         else:
             vollog.log(
                 constants.LOGLEVEL_VVVV, f"unsupported dump format 0x{self.dump_type:x}"
@@ -227,6 +158,173 @@ class WindowsCrashDump32Layer(segmented.SegmentedLayer):
 
         self._segments = segments
 
+    def _load_bitmap_segments(self) -> List[Tuple[int, int, int, int]]:
+        """Loads the segments of a bitmap dump, from the segment cache if the
+        same dump has been loaded before."""
+        summary_header = self.get_summary_header()
+        cache_filename = self._get_segment_cache_filename(summary_header)
+        segments = self._read_segment_cache(cache_filename)
+        if segments is None:
+            # Each bit of the bitmap indicates whether a page is in the dump
+            bitmap = self._context.layers.read(
+                self._base_layer,
+                summary_header.BufferChar.vol.offset,
+                ((summary_header.BitmapSize + 31) // 32) * 4,
+            )
+            segments = self._find_bitmap_segments(
+                bitmap, summary_header.HeaderSize, self._page_size
+            )
+            self._write_segment_cache(cache_filename, segments)
+        return segments
+
+    @staticmethod
+    def _find_bitmap_segments(
+        bitmap: bytes, offset: int, page_size: int
+    ) -> List[Tuple[int, int, int, int]]:
+        """Finds the segments of a bitmap dump, one for each run of set bits.
+
+        The bitmap is taken a block at a time, skipping blocks (and then
+        words) with every bit set or clear, and finding the runs within any
+        other words using integer operations rather than testing each bit.
+
+        Args:
+            bitmap: The page bitmap, as little endian 32-bit words
+            offset: The offset of the first page's data in the dump
+            page_size: The size of each page
+
+        Returns:
+            A list of (position, mapped_offset, length, mapped_length) segments
+        """
+        segments = []
+        block_size = 0x1000
+        word_size = 8
+        full_block = b"\xff" * block_size
+        empty_block = bytes(block_size)
+
+        run_start = None  # First bit of the current run
+        run_offset = 0  # File offset of the first page of the current run
+        pages = 0  # Number of pages in the dump before the current position
+
+        def find_runs(block: bytes, first_bit: int) -> bool:
+            """Adds the runs of a block with all bits set or clear, or
+            returns False if it has both."""
+            nonlocal run_start, run_offset, pages
+            if block == full_block[: len(block)]:
+                if run_start is None:
+                    run_start, run_offset = first_bit, offset + pages * page_size
+                pages += len(block) * 8
+            elif block == empty_block[: len(block)]:
+                if run_start is not None:
+                    end_run(first_bit)
+            else:
+                return False
+            return True
+
+        def end_run(run_end: int) -> None:
+            nonlocal run_start
+            length = (run_end - run_start) * page_size
+            segments.append((run_start * page_size, run_offset, length, length))
+            run_start = None
+
+        for block_start in range(0, len(bitmap), block_size):
+            block = bitmap[block_start : block_start + block_size]
+            if find_runs(block, block_start * 8):
+                continue
+            # Mixed blocks are taken a (machine sized) word at a time
+            for word_start in range(0, len(block), word_size):
+                word = block[word_start : word_start + word_size]
+                first_bit = (block_start + word_start) * 8
+                if find_runs(word, first_bit):
+                    continue
+                bits = int.from_bytes(word, "little")
+                word_bits = len(word) * 8
+                position = 0
+                while position < word_bits:
+                    if run_start is None:
+                        if not bits:
+                            break
+                        # Skip the clear bits up to the lowest set bit
+                        clear = (bits & -bits).bit_length() - 1
+                        bits >>= clear
+                        position += clear
+                        run_start, run_offset = (
+                            first_bit + position,
+                            offset + pages * page_size,
+                        )
+                    else:
+                        # Count the trailing set bits
+                        set_bits = (bits ^ (bits + 1)).bit_length() - 1
+                        bits >>= set_bits
+                        position += set_bits
+                        pages += set_bits
+                        if position < word_bits:
+                            end_run(first_bit + position)
+
+        if run_start is not None:
+            end_run(len(bitmap) * 8)
+        return segments
+
+    def _get_segment_cache_filename(
+        self, summary_header: interfaces.objects.ObjectInterface
+    ) -> str:
+        """Returns the segment cache file for this dump, named after a hash of
+        its headers."""
+        base_layer = self._context.layers[self._base_layer]
+        identifier = hashlib.sha256(b"crash_segments")
+        identifier.update(base_layer.read(0, self.headerpages * self._page_size))
+        identifier.update(
+            struct.pack(
+                "<QQQ",
+                summary_header.HeaderSize,
+                summary_header.BitmapSize,
+                base_layer.maximum_address,
+            )
+        )
+        return os.path.join(
+            constants.CACHE_PATH, "crash_segments_" + identifier.hexdigest() + ".cache"
+        )
+
+    def _read_segment_cache(
+        self, filename: str
+    ) -> Optional[List[Tuple[int, int, int, int]]]:
+        try:
+            with open(filename, "rb") as cache_file:
+                data = cache_file.read()
+        except OSError:
+            return None
+        if not data or len(data) % self._segment_cache_struct.size:
+            vollog.debug(f"Ignoring invalid crash segment cache: {filename}")
+            return None
+        vollog.log(constants.LOGLEVEL_VVVV, f"Loading crash segments from {filename}")
+        return [
+            (position, mapped_offset, length, length)
+            for position, mapped_offset, length in self._segment_cache_struct.iter_unpack(
+                data
+            )
+        ]
+
+    def _write_segment_cache(
+        self, filename: str, segments: List[Tuple[int, int, int, int]]
+    ) -> None:
+        if not segments:
+            return None
+        data = b"".join(
+            [
+                self._segment_cache_struct.pack(position, mapped_offset, length)
+                for position, mapped_offset, length, _ in segments
+            ]
+        )
+        # Written to a temporary file first, so a partially written cache is never read
+        temp_filename = f"{filename}.{os.getpid()}.tmp"
+        try:
+            with open(temp_filename, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(temp_filename, filename)
+        except OSError as excp:
+            vollog.debug(f"Unable to write crash segment cache {filename}: {excp}")
+            with contextlib.suppress(OSError):
+                os.remove(temp_filename)
+
     @classmethod
     def check_header(
         cls, base_layer: interfaces.layers.DataLayerInterface, offset: int = 0
@@ -2,12 +2,14 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import array
+import bisect
 import collections
 import functools
 import logging
 import math
 import struct
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from volatility3 import classproperty
 from volatility3.framework import exceptions, interfaces, constants
@@ -19,6 +21,72 @@ vollog = logging.getLogger(__name__)
 INTEL_TRANSLATION_DEBUGGING = False
 
 
+class PageMap:
+    """A sorted map of the valid pages of a paged layer, held as runs of
+    pages that are contiguous in both the layer and the layer it maps to.
+
+    Lookups are made by binary search over the runs, so validity and
+    mapping queries don't need to walk the page tables. Offsets are those
+    of the page tables, without any sign extension of the address.
+    """
+
+    def __init__(self, layer_name: str, runs: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Args:
+            layer_name: The name of the layer that the runs map to
+            runs: Sorted, non-overlapping (offset, length, mapped_offset) runs
+        """
+        self.layer_name = layer_name
+        self._offsets = array.array("Q")
+        self._lengths = array.array("Q")
+        self._mapped_offsets = array.array("Q")
+        for offset, length, mapped_offset in runs:
+            self._offsets.append(offset)
+            self._lengths.append(length)
+            self._mapped_offsets.append(mapped_offset)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        """Returns the (offset, length, mapped_offset) runs of the map."""
+        return zip(self._offsets, self._lengths, self._mapped_offsets)
+
+    def _find(self, offset: int) -> int:
+        """Returns the index of the run containing offset, or of the first
+        run after it."""
+        index = bisect.bisect_right(self._offsets, offset) - 1
+        if index >= 0 and offset < self._offsets[index] + self._lengths[index]:
+            return index
+        return index + 1
+
+    def is_valid(self, offset: int, length: int = 1) -> bool:
+        """Returns whether every byte of the range is mapped."""
+        index = self._find(offset)
+        end = offset + max(length, 1)
+        while index < len(self._offsets) and self._offsets[index] <= offset:
+            offset = self._offsets[index] + self._lengths[index]
+            if offset >= end:
+                return True
+            index += 1
+        return False
+
+    def mapping(
+        self, offset: int, length: int
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Returns a sorted iterable of (offset, sublength, mapped_offset,
+        mapped_length, layer) mappings of the valid parts of the range."""
+        end = offset + length
+        index = self._find(offset)
+        while index < len(self._offsets) and self._offsets[index] < end:
+            run_offset = self._offsets[index]
+            start = max(offset, run_offset)
+            size = min(end, run_offset + self._lengths[index]) - start
+            mapped_offset = self._mapped_offsets[index] + (start - run_offset)
+            yield start, size, mapped_offset, size, self.layer_name
+            index += 1
+
+
 class Intel(linear.LinearlyMappedLayer):
     """Translation Layer for the Intel IA32 memory mapping."""
 
@@ -29,6 +97,10 @@ class Intel(linear.LinearlyMappedLayer):
     _maxphyaddr = 32
     _maxvirtaddr = _maxphyaddr
     _structure = [("page directory", 10, False), ("page table", 10, True)]
+    # The number of translations of each page size cached before they're flushed
+    _tlb_size = 0x10000
+    # Ranges at least this long are mapped using a map of the whole layer's pages
+    _page_map_threshold = 0x800000
     _direct_metadata = collections.ChainMap(
         {"architecture": "Intel32"},
         {"mapped": True},
@@ -67,6 +139,10 @@ class Intel(linear.LinearlyMappedLayer):
             math.ceil(math.log2(struct.calcsize(self._entry_format)))
         )
 
+        # Translation lookaside buffer, of (mapped page, layer) by page number for each page shift
+        self._tlb: Dict[int, Dict[int, Tuple[int, str]]] = {}
+        self._page_map: Optional[PageMap] = None
+
     @classproperty
     @functools.lru_cache()
     def page_shift(cls) -> int:
@@ -264,17 +340,116 @@ class Intel(linear.LinearlyMappedLayer):
             return None
         return table
 
+    def _translate_cached(self, offset: int) -> Tuple[int, int, str]:
+        """Translates a specific offset, as _translate does, using the
+        translation lookaside buffer of previously translated pages."""
+        for shift, entries in self._tlb.items():
+            cached = entries.get(offset >> shift)
+            if cached is not None:
+                return cached[0] | (offset & ((1 << shift) - 1)), 1 << shift, cached[1]
+        mapped_offset, page_size, layer_name = self._translate(offset)
+        # Swapped pages don't map the offset within the page, so aren't cached
+        if layer_name == self._base_layer:
+            shift = page_size.bit_length() - 1
+            entries = self._tlb.get(shift)
+            if entries is None:
+                # Replaced rather than updated, so concurrent lookups can keep iterating
+                entries = {}
+                self._tlb = {**self._tlb, shift: entries}
+            if len(entries) >= self._tlb_size:
+                entries.clear()
+            entries[offset >> shift] = (mapped_offset & ~(page_size - 1), layer_name)
+        return mapped_offset, page_size, layer_name
+
+    def flush_tlb(self) -> None:
+        """Drops all cached page translations and the page map (for if the
+        page tables change)."""
+        self._tlb = {}
+        self._page_map = None
+
+    def get_page_map(self) -> Optional[PageMap]:
+        """Returns a map of every valid page in the layer, built on first
+        use by a single pass over the page tables.
+
+        Layers with swap layers have no page map, since swapped pages are
+        only found by translating them.
+        """
+        if self._page_map is None and not self.config.get("swap_layers", False):
+            self._page_map = PageMap(self._base_layer, self._build_page_map())
+        return self._page_map
+
+    def _build_page_map(self) -> List[Tuple[int, int, int]]:
+        """Walks the page tables, skipping invalid and empty tables, and
+        returns the sorted (offset, length, mapped_offset) runs of valid
+        pages that are also valid in the base layer."""
+        runs: List[List[int]] = []
+        table_format = "<" + str(self._entry_number) + self._entry_format[1:]
+
+        def add_page(offset: int, entry: int, position: int) -> None:
+            mapped_offset = self._mask(entry, self._maxphyaddr - 1, position + 1)
+            size = 1 << (position + 1)
+            if runs:
+                last = runs[-1]
+                if last[0] + last[1] == offset and last[2] + last[1] == mapped_offset:
+                    last[1] += size
+                    return None
+            runs.append([offset, size, mapped_offset])
+
+        # This follows the same steps as _translate_entry, for every index of each table
+        def walk(entry: int, level: int, position: int, offset: int) -> None:
+            if level == len(self._structure):
+                if self._page_is_valid(entry):
+                    add_page(offset, entry, position)
+                return None
+            name, size, large_page = self._structure[level]
+            if not self._page_is_valid(entry):
+                return None
+            if large_page and (entry & (1 << 7)):
+                # Mask off the PAT bit
+                if entry & (1 << 12):
+                    entry -= 1 << 12
+                add_page(offset, entry, position)
+                return None
+            position -= size
+            table = self._get_valid_table(
+                self._mask(entry, self._maxphyaddr - 1, size + self._index_shift)
+            )
+            if table is None:
+                return None
+            entries = struct.unpack(table_format, table)[: 1 << size]
+            for index, next_entry in enumerate(entries):
+                if next_entry:
+                    walk(
+                        next_entry,
+                        level + 1,
+                        position,
+                        offset | (index << (position + 1)),
+                    )
+
+        walk(self._initial_entry, 0, self._initial_position, 0)
+
+        # Pages must also exist in the base layer
+        valid_runs = []
+        for offset, length, mapped_offset in runs:
+            for sub_offset, sub_length, sub_mapped_offset, _, _ in self._valid_runs(
+                offset, length, mapped_offset, self._base_layer, True
+            ):
+                valid_runs.append((sub_offset, sub_length, sub_mapped_offset))
+        return valid_runs
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Do not copy cached page translations, they're rebuilt on demand."""
+        state = self.__dict__.copy()
+        state["_tlb"] = {}
+        return state
+
     def is_valid(self, offset: int, length: int = 1) -> bool:
         """Returns whether the address offset can be translated to a valid
         address."""
         try:
-            # TODO: Consider reimplementing this, since calls to mapping can call is_valid
-            return all(
-                [
-                    self._context.layers[layer].is_valid(mapped_offset)
-                    for _, _, mapped_offset, _, layer in self.mapping(offset, length)
-                ]
-            )
+            # Translating a range checks that each run is valid in its layer
+            self.translate_range(offset, length)
+            return True
         except exceptions.InvalidAddressException:
             return False
 
@@ -282,6 +457,17 @@ class Intel(linear.LinearlyMappedLayer):
         """Returns whether the page at offset is marked dirty"""
         return self._page_is_dirty(self._translate_entry(offset)[0])
 
+    def translate_range(
+        self, offset: int, length: int, ignore_errors: bool = False
+    ) -> List[Tuple[int, int, int, int, str]]:
+        """Translates a whole range of the layer in one call.
+
+        Returns a sorted list of (offset, sublength, mapped_offset, mapped_length, layer)
+        runs, with pages that are contiguous in the lower layer coalesced
+        into a single run.
+        """
+        return list(self._mapping(offset, length, ignore_errors))
+
     def mapping(
         self, offset: int, length: int, ignore_errors: bool = False
     ) -> Iterable[Tuple[int, int, int, int, str]]:
@@ -291,53 +477,20 @@ class Intel(linear.LinearlyMappedLayer):
         This allows translation layers to provide maps of contiguous
         regions in one layer
         """
-        stashed_offset = stashed_mapped_offset = stashed_size = stashed_mapped_size = (
-            stashed_map_layer
-        ) = None
-        for offset, size, mapped_offset, mapped_size, map_layer in self._mapping(
-            offset, length, ignore_errors
-        ):
-            if (
-                stashed_offset is None
-                or (stashed_offset + stashed_size != offset)
-                or (stashed_mapped_offset + stashed_mapped_size != mapped_offset)
-                or (stashed_map_layer != map_layer)
-            ):
-                # The block isn't contiguous
-                if stashed_offset is not None:
-                    yield stashed_offset, stashed_size, stashed_mapped_offset, stashed_mapped_size, stashed_map_layer
-                # Update all the stashed values after output
-                stashed_offset = offset
-                stashed_mapped_offset = mapped_offset
-                stashed_size = size
-                stashed_mapped_size = mapped_size
-                stashed_map_layer = map_layer
-            else:
-                # Part of an existing block
-                stashed_size += size
-                stashed_mapped_size += mapped_size
-        # Yield whatever's left
-        if (
-            stashed_offset is not None
-            and stashed_mapped_offset is not None
-            and stashed_size is not None
-            and stashed_mapped_size is not None
-            and stashed_map_layer is not None
-        ):
-            yield stashed_offset, stashed_size, stashed_mapped_offset, stashed_mapped_size, stashed_map_layer
+        yield from self._mapping(offset, length, ignore_errors)
 
     def _mapping(
         self, offset: int, length: int, ignore_errors: bool = False
     ) -> Iterable[Tuple[int, int, int, int, str]]:
         """Returns a sorted iterable of (offset, sublength, mapped_offset, mapped_length, layer)
-        mappings.
+        mappings, coalescing pages that are contiguous in the lower layer.
 
-        This allows translation layers to provide maps of contiguous
-        regions in one layer
+        Each run is checked against its layer as a whole, and only split
+        into pages if the layer can't provide all of it.
         """
         if length == 0:
             try:
-                mapped_offset, _, layer_name = self._translate(offset)
+                mapped_offset, _, layer_name = self._translate_cached(offset)
                 if not self._context.layers[layer_name].is_valid(mapped_offset):
                     raise exceptions.InvalidAddressException(
                         layer_name=layer_name, invalid_address=mapped_offset
@@ -348,21 +501,44 @@ class Intel(linear.LinearlyMappedLayer):
                 return None
             yield offset, length, mapped_offset, length, layer_name
             return None
+        # Long ranges that may contain unmapped gaps are mapped from the page map, as are all ranges once it's built
+        page_map = self._page_map
+        if page_map is None and ignore_errors and length >= self._page_map_threshold:
+            page_map = self.get_page_map()
+        # The page map is of unextended addresses, so (canonical) addresses are masked to look them up
+        masked_offset = offset & self.address_mask
+        if (
+            page_map is not None
+            and masked_offset + length <= self.address_mask + 1
+            and (ignore_errors or page_map.is_valid(masked_offset, length))
+        ):
+            extension = offset - masked_offset
+            for (
+                sub_offset,
+                sub_length,
+                mapped_offset,
+                mapped_length,
+                layer_name,
+            ) in page_map.mapping(masked_offset, length):
+                yield sub_offset + extension, sub_length, mapped_offset, mapped_length, layer_name
+            return None
+        run_offset = run_mapped_offset = run_layer = None
+        run_size = 0
         while length > 0:
             try:
-                chunk_offset, page_size, layer_name = self._translate(offset)
+                chunk_offset, page_size, layer_name = self._translate_cached(offset)
                 chunk_size = min(page_size - (chunk_offset % page_size), length)
-                if not self._context.layers[layer_name].is_valid(
-                    chunk_offset, chunk_size
-                ):
-                    raise exceptions.InvalidAddressException(
-                        layer_name=layer_name, invalid_address=chunk_offset
-                    )
             except (
                 exceptions.PagedInvalidAddressException,
                 exceptions.InvalidAddressException,
             ) as excp:
                 if not ignore_errors:
+                    # Any invalid page earlier in the run is reported first
+                    if run_layer is not None:
+                        for _ in self._valid_runs(
+                            run_offset, run_size, run_mapped_offset, run_layer, False
+                        ):
+                            pass
                     raise
                 # We can jump more if we know where the page fault failed
                 if isinstance(excp, exceptions.PagedInvalidAddressException):
@@ -372,10 +548,72 @@ class Intel(linear.LinearlyMappedLayer):
                 length_diff = mask + 1 - (offset & mask)
                 length -= length_diff
                 offset += length_diff
+                continue
+            if (
+                run_layer == layer_name
+                and run_offset + run_size == offset
+                and run_mapped_offset + run_size == chunk_offset
+            ):
+                # Part of the existing run
+                run_size += chunk_size
             else:
-                yield offset, chunk_size, chunk_offset, chunk_size, layer_name
-                length -= chunk_size
-                offset += chunk_size
+                if run_layer is not None:
+                    yield from self._valid_runs(
+                        run_offset,
+                        run_size,
+                        run_mapped_offset,
+                        run_layer,
+                        ignore_errors,
+                    )
+                run_offset, run_size, run_mapped_offset, run_layer = (
+                    offset,
+                    chunk_size,
+                    chunk_offset,
+                    layer_name,
+                )
+            length -= chunk_size
+            offset += chunk_size
+        # Yield whatever's left
+        if run_layer is not None:
+            yield from self._valid_runs(
+                run_offset, run_size, run_mapped_offset, run_layer, ignore_errors
+            )
+
+    def _valid_runs(
+        self,
+        offset: int,
+        length: int,
+        mapped_offset: int,
+        layer_name: str,
+        ignore_errors: bool,
+    ) -> Iterable[Tuple[int, int, int, int, str]]:
+        """Returns the parts of a translated run that are valid in the layer
+        it maps to, either the run itself or its valid pages."""
+        layer = self._context.layers[layer_name]
+        if layer.is_valid(mapped_offset, length):
+            yield offset, length, mapped_offset, length, layer_name
+            return None
+        run_start = mapped_start = None
+        end = offset + length
+        while offset < end:
+            chunk_size = min(
+                self.page_size - (mapped_offset & (self.page_size - 1)), end - offset
+            )
+            if layer.is_valid(mapped_offset, chunk_size):
+                if run_start is None:
+                    run_start, mapped_start = offset, mapped_offset
+            else:
+                if not ignore_errors:
+                    raise exceptions.InvalidAddressException(
+                        layer_name=layer_name, invalid_address=mapped_offset
+                    )
+                if run_start is not None:
+                    yield run_start, offset - run_start, mapped_start, offset - run_start, layer_name
+                    run_start = None
+            offset += chunk_size
+            mapped_offset += chunk_size
+        if run_start is not None:
+            yield run_start, end - run_start, mapped_start, end - run_start, layer_name
 
     @property
     def dependencies(self) -> List[str]:
@@ -1,9 +1,7 @@
 # This file is Copyright 2022 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
-
-import functools
-from typing import List, Optional, Tuple, Iterable
+from typing import Optional, Tuple, Iterable
 
 from volatility3.framework import exceptions, interfaces
 
@@ -34,14 +32,19 @@ class LinearlyMappedLayer(interfaces.layers.TranslationLayerInterface):
         return mapped_offset, layer
 
     # ## Read/Write functions for mapped pages
-    # Redefine read here for speed reasons (so we don't call a processing method
+    # Redefine readinto here for speed reasons (so we don't call a processing method
 
-    @functools.lru_cache(maxsize=512)
-    def read(self, offset: int, length: int, pad: bool = False) -> bytes:
-        """Reads an offset for length bytes and returns 'bytes' (not 'str') of
-        length size."""
-        current_offset = offset
-        output: List[bytes] = []
+    def readinto(
+        self,
+        offset: int,
+        buffer: interfaces.layers.WritableBuffer,
+        pad: bool = False,
+    ) -> int:
+        """Reads len(buffer) bytes from offset into a writable buffer, reading
+        each mapped segment straight into its place in the buffer."""
+        start_offset = current_offset = offset
+        length = len(buffer)
+        view = memoryview(buffer)
         for offset, _, mapped_offset, mapped_length, layer in self.mapping(
             offset, length, ignore_errors=pad
         ):
@@ -52,19 +55,24 @@ class LinearlyMappedLayer(interfaces.layers.TranslationLayerInterface):
                     f"Layer {self.name} cannot map offset: {current_offset}",
                 )
             elif offset > current_offset:
-                output += [b"\x00" * (offset - current_offset)]
+                view[current_offset - start_offset : offset - start_offset] = bytes(
+                    offset - current_offset
+                )
                 current_offset = offset
             elif offset < current_offset:
                 raise exceptions.LayerException(
                     self.name, "Mapping returned an overlapping element"
                 )
             if mapped_length > 0:
-                output += [
-                    self._context.layers.read(layer, mapped_offset, mapped_length, pad)
-                ]
+                # Slicing keeps the read within the buffer, if the mapping runs past it
+                position = current_offset - start_offset
+                self._context.layers.readinto(
+                    layer, mapped_offset, view[position : position + mapped_length], pad
+                )
             current_offset += mapped_length
-        recovered_data = b"".join(output)
-        return recovered_data + b"\x00" * (length - len(recovered_data))
+        position = min(current_offset - start_offset, length)
+        view[position:] = bytes(length - position)
+        return length
 
     def write(self, offset: int, value: bytes) -> None:
         """Writes a value at offset, distributing the writing across any
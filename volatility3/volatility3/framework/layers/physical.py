@@ -1,7 +1,10 @@
 # This file is Copyright 2019 Volatility Foundation and licensed under the Volatility Software License 1.0
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
+import io
 import logging
+import mmap
+import os
 import threading
 from typing import Any, Dict, IO, List, Optional, Union
 
@@ -84,7 +87,14 @@ class DummyLock:
 
 
 class FileLayer(interfaces.layers.DataLayerInterface):
-    """a DataLayer backed by a file on the filesystem."""
+    """a DataLayer backed by a file on the filesystem.
+
+    Local files are mapped into memory and read as slices of the mapping,
+    without a lock or a seek and read per request. Local files which can't be
+    mapped are read at an offset with os.pread where it is available, which
+    doesn't need the lock either. Other resources (such as compressed files)
+    are read through the file object.
+    """
 
     def __init__(
         self,
@@ -101,6 +111,10 @@ class FileLayer(interfaces.layers.DataLayerInterface):
         self._location = self.config["location"]
         self._accessor = resources.ResourceAccessor()
         self._file_: Optional[IO[Any]] = None
+        self._fileno_: Optional[int] = None
+        self._is_local_file: Optional[bool] = None
+        self._mapping_: Optional[mmap.mmap] = None
+        self._mappable: Optional[bool] = None
         self._size: Optional[int] = None
         self._maximum_address: Optional[int] = None
         # Construct the lock now (shared if made before threading) in case we ever need it
@@ -124,12 +138,57 @@ class FileLayer(interfaces.layers.DataLayerInterface):
         self._file_ = self._file_ or self._accessor.open(self._location, mode)
         return self._file_
 
+    @property
+    def _fileno(self) -> Optional[int]:
+        """Property for the file descriptor of the opened file (reopened after
+        unpickling), or None if the opened resource is not a plain local file
+        whose data can be read from the descriptor directly."""
+        if self._fileno_ is None and self._is_local_file is not False:
+            self._fileno_ = self._get_local_fileno(self._file)
+            self._is_local_file = self._fileno_ is not None
+        return self._fileno_
+
+    @staticmethod
+    def _get_local_fileno(file: IO[Any]) -> Optional[int]:
+        # Local file URLs are opened wrapped in a response object
+        file = getattr(file, "fp", file)
+        # Decompressing and remote files don't read their data from the file
+        # underlying them (whose fileno they may still report) directly
+        if not isinstance(file, io.BufferedReader) or not isinstance(
+            file.raw, io.FileIO
+        ):
+            return None
+        return file.fileno()
+
+    @property
+    def _mapping(self) -> Optional[mmap.mmap]:
+        """Property to map the file into memory on first use (and after
+        unpickling), or None if the opened resource can't be mapped."""
+        if self._mapping_ is None and self._mappable is not False:
+            fileno = self._fileno
+            if fileno is not None:
+                try:
+                    self._mapping_ = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError, OverflowError) as excp:
+                    # Empty files, some special files and (on 32-bit) large files can't be mapped
+                    vollog.debug(f"Unable to map {self._location} into memory: {excp}")
+            self._mappable = self._mapping_ is not None
+        return self._mapping_
+
     @property
     def maximum_address(self) -> int:
         """Returns the largest available address in the space."""
         # Zero based, so we return the size of the file minus 1
         if self._maximum_address:
             return self._maximum_address
+        if self._mapping is not None:
+            self._size = len(self._mapping)
+            self._maximum_address = self._size - 1
+            return self._maximum_address
+        if self._fileno is not None:
+            self._size = os.fstat(self._fileno).st_size
+            self._maximum_address = self._size - 1
+            return self._maximum_address
         with self._lock:
             orig = self._file.tell()
             self._file.seek(0, 2)
@@ -162,10 +221,18 @@ class FileLayer(interfaces.layers.DataLayerInterface):
                 self.name, invalid_address, "Offset outside of the buffer boundaries"
             )
 
-        # TODO: implement locking for multi-threading
-        with self._lock:
-            self._file.seek(offset)
-            data = self._file.read(length)
+        mapping = self._mapping
+        if mapping is not None:
+            # Slicing the mapping doesn't move a shared file position, so needs no lock
+            data = mapping[offset : offset + length]
+        elif self._fileno is not None and hasattr(os, "pread"):
+            # Positional reads don't move a shared file position either
+            data = os.pread(self._fileno, length, offset)
+        else:
+            # TODO: implement locking for multi-threading
+            with self._lock:
+                self._file.seek(offset)
+                data = self._file.read(length)
 
         if len(data) < length:
             if pad:
@@ -207,11 +274,17 @@ class FileLayer(interfaces.layers.DataLayerInterface):
 
         This is necessary for multi-processing
         """
-        self._file_ = None
-        return self.__dict__
+        state = self.__dict__.copy()
+        state["_file_"] = None
+        state["_fileno_"] = None
+        state["_mapping_"] = None
+        return state
 
     def destroy(self) -> None:
-        """Closes the file handle."""
+        """Closes the file mapping and handle."""
+        if self._mapping_ is not None:
+            self._mapping_.close()
+            self._mapping_ = None
         self._file.close()
 
     def __exit__(self, type, value, traceback) -> None:
@@ -2,24 +2,30 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 
+import collections
+import datetime
+import heapq
 import logging
 import io
+import multiprocessing
 import struct
 
-from typing import Iterator, List, Tuple, Iterable
+from typing import Iterator, List, Tuple, Iterable, NamedTuple
 
 import pefile
 
 from volatility3.framework import (
+    contexts,
     exceptions,
     renderers,
     interfaces,
     constants,
     symbols,
 )
+from volatility3.framework.automagic import construct_layers
 from volatility3.framework.configuration import requirements
 from volatility3.framework.objects import utility
-from volatility3.framework.renderers import format_hints
+from volatility3.framework.renderers import conversion, format_hints
 from volatility3.framework.symbols.windows import versions
 from volatility3.framework.symbols import intermed
 from volatility3.framework.symbols.windows.extensions import pe
@@ -38,9 +44,18 @@ FORMAT_LIST = [
     ("Probable payload", format_hints.Hex),
     ("Prolog", interfaces.renderers.Disassembly),
 ]
+# The number of processes whose emulation session (engine and faulted-in pages) is kept
+MAX_EMULATION_SESSIONS = 16
+# The number of instructions emulated from each start (the routine itself, or the target of an NtContinue). Unicorn
+# doesn't report how many instructions a run executed, so the budget is per start rather than per timer: a timer is
+# emulated for at most MAX_EMULATED_INSTRUCTIONS * MAX_EMULATION_RESUMES instructions.
+MAX_EMULATED_INSTRUCTIONS = 10000
+# NtContinue may resume into code which calls it again, so bound the number of starts (including the routine itself)
+MAX_EMULATION_RESUMES = 16
+NT_CONTINUE_SYSCALL = 0x43
 
 class timerResult():
-    def __init__(self, context, process, thread, timerRoutine, is_64bit):
+    def __init__(self, context, process, thread, timerRoutine, is_64bit, proc_layer_name):
         self.thread = thread
         self.process = process
         self.routine = timerRoutine
@@ -51,7 +66,6 @@ class timerResult():
         self.probablePayload = 0
         self.prolog = "Unknown"
 
-        proc_layer_name = process.add_process_layer()
         proc_layer = context.layers[proc_layer_name]
         instrStream = proc_layer.read(timerRoutine, 5)
 
@@ -68,101 +82,287 @@ class timerResult():
             self.prolog = interfaces.renderers.Disassembly(instrStream, timerRoutine, architecture)
 
 
-class Gargoyle(interfaces.plugins.PluginInterface):
-    """Detect gargoyle evasion technique payload in memory"""
+class TimerAPC(NamedTuple):
+    """A timer whose APC runs a user-mode routine in a valid thread and process, with the APC fields we emulate from"""
+    timer_offset: int
+    apc_offset: int
+    routine: int
+    thread_offset: int
+    process_offset: int
+    normal_context: int
+    # The address of the APC's NormalContext field
+    normal_context_offset: int
 
-    _required_framework_version = (2, 0, 0)
-    _version = (1, 0, 0)
 
-    @classmethod
-    def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
-        return [
-            requirements.ModuleRequirement(
-                name="kernel",
-                description="Windows kernel",
-                architectures=["Intel32", "Intel64"],
-            ),
-            requirements.ListRequirement(
-                name="pid",
-                element_type=int,
-                description="Process IDs to include (all other processes are excluded)",
-                optional=True,
-            ),
-            requirements.BooleanRequirement(
-                name="dump",
-                description="Extract payloads",
-                default=False,
-                optional=True,
-            ),
-            requirements.BooleanRequirement(
-                name="verbose",
-                description="Show verbose information",
-                default=False,
-                optional=True,
-            ),
-            requirements.VersionRequirement(
-                name="timers", component=timers.Timers, version=(1, 0, 0)
-            ),
-        ]
+class TimerAPCDecoder():
+    """
+    Decodes the APCs of timers from the raw bytes of the kernel layer.
 
-    def dbgMsg(self, *args):
-        if self.config["verbose"]:
-            print(" ".join(map(str, args)))
+    The APC type and the offsets of the fields we need, in the timer, the APC, the thread and the process, are worked
+    out once per kernel. The timers' APCs are then read by those fixed offsets, and timers without a user-mode routine
+    or with an invalid thread or owning process are dropped before any object is constructed for them.
+    """
+
+    def __init__(self, context, kernel, is_64bit, dbgMsg):
+        symbol_table = kernel.symbol_table_name
+        self.layer = context.layers[kernel.layer_name]
+        self.dbgMsg = dbgMsg
+
+        is_windows_vista = versions.is_vista_or_later(context, symbol_table) and \
+                           (not versions.is_windows_8_or_later(context, symbol_table)) and \
+                           (not versions.is_windows_7(context, symbol_table))
+        if is_64bit and (versions.is_xp_or_2003(context, symbol_table) or is_windows_vista):
+            self.apcTypeName = "_KAPC_WOW64"
+        else:
+            self.apcTypeName = "_KAPC"
+        apc_type = kernel.get_type(self.apcTypeName)
+        self.pointerSize = kernel.get_type("pointer").size
+        self.pointerFormat = "<Q" if self.pointerSize == 8 else "<I"
+
+        self.apcOffset = kernel.get_type("_ETIMER").relative_child_offset("TimerApc")
+        self.routineOffset = apc_type.relative_child_offset("NormalRoutine")
+        self.threadOffset = apc_type.relative_child_offset("Thread")
+        self.contextOffset = apc_type.relative_child_offset("NormalContext")
+
+        ethread_type = kernel.get_type("_ETHREAD")
+        client_id_type = kernel.get_type("_CLIENT_ID")
+        cid_offset = ethread_type.relative_child_offset("Cid")
+        self.tidOffset = cid_offset + client_id_type.relative_child_offset("UniqueThread")
+        self.threadPidOffset = cid_offset + client_id_type.relative_child_offset("UniqueProcess")
+        self.threadCreateTimeOffset = ethread_type.relative_child_offset("CreateTime")
+        # For Windows XP
+        self.isXP = ethread_type.has_member("ThreadsProcess")
+        if self.isXP:
+            self.processPointerOffset = ethread_type.relative_child_offset("ThreadsProcess")
+        else:
+            self.processPointerOffset = ethread_type.relative_child_offset("Tcb") + \
+                                        kernel.get_type("_KTHREAD").relative_child_offset("Process")
+
+        eprocess_type = kernel.get_type("_EPROCESS")
+        self.pidOffset = eprocess_type.relative_child_offset("UniqueProcessId")
+        self.imageFileNameOffset = eprocess_type.relative_child_offset("ImageFileName")
+        self.processCreateTimeOffset = eprocess_type.relative_child_offset("CreateTime")
+
+    def readFields(self, offset, fieldOffsets, formats):
+        """Reads the fields at fieldOffsets (from offset) in a single read of the span which holds them all."""
+        start = min(fieldOffsets)
+        end = max(fieldOffset + struct.calcsize(fmt) for fieldOffset, fmt in zip(fieldOffsets, formats))
+        data = self.layer.read(offset + start, end - start)
+        return [struct.unpack_from(fmt, data, fieldOffset - start)[0] for fieldOffset, fmt in zip(fieldOffsets, formats)]
+
+    def readPointers(self, offset, fieldOffsets):
+        """Reads the pointers at fieldOffsets (from offset), masked to the layer's addresses as Pointer objects are."""
+        return [pointer & self.layer.address_mask
+                for pointer in self.readFields(offset, fieldOffsets, [self.pointerFormat] * len(fieldOffsets))]
+
+    def isThreadValid(self, thread_offset):
+        # The same checks as ETHREAD.is_valid()
+        tid, pid, createTime = self.readFields(thread_offset,
+                                               [self.tidOffset, self.threadPidOffset, self.threadCreateTimeOffset],
+                                               [self.pointerFormat, self.pointerFormat, "<q"])
+        pid &= self.layer.address_mask
+        # NT tids and pids are divisible by 4
+        if tid % 4 != 0 or pid % 4 != 0:
+            return False
+        # The System process (PID 4) has no create time
+        if pid != 4:
+            ctime = conversion.wintime_to_datetime(createTime >> 3 if self.isXP else createTime)
+            if not isinstance(ctime, datetime.datetime) or not (1998 < ctime.year < 2030):
+                return False
+        return True
+
+    def isProcessPlausible(self, process_offset):
+        # The cheap checks of EPROCESS.is_valid(), which is still called on the processes which pass them
+        pid, firstNameByte, createTime = self.readFields(process_offset,
+                                                         [self.pidOffset, self.imageFileNameOffset,
+                                                          self.processCreateTimeOffset],
+                                                         [self.pointerFormat, "<B", "<q"])
+        pid &= self.layer.address_mask
+        return process_offset != 0 and firstNameByte != 0 and pid % 4 == 0 and (createTime != 0 or pid == 4)
+
+    def decode(self, timer_offset):
+        """Returns the TimerAPC of a timer, or None if its APC has no user-mode routine in a valid thread and process."""
+        self.dbgMsg("Timer at {0}".format(hex(int(timer_offset))))
+        apc_offset = timer_offset + self.apcOffset
+        try:
+            routine, thread_offset, normal_context = self.readPointers(
+                apc_offset, [self.routineOffset, self.threadOffset, self.contextOffset])
+            if routine == 0 or not self.isThreadValid(thread_offset):
+                # This APC has no user-mode payload.
+                return None
+        except exceptions.InvalidAddressException:
+            return None
+
+        try:
+            process_offset = self.readPointers(thread_offset, [self.processPointerOffset])[0]
+            isProcessValid = self.isProcessPlausible(process_offset)
+        except exceptions.InvalidAddressException:
+            isProcessValid = False
+        if not isProcessValid:
+            # This usually happens when a timer is not pointing to a valid thread. I'm not sure why this happens -
+            # I guess there's some flag in the timer which states that it isn't valid, or the timer/timer list is
+            # # being manipulated when we dump.
+            self.dbgMsg('Timer %s : warning: Thread %s has no owning process, skipping' % (
+            hex(int(timer_offset)), hex(thread_offset)))
+            return None
+
+        # If this is a WoW64 APC - ie, an APC queued by a 32-bit thread on a 64-bit windows install - then we must
+        # 'decode' the NormalRoutine by shifting and negating it.
+        # We detect these WoW64-style APCs by comparing the top half of the 64bit address, except bit zero, to  0xffffffff. I'm not
+        # sure if this is reliable, but it seems to work.
+        if (((routine >> 32) | 0x01) == 0xffffffff):
+            routine32bit = (-(routine >> 2)) & 0xffffffff
+            self.dbgMsg("WoW64-style APC routine decoded %s to %s" % (hex(routine), hex(routine32bit)))
+            routine = routine32bit
+
+        return TimerAPC(timer_offset, apc_offset, routine, thread_offset, process_offset, normal_context,
+                        apc_offset + self.contextOffset)
+
+    def decodeAll(self, timer_offsets) -> Iterator[Tuple[int, TimerAPC]]:
+        """Yields the index and TimerAPC of each of the timers which has one."""
+        for index, timer_offset in enumerate(timer_offsets):
+            timerAPC = self.decode(timer_offset)
+            if timerAPC != None:
+                yield index, timerAPC
+
+
+class EmulationSession():
+    """
+    A Unicorn engine for emulating the APC routines of one process.
+
+    Guest pages are read from the process layer once per session and stay mapped in the engine, and the registers,
+    the stack and the pages written by a routine are restored to a clean snapshot before the next one, so the routines
+    of a process don't each pay for a cold engine and the same page faults. Guest pages are mapped without write access,
+    and the first write to one makes it writable and marks it dirty, so only the pages a routine writes are restored,
+    without a hook on every write.
+    """
+    PAGE_SIZE = 0x1000
+    # We use an arbitrary ESP, with a magic value to signify that the APC handler has returned.
+    STACK_BASE = 0x00000000f0000000
+    STACK_SIZE = 2 * 1024 * 1024
+    STACK_POINTER = STACK_BASE + 0x100
+    RETURN_MAGIC = b"\xbe\xba\xde\xc0"
+    RETURN_ADDRESS = 0xc0debabe
+
+    def __init__(self, context, process, is_64bit, dbgMsg):
+        self.proc_layer_name = process.add_process_layer()
+        self.pas = context.layers[self.proc_layer_name]
+        self.is_64bit = is_64bit
+        self.dbgMsg = dbgMsg
+        # Original content of the guest pages mapped from the process layer
+        self.pages = {}
+        # The bases of the guest pages written since the last reset
+        self.dirtyPages = set()
+
+        # The state of the timer being emulated, for the hooks
+        self.result = None
+        self.contextPointer = None
+        self.resumeAddress = None
+        self.timerHooks = []
+
+        if is_64bit:
+            self.uc = Uc(UC_ARCH_X86, UC_MODE_64)
+            self.instructionPointer = UC_X86_REG_RIP
+            self.stackPointer = UC_X86_REG_RSP
+        else:
+            self.uc = Uc(UC_ARCH_X86, UC_MODE_32)
+            self.instructionPointer = UC_X86_REG_EIP
+            self.stackPointer = UC_X86_REG_ESP
+        self.uc.mem_map(self.STACK_BASE, self.STACK_SIZE)
+        self.uc.mem_write(self.STACK_POINTER, self.RETURN_MAGIC)
+        self.cleanStack = bytes(self.uc.mem_read(self.STACK_BASE, self.STACK_SIZE))
+
+        # Set up our handlers, which will map memory on-demand from the debuggee
+        self.uc.hook_add(UC_HOOK_MEM_READ_UNMAPPED, self.badmem)
+        self.uc.hook_add(UC_HOOK_MEM_WRITE_UNMAPPED, self.badmem)
+        self.uc.hook_add(UC_HOOK_MEM_FETCH_UNMAPPED, self.badmem)
+        self.uc.hook_add(UC_HOOK_MEM_WRITE_PROT, self.markDirty)
+
+        self.cleanContext = self.uc.context_save()
 
     # This is called when Unicorn needs to access some memory that isn't mapped yet.
     # We simply map the memory, copy in its contents from the debuggee, and return.
-    # Our main loop will retry. We signal errors by setting self.emulationFaulted.
-    def badmemWrapped(self, uc, access, address, size, value, user_data):
+    def badmem(self, uc, access, address, size, value, user_data):
         self.dbgMsg("Access to unmapped memory %s" % hex(address))
 
-        if self.pas == None:
-            self.dbgMsg("Unable to handle memory mapping with no active process")
-            raise MemoryError
-
         # Unicorn will only successfully map page-aligned addresses, so map the whole page.
-        pageSize = 0x1000
-        pageBase = address & (~(pageSize - 1))
-        uc.mem_map(pageBase, pageSize)
+        pageBase = address & (~(self.PAGE_SIZE - 1))
 
-        # Read from the debuggee..
-        pageCts = self.pas.read(pageBase, pageSize)
+        # Read from the debuggee. The page is only mapped once it could be read, so a later access faults again.
+        pageCts = self.pas.read(pageBase, self.PAGE_SIZE)
         if pageCts == None:
-            self.dbgMsg("Unable to read %s bytes at %s" % (hex(pageSize), hex(pageBase)))
+            self.dbgMsg("Unable to read %s bytes at %s" % (hex(self.PAGE_SIZE), hex(pageBase)))
             raise MemoryError
 
-        # And write to Unicorn.
+        # And write to Unicorn. The page isn't writable until markDirty sees a write to it.
+        uc.mem_map(pageBase, self.PAGE_SIZE, UC_PROT_READ | UC_PROT_EXEC)
         uc.mem_write(pageBase, pageCts)
-        self.dbgMsg("Mapped %s bytes at base %s" % (hex(pageSize), hex(pageBase)))
+        self.pages[pageBase] = pageCts
+        self.dbgMsg("Mapped %s bytes at base %s" % (hex(self.PAGE_SIZE), hex(pageBase)))
 
         return True
 
-    def badmem(self, uc, access, address, size, value, user_data):
-        try:
-            return self.badmemWrapped(uc, access, address, size, value, user_data)
-        except Exception as e:
-            self.emulationFaulted = e
-            raise
-
-    def isKernelSpace(self, DllBase):
-        kernel = self.context.modules[self.config["kernel"]]
-        symbol_table = kernel.symbol_table_name
-
-        is_64bit = symbols.symbol_table_is_64bit(self.context, symbol_table)
+    # This is called on the first write to a guest page since the last reset. The page is made writable, so later
+    # writes to it don't call back into Python. Unicorn skips the faulting write once we return, so it's made here.
+    def markDirty(self, uc, access, address, size, value, user_data):
+        pageBases = {address & ~(self.PAGE_SIZE - 1), (address + size - 1) & ~(self.PAGE_SIZE - 1)}
+        if not pageBases <= self.pages.keys():
+            return False
+        for pageBase in pageBases - self.dirtyPages:
+            uc.mem_protect(pageBase, self.PAGE_SIZE, UC_PROT_ALL)
+            self.dirtyPages.add(pageBase)
+        uc.mem_write(address, (value & ((1 << (size * 8)) - 1)).to_bytes(size, "little"))
+        return True
 
-        if is_64bit:
-            return DllBase < 0x8000000000000000
-        else:
-            # TODO: support 3GB address mode, if it's worth it
-            return DllBase < 0x80000000
+    def restorePage(self, pageBase, pageCts):
+        self.uc.mem_write(pageBase, pageCts)
+        # Drop any code translated from the page, in case the routine modified its own code
+        self.uc.ctl_remove_cache(pageBase, pageBase + len(pageCts))
+
+    def reset(self):
+        """Restores the clean registers and stack and the pages written by the previous timer, and removes its hooks."""
+        for hook in self.timerHooks:
+            self.uc.hook_del(hook)
+        self.timerHooks = []
+        self.result = None
+        self.contextPointer = None
+        self.resumeAddress = None
+
+        self.uc.context_restore(self.cleanContext)
+        for pageBase in self.dirtyPages:
+            self.restorePage(pageBase, self.pages[pageBase])
+            self.uc.mem_protect(pageBase, self.PAGE_SIZE, UC_PROT_READ | UC_PROT_EXEC)
+        self.dirtyPages.clear()
+        # The stack is written by every routine (and by us, with the return address and the routine's argument)
+        self.restorePage(self.STACK_BASE, self.cleanStack)
+
+
+class ExportResolver():
+    """
+    Resolves the exports of the modules loaded in processes, parsing each distinct module image once.
+
+    An image is identified by its name and the timestamp and size in its PE header, and its export table is kept as a
+    map of names to RVAs, so a DLL loaded by many processes (at any base) costs a single pefile parse.
+    """
+
+    def __init__(self, context, pe_table_name, dbgMsg):
+        self.context = context
+        self.pe_table_name = pe_table_name
+        self.dbgMsg = dbgMsg
+        self.exportTables = {}
+
+    def _get_dos_header(self, layer_name: str, base_address: int):
+        return self.context.object(
+            self.pe_table_name + constants.BANG + "_IMAGE_DOS_HEADER",
+            offset=base_address,
+            layer_name=layer_name,
+        )
 
-    def _get_pefile_obj(
-            self, pe_table_name: str, layer_name: str, base_address: int, dllName: str
-    ) -> pefile.PE:
+    def _get_pefile_obj(self, layer_name: str, base_address: int, dllName: str) -> pefile.PE:
         """
         Attempts to pefile object from the bytes of the PE file
 
         Args:
-            pe_table_name: name of the pe types table
             layer_name: name of the process layer
             base_address: base address of dll in process
             dllName: the name of the dll
@@ -173,11 +373,7 @@ class Gargoyle(interfaces.plugins.PluginInterface):
         pe_data = io.BytesIO()
 
         try:
-            dos_header = self.context.object(
-                pe_table_name + constants.BANG + "_IMAGE_DOS_HEADER",
-                offset=base_address,
-                layer_name=layer_name,
-            )
+            dos_header = self._get_dos_header(layer_name, base_address)
 
             for offset, data in dos_header.reconstruct():
                 pe_data.seek(offset)
@@ -191,287 +387,372 @@ class Gargoyle(interfaces.plugins.PluginInterface):
 
         return pe_ret
 
-    def findExportInModuleList(self, process, moduleList, moduleName, exportName):
-        moduleNameLowercase = moduleName.lower()
-        exportNameLowercase = exportName.lower()
+    def getImageKey(self, layer_name: str, base_address: int, dllName: str):
+        try:
+            nt_header = self._get_dos_header(layer_name, base_address).get_nt_header()
+            return dllName, int(nt_header.FileHeader.TimeDateStamp), int(nt_header.OptionalHeader.SizeOfImage)
+        except (exceptions.InvalidAddressException, ValueError):
+            vollog.debug(f"Unable to read the PE header of {dllName} at {hex(base_address)}")
+            return None
+
+    def getExportTable(self, layer_name: str, base_address: int, dllName: str):
+        """Returns the export RVAs of a module by name, or None if its image can't be read."""
+        imageKey = self.getImageKey(layer_name, base_address, dllName)
+        if imageKey == None:
+            return None
+        if imageKey in self.exportTables:
+            return self.exportTables[imageKey]
+
+        dll_pe_file = self._get_pefile_obj(layer_name, base_address, dllName)
+        if not dll_pe_file:
+            # Not cached, another process may have the image paged in
+            return None
+
+        dll_pe_file.parse_data_directories(
+            directories=[pefile.DIRECTORY_ENTRY["IMAGE_DIRECTORY_ENTRY_EXPORT"]]
+        )
+        exportTable = {}
+        if hasattr(dll_pe_file, "DIRECTORY_ENTRY_EXPORT"):
+            for export in dll_pe_file.DIRECTORY_ENTRY_EXPORT.symbols:
+                # Exports by ordinal only have no name
+                if export.name:
+                    exportTable[export.name.decode('utf-8').lower()] = export.address
+        self.dbgMsg("Parsed %d exports of %s" % (len(exportTable), dllName))
+        self.exportTables[imageKey] = exportTable
+        return exportTable
+
+    def resolve(self, layer_name: str, base_address: int, dllName: str, exportNames):
+        """Returns the addresses of the exports of the module at base_address which are found, by name."""
+        exportTable = self.getExportTable(layer_name, base_address, dllName)
+        if exportTable == None:
+            return {}
+
+        exports = {}
+        for exportName in exportNames:
+            rva = exportTable.get(exportName.lower())
+            if rva != None:
+                exports[exportName] = base_address + rva
+                self.dbgMsg("Found %s ! %s at %s (%s)" % (
+                dllName, exportName, hex(exports[exportName]), hex(base_address)))
+        return exports
+
+
+class Gargoyle(interfaces.plugins.PluginInterface):
+    """Detect gargoyle evasion technique payload in memory"""
 
-        for m in moduleList:
+    _required_framework_version = (2, 0, 0)
+    _version = (1, 1, 0)
+
+    @classmethod
+    def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
+        return [
+            requirements.ModuleRequirement(
+                name="kernel",
+                description="Windows kernel",
+                architectures=["Intel32", "Intel64"],
+            ),
+            requirements.ListRequirement(
+                name="pid",
+                element_type=int,
+                description="Process IDs to include (all other processes are excluded)",
+                optional=True,
+            ),
+            requirements.BooleanRequirement(
+                name="dump",
+                description="Extract payloads",
+                default=False,
+                optional=True,
+            ),
+            requirements.BooleanRequirement(
+                name="verbose",
+                description="Show verbose information",
+                default=False,
+                optional=True,
+            ),
+            requirements.IntRequirement(
+                name="emulation_workers",
+                description="Number of processes to emulate timer routines in, grouped by owning process (0 to emulate them here)",
+                default=0,
+                optional=True,
+            ),
+            requirements.VersionRequirement(
+                name="timers", component=timers.Timers, version=(1, 0, 0)
+            ),
+        ]
+
+    def dbgMsg(self, *args):
+        if self.config["verbose"]:
+            print(" ".join(map(str, args)))
+
+    def findExports(self, process, moduleName, exportNames):
+        """Returns the addresses of the named exports of a module loaded in a process, by name."""
+        if process.get_is_wow64():
+            # WoW64 processes are treated specially, since we must get 32bit modules via the 32bit PEB.
+            print("Wow64 processes are not supported right now")
+            return {}
+
+        # Not a WoW64 process, so just get the modules normally.
+        moduleNameLowercase = moduleName.lower()
+        exports = {}
+        for m in process.mem_order_modules():
             try:
                 dllName = m.BaseDllName.String.lower()
             except:
                 continue
             if dllName == moduleNameLowercase:
-                # Cache per-process (since a module may appear in a different process at a different base). For kernel modules
-                # there's no need to be per-process, so don't bother.
-                if self.isKernelSpace(m.DllBase):
-                    cacheKey = "%s!%s (kernel)" % (moduleNameLowercase, exportNameLowercase)
-                else:
-                    cacheKey = "%s!%s %s" % (moduleNameLowercase, exportNameLowercase, hex(m.DllBase))
-                if cacheKey in self.exportCache.keys():
-                    return self.exportCache[cacheKey]
-
-                pe_table_name = intermed.IntermediateSymbolTable.create(
-                    self.context, self.config_path, "windows", "pe", class_types=pe.class_types
-                )
-
-                proc_layer_name = process.add_process_layer()
-                dll_pe_file = self._get_pefile_obj(pe_table_name, proc_layer_name, m.DllBase, dllName)
-                if not dll_pe_file:
-                    return None
-
-                dll_pe_file.parse_data_directories(
-                    directories=[pefile.DIRECTORY_ENTRY["IMAGE_DIRECTORY_ENTRY_EXPORT"]]
-                )
-
-                for export in dll_pe_file.DIRECTORY_ENTRY_EXPORT.symbols:
-                    exported_function_name = export.name.decode('utf-8').lower()
-                    if exported_function_name == exportNameLowercase:
-                        toReturn = m.DllBase + export.address
-                        self.dbgMsg("Found %s ! %s at %s (%s)" % (
-                        dllName, exported_function_name, hex(toReturn), hex(m.DllBase)))
-                        self.exportCache[cacheKey] = toReturn
-                        return toReturn
-
-        return None
-
-    def findExport(self, process, moduleName, exportName):
-        if process.get_is_wow64():
-            # WoW64 processes are treated specially, since we must get 32bit modules via the 32bit PEB.
-            print("Wow64 processes are not supported right now")
-            return None
-        else:
-            # Not a WoW64 process, so just get the modules normally.
-            modList = process.mem_order_modules()
-
-        exp = self.findExportInModuleList(process, modList, moduleName, exportName)
-        if exp == None:
-            print("Unable to find export %s!%s in process %s" % (
-            moduleName, exportName, utility.array_to_string(process.ImageFileName)))
-        return exp
+                exports = self.exportResolver.resolve(process.add_process_layer(), m.DllBase, dllName, exportNames)
+                break
 
-    def examine(self, process, thread, routine, apc, timer, symbol_table, is_64bit) -> Iterator[timerResult]:
+        for exportName in exportNames:
+            if exportName not in exports:
+                print("Unable to find export %s!%s in process %s" % (
+                moduleName, exportName, utility.array_to_string(process.ImageFileName)))
+        return exports
+
+    def getSession(self, process, is_64bit, symbol_table) -> EmulationSession:
+        """Returns the emulation session of a process, keeping the most recently used ones."""
+        key = process.vol.offset
+        if key in self.sessions:
+            self.sessions.move_to_end(key)
+        else:
+            session = EmulationSession(self.context, process, is_64bit, self.dbgMsg)
+            self.hookSession(session, process, symbol_table)
+            self.sessions[key] = session
+            if len(self.sessions) > MAX_EMULATION_SESSIONS:
+                self.sessions.popitem(last=False)
+        return self.sessions[key]
+
+    def hookSession(self, session, process, symbol_table):
+        """
+        Adds the hooks through which Unicorn hands control back to us while it runs a routine in native blocks: calls
+        to VirtualProtect and VirtualProtectEx, the NtContinue syscall and, when verbose, every instruction.
+        """
+        uc = session.uc
+        session.symbol_table = symbol_table
+        # A ROP chain may be anywhere in the context buffer, so a pivot is looked for across all of it
+        session.contextSize = self.context.symbol_space.get_type(symbol_table + constants.BANG + "_CONTEXT").size
+        # We will see if the APC calls VirtualProtect. If it does, we will see if it also tries to jump to the
+        # newly-VirtualProtect'ed memory - a sure sign of Gargoyle-ness.
+        exports = self.findExports(process, "KERNEL32.DLL", ["VirtualProtect", "VirtualProtectEx"])
+        session.VirtualProtect = exports.get("VirtualProtect")
+        session.VirtualProtectEx = exports.get("VirtualProtectEx")
+        if session.VirtualProtect != None:
+            uc.hook_add(UC_HOOK_CODE, self.hookVirtualProtect, session, session.VirtualProtect,
+                        session.VirtualProtect)
+        if session.VirtualProtectEx != None:
+            uc.hook_add(UC_HOOK_CODE, self.hookVirtualProtectEx, session, session.VirtualProtectEx,
+                        session.VirtualProtectEx)
+        if session.is_64bit:
+            uc.hook_add(UC_HOOK_INSN, self.hookSyscall, session, 1, 0, UC_X86_INS_SYSCALL)
+        if self.config["verbose"]:
+            uc.hook_add(UC_HOOK_CODE, self.hookTrace, session)
+
+    def hookTrace(self, uc, address, size, session):
+        print("Before instruction at %s:" % hex(address))
+        print("CS:IP = %s:%s SS:SP = %s:%s" % (
+        hex(uc.reg_read(UC_X86_REG_CS)), hex(uc.reg_read(UC_X86_REG_EIP)),
+        hex(uc.reg_read(UC_X86_REG_SS)), hex(uc.reg_read(UC_X86_REG_ESP))))
+
+    def hookVirtualProtect(self, uc, address, size, session):
+        # VirtualProtect(lpAddress, dwSize, flNewProtect, lpflOldProtect)
+        self.emulateVirtualProtect(uc, session, "VirtualProtect", 1, 4)
+
+    def hookVirtualProtectEx(self, uc, address, size, session):
+        # VirtualProtectEx(hProcess, lpAddress, dwSize, flNewProtect, lpflOldProtect)
+        self.emulateVirtualProtect(uc, session, "VirtualProtectEx", 2, 5)
+
+    def emulateVirtualProtect(self, uc, session, exportName, rangeArgument, argumentCount):
+        result = session.result
+        if session.is_64bit:
+            result.probablePayload = uc.reg_read(UC_X86_REG_RCX)
+        result.didAdjustPerms = "True"
+
+        # Read the arguments to VirtualProtect, and the return address, from the stack
+        esp = uc.reg_read(session.stackPointer)
+        returnAddress = struct.unpack("I", uc.mem_read(esp, 4))[0]
+        memoryRange = struct.unpack("I", uc.mem_read(esp + 4 * rangeArgument, 4))[0]
+
+        result.adjustedAddresses.append(memoryRange)
+        self.dbgMsg("%s: Timer routine is adjusting memory permissions of range %s" % (exportName, hex(memoryRange)))
+        # Set the return address to whatever VirtualProtect would've returned to, and pop the args plus the return
+        # address off the (32bit) stack
+        uc.reg_write(session.instructionPointer, returnAddress)
+        uc.reg_write(session.stackPointer, esp + 4 * (argumentCount + 1))
+
+        if returnAddress in result.adjustedAddresses:
+            self.jumpedToAdjusted(uc, session, returnAddress)
+        else:
+            # Catch a later branch to the newly-executable code
+            session.timerHooks.append(uc.hook_add(UC_HOOK_CODE, self.hookAdjusted, session, memoryRange, memoryRange))
+
+    def hookAdjusted(self, uc, address, size, session):
+        self.jumpedToAdjusted(uc, session, address)
+
+    def jumpedToAdjusted(self, uc, session, address):
+        session.result.didJumpToAdjusted = "True"
+        session.result.probablePayload = address
+        self.dbgMsg("Timer routine is jumping to newly-executable code at %s!" % hex(address))
+        uc.emu_stop()
+
+    def hookStackRead(self, uc, access, address, size, value, session):
+        # The context buffer is read, check it's because the routine made (somewhere in) it its stack
+        stackPointer = uc.reg_read(session.stackPointer)
+        if not (session.contextPointer <= stackPointer < session.contextPointer + session.contextSize) or \
+                session.result.didROP == "True":
+            return
+        session.result.didROP = "True"
+        self.dbgMsg("APC has performed stack pivot; new stack is its context pointer")
+        if session.VirtualProtect == None:
+            # If we didn't find VirtualProtect, we can't go any further. I guess a stack pivot is a pretty big
+            # red flag anyway.
+            uc.emu_stop()
+
+    def hookSyscall(self, uc, session):
+        if uc.reg_read(UC_X86_REG_RAX) != NT_CONTINUE_SYSCALL:
+            return
+        # NtContinue resumes with the context the APC was given
+        context = self.context.object(session.symbol_table + constants.BANG + "_CONTEXT", session.proc_layer_name,
+                                      session.contextPointer)
+        uc.reg_write(UC_X86_REG_RAX, context.Rax)
+        uc.reg_write(UC_X86_REG_RBX, context.Rbx)
+        uc.reg_write(UC_X86_REG_RCX, context.Rcx)
+        uc.reg_write(UC_X86_REG_RDX, context.Rdx)
+        uc.reg_write(UC_X86_REG_R8, context.R8)
+        uc.reg_write(UC_X86_REG_R9, context.R9)
+        uc.reg_write(UC_X86_REG_R10, context.R10)
+        uc.reg_write(UC_X86_REG_R11, context.R11)
+        uc.reg_write(UC_X86_REG_R12, context.R12)
+        uc.reg_write(UC_X86_REG_R13, context.R13)
+        uc.reg_write(UC_X86_REG_R14, context.R14)
+        uc.reg_write(UC_X86_REG_R15, context.R15)
+        # Unicorn moves past the syscall after this hook, so stop and resume at the context's Rip ourselves
+        session.resumeAddress = context.Rip
+        uc.emu_stop()
+
+    def examine(self, process, thread, timerAPC, symbol_table, is_64bit) -> Iterator[timerResult]:
         # We will now emulate through the instruction stream, starting at the APC handler, and see if anything fishy
-        # goes on. Specifically, we will see if the APC calls VirtualProtect. If it does, we will see if it also
-        # tries to jump to the newly-VirtualProtect'ed memory - a sure sign of Gargoyle-ness.
-        VirtualProtect = self.findExport(process, "KERNEL32.DLL", "VirtualProtect")
-        VirtualProtectEx = self.findExport(process, "KERNEL32.DLL", "VirtualProtectEx")
-        # We'll need to set the process address space so that our badmem callback can use it later on.
-        proc_layer_name = process.add_process_layer()
-        self.pas = self.context.layers[proc_layer_name]
-
-        result = timerResult(self.context, process, thread, routine, is_64bit)
+        # goes on. The process's emulation session provides the engine, with the process's pages already faulted in
+        # by earlier timers, reset to a clean state, and with the hooks which look for calls to VirtualProtect.
+        session = self.getSession(process, is_64bit, symbol_table)
+        session.reset()
+        unicornEng = session.uc
+
+        routine = timerAPC.routine
+        result = timerResult(self.context, process, thread, routine, is_64bit, session.proc_layer_name)
+        session.result = result
+        session.contextPointer = timerAPC.normal_context
         self.dbgMsg("Timer %s APC %s routine %s in process %s ('%s') thread %s" % (
-        hex(int(timer.vol.offset)), hex(int(apc.vol.offset)), hex(routine), hex(int(process.vol.offset)),
+        hex(timerAPC.timer_offset), hex(timerAPC.apc_offset), hex(routine), hex(int(process.vol.offset)),
         utility.array_to_string(process.ImageFileName), hex(thread.StartAddress)))
 
-
-        if (is_64bit):
-            unicornEng = Uc(UC_ARCH_X86, UC_MODE_64)
-        else:
-            unicornEng = Uc(UC_ARCH_X86, UC_MODE_32)
-        
-        if (is_64bit):
-            instruction_pointer= UC_X86_REG_RIP
-            stack_pointer = UC_X86_REG_RSP
-        else:
-            instruction_pointer= UC_X86_REG_EIP
-            stack_pointer = UC_X86_REG_ESP
-        SYSCALL_OPCODE = bytearray(b'\x0f\x05')
-        # Populate the context from which to start emulating.
-        # We use an arbitrary ESP, with a magic value to signify that the APC handler has returned.
-        initialStackBase = 0x00000000f0000000
-        unicornEng.mem_map(initialStackBase, 2 * 1024 * 1024)
-        unicornEng.mem_write(initialStackBase + 0x100 + 0, b"\xbe\xba\xde\xc0")
-
-        # We push the argument which the APC handler is given        
+        # We push the argument which the APC handler is given
+        pointerSize = 8 if is_64bit else 4
         if (is_64bit):
-            unicornEng.reg_write(UC_X86_REG_RCX, apc.NormalContext)
+            unicornEng.reg_write(UC_X86_REG_RCX, timerAPC.normal_context)
         else:
-            routine_param = self.pas.read(apc.NormalContext.vol.offset, apc.NormalContext._data_format.length)
-            unicornEng.mem_write(initialStackBase + 0x100 + apc.NormalContext._data_format.length, routine_param)
-        
-        unicornEng.reg_write(stack_pointer, initialStackBase + 0x100)
+            routine_param = session.pas.read(timerAPC.normal_context_offset, pointerSize)
+            unicornEng.mem_write(session.STACK_POINTER + pointerSize, routine_param)
 
-        # Set up our handlers, which will map memory on-demand from the debuggee
-        unicornEng.hook_add(UC_HOOK_MEM_READ_UNMAPPED, self.badmem)
-        unicornEng.hook_add(UC_HOOK_MEM_WRITE_INVALID, self.badmem)
-        unicornEng.hook_add(UC_HOOK_MEM_FETCH_UNMAPPED, self.badmem)
+        unicornEng.reg_write(session.stackPointer, session.STACK_POINTER)
+
+        # A ROP chain pivots the stack into the context buffer, so watch for the stack being read from there
+        session.timerHooks.append(unicornEng.hook_add(UC_HOOK_MEM_READ, self.hookStackRead, session,
+                                                      session.contextPointer,
+                                                      session.contextPointer + session.contextSize - 1))
 
         # Now, lets emulate some instructions! We won't get many, because Unicorn can't emulate a lot of things (like
         # segment-prefixed instructions, as used by wow64) but we'll get enough to detect most ROP chains.
-        instrEmulated = 0
+        # Unicorn runs until the APC returns to our magic address, or one of the hooks stops it.
         nextIns = routine
-        memoryRange = None
-        
-
-
-        while instrEmulated < 10000:
-            if self.config["verbose"]:
-                print("Before instruction %d at %s:" % (instrEmulated, hex(nextIns)))
-                print("CS:IP = %s:%s SS:SP = %s:%s" % (
-                hex(unicornEng.reg_read(UC_X86_REG_CS)), hex(unicornEng.reg_read(UC_X86_REG_EIP)),
-                hex(unicornEng.reg_read(UC_X86_REG_SS)), hex(unicornEng.reg_read(UC_X86_REG_ESP))))
-
-            # Attempt to emulate a single instruction
-
+        for _ in range(MAX_EMULATION_RESUMES):
             try:
-                unicornEng.emu_start(nextIns, nextIns + 0x10, count=1)
-            except unicorn.UcError as e1:
-                self.dbgMsg(f"Unicorn (or badmem function) throw an exception: {e1}")
+                unicornEng.emu_start(nextIns, session.RETURN_ADDRESS, count=MAX_EMULATED_INSTRUCTIONS)
+            except (unicorn.UcError, exceptions.InvalidAddressException) as e1:
+                self.dbgMsg(f"Unicorn (or a hook) threw an exception: {e1}")
                 break
-
-            # Great, we emulated an instruction. Move on to the next instruction.
-            nextIns = unicornEng.reg_read(instruction_pointer)
-            try:
-                if (is_64bit and 
-                    unicornEng.mem_read(nextIns,2) == SYSCALL_OPCODE and
-                    unicornEng.reg_read(UC_X86_REG_RAX) == 0x43):
-                    context = self.context.object(symbol_table + constants.BANG + "_CONTEXT", proc_layer_name, apc.NormalContext)
-                    nextIns = context.Rip
-                    unicornEng.reg_write(UC_X86_REG_RAX, context.Rax)
-                    unicornEng.reg_write(UC_X86_REG_RBX, context.Rbx)
-                    unicornEng.reg_write(UC_X86_REG_RCX, context.Rcx)
-                    unicornEng.reg_write(UC_X86_REG_RDX, context.Rdx)
-                    unicornEng.reg_write(UC_X86_REG_R8, context.R8)
-                    unicornEng.reg_write(UC_X86_REG_R9, context.R9)
-                    unicornEng.reg_write(UC_X86_REG_R10, context.R10)
-                    unicornEng.reg_write(UC_X86_REG_R11, context.R11)
-                    unicornEng.reg_write(UC_X86_REG_R12, context.R12)
-                    unicornEng.reg_write(UC_X86_REG_R13, context.R13)
-                    unicornEng.reg_write(UC_X86_REG_R14, context.R14)
-                    unicornEng.reg_write(UC_X86_REG_R15, context.R15)
-            except unicorn.UcError as e1:
-                self.dbgMsg(f"read invalid: {e1}")
-        
-            instrEmulated = instrEmulated + 1
-
-            # If we're now at our magic address, then our APC has completed executing entirely. That's all, folks.
-            if nextIns == 0xc0debabe:
+            if session.resumeAddress == None:
                 break
-
-            # Now we can check for some suspicious circumstance.
-            esp = unicornEng.reg_read(stack_pointer)
-            if esp == int(apc.NormalContext):
-                result.didROP = "True"
-                self.dbgMsg("APC has performed stack pivot; new stack is its context pointer")
-                if VirtualProtect == None:
-                    # If we didn't find VirtualProtect, we can't go any further. I guess a stack pivot is a pretty big
-                    # red flag anyway.
-                    break
-            if VirtualProtectEx != None:
-                if nextIns == VirtualProtectEx:
-                    if(is_64bit):
-                            result.probablePayload = unicornEng.reg_read(UC_X86_REG_RCX)
-                    result.didAdjustPerms = "True"
-
-                    # Read the arguments to VirtualProtect, and the return address, from the stack
-                    returnAddress = struct.unpack("I", unicornEng.mem_read(esp - 0, 4))[0]
-                    memoryRange = struct.unpack("I", unicornEng.mem_read(esp + 8, 4))[0]
-
-                    result.adjustedAddresses.append(memoryRange)
-                    self.dbgMsg("VirtualProtectEx: Timer routine is adjusting memory permissions of range %s" % hex(
-                        memoryRange))
-                    # Set the return address to whatever VirtualProtect would've returned to
-                    nextIns = returnAddress
-                    unicornEng.reg_write(instruction_pointer, returnAddress)
-                    # Pop five args plus the return address off the (32bit) stack
-
-                    unicornEng.reg_write(stack_pointer, esp + (6*4))
-                if VirtualProtect != None:
-                    if nextIns == VirtualProtect:
-                        if(is_64bit):
-                            result.probablePayload = unicornEng.reg_read(UC_X86_REG_RCX)
-                        result.didAdjustPerms = "True"
-
-                        # Read the arguments to VirtualProtect, and the return address, from the stack
-                        returnAddress = struct.unpack("I", unicornEng.mem_read(esp - 0, 4))[0]
-                        memoryRange = struct.unpack("I", unicornEng.mem_read(esp + 4, 4))[0]
-
-                        result.adjustedAddresses.append(memoryRange)
-                        self.dbgMsg("VirtualProtect: Timer routine is adjusting memory permissions of range %s" % hex(
-                            memoryRange))
-                        # Set the return address to whatever VirtualProtect would've returned to
-                        nextIns = returnAddress
-                        unicornEng.reg_write(instruction_pointer, returnAddress)
-                        # Pop four args plus the return address off the (32bit) stack
-                        unicornEng.reg_write(stack_pointer, esp + (5 * 4))
-                if nextIns in result.adjustedAddresses:
-                    result.didJumpToAdjusted = "True"
-
-                    result.probablePayload = nextIns
-                    self.dbgMsg("Timer routine is jumping to newly-executable code at %s!" % hex(memoryRange))
-
-                    break
+            nextIns = session.resumeAddress
+            session.resumeAddress = None
         if result.probablePayload != 0:
             yield result
 
+    def startRun(self):
+        pe_table_name = intermed.IntermediateSymbolTable.create(
+            self.context, self.config_path, "windows", "pe", class_types=pe.class_types
+        )
+        self.exportResolver = ExportResolver(self.context, pe_table_name, self.dbgMsg)
+        self.sessions = collections.OrderedDict()
+
+    def emulateTimer(self, kernel, timerAPC, symbol_table, is_64bit) -> List[Tuple]:
+        """Emulates the APC routine of a timer, returning the rows of what it did."""
+        thread = kernel.object("_ETHREAD", offset=timerAPC.thread_offset, absolute=True)
+        process = kernel.object("_EPROCESS", offset=timerAPC.process_offset, absolute=True)
+        if not process.is_valid():
+            self.dbgMsg('Timer %s : warning: Thread ID %s has no owning process, skipping' % (
+            hex(timerAPC.timer_offset), hex(int(thread.Cid.UniqueThread))))
+            return []
+
+        rows = []
+        for result in self.examine(process, thread, timerAPC, symbol_table, is_64bit):
+            # make sure this matches FORMAT_LIST. The values are plain, so rows can come back from emulation workers.
+            rows.append((
+                int(result.process.UniqueProcessId),
+                str(result.process.ImageFileName.cast(
+                    "string",
+                    max_length=result.process.ImageFileName.vol.count,
+                    errors="replace",
+                )),
+                format_hints.Hex(result.routine),
+                str(result.didAdjustPerms),
+                str(result.didJumpToAdjusted),
+                format_hints.Hex(result.probablePayload),
+                result.prolog
+            ))
+        return rows
+
+    def emulateInParallel(self, timerAPCs, symbol_table, is_64bit) -> Iterator[Tuple]:
+        """
+        Emulates the timers in a pool of emulation_workers processes, yielding their rows in the order of the timers.
+
+        The timers of a process are emulated together by one worker, so they share its emulation session. The groups
+        are handed out in order of their first timer, and a row is yielded as soon as every earlier timer has been
+        emulated, rather than once all of them have.
+        """
+        timerGroups = {}
+        for index, timerAPC in timerAPCs:
+            timerGroups.setdefault(timerAPC.process_offset, []).append((index, timerAPC))
+        timerGroups = sorted(timerGroups.values(), key=lambda timerGroup: timerGroup[0][0])
+
+        # Rows of timers emulated ahead of an earlier one, by timer index (and order, as a timer may have several rows)
+        pendingRows = []
+        with multiprocessing.Pool(self.config["emulation_workers"], initializer=_init_emulation_worker,
+                                  initargs=(self.context.config, self.config_path)) as pool:
+            for groupIndex, indexedRows in enumerate(pool.imap(_emulate_timers, timerGroups)):
+                for order, (index, row) in enumerate(indexedRows):
+                    heapq.heappush(pendingRows, (index, order, row))
+                # The groups after this one only hold later timers, so every timer before their first is done
+                nextIndex = timerGroups[groupIndex + 1][0][0] if groupIndex + 1 < len(timerGroups) else None
+                while pendingRows and (nextIndex == None or pendingRows[0][0] < nextIndex):
+                    yield heapq.heappop(pendingRows)[2]
+
     def _generator(self) -> Iterator[timerResult]:
-        self.exportCache = {}
+        self.startRun()
 
         kernel = self.context.modules[self.config["kernel"]]
         symbol_table = kernel.symbol_table_name
 
         is_64bit = symbols.symbol_table_is_64bit(self.context, symbol_table)
 
-        for _, timer_data in timers.Timers(self.context, self.config_path)._generator():
-            timer_offset = timer_data[0]
-            timer = kernel.object(
-                object_type="_ETIMER",
-                offset=timer_offset,
-                absolute=True,
-            )
-            self.dbgMsg("Timer at {0}".format(hex(int(timer_offset))))
-
-            is_windows_vista = versions.is_vista_or_later(self.context, symbol_table) and \
-                               (not versions.is_windows_8_or_later(self.context, symbol_table)) and \
-                               (not versions.is_windows_7(self.context, symbol_table))
-            if is_64bit and (versions.is_xp_or_2003(self.context, symbol_table) or is_windows_vista):
-                apc = kernel.object("_KAPC_WOW64", offset=timer.TimerApc.vol.offset, absolute=True)
-            else:
-                apc = kernel.object("_KAPC", offset=timer.TimerApc.vol.offset, absolute=True)
-
-            routine = int(apc.NormalRoutine)
-            thread = kernel.object("_ETHREAD", offset=int(apc.Thread), absolute=True)
-            if (not thread.is_valid()) or (routine == 0):
-                # This APC has no user-mode payload.
-                continue
-
-            process = thread.owning_process()
-            if not process.is_valid():
-                # This usually happens when a timer is not pointing to a valid thread. I'm not sure why this happens -
-                # I guess there's some flag in the timer which states that it isn't valid, or the timer/timer list is
-                # # being manipulated when we dump.
-                self.dbgMsg('Timer %s : warning: Thread ID %s has no owning process, skipping' % (
-                hex(int(timer_offset)), hex(int(thread.Cid.UniqueThread))))
-                continue
-
-            # If this is a WoW64 APC - ie, an APC queued by a 32-bit thread on a 64-bit windows install - then we must
-            # 'decode' the NormalRoutine by shifting and negating it.
-            # We detect these WoW64-style APCs by comparing the top half of the 64bit address, except bit zero, to  0xffffffff. I'm not
-            # sure if this is reliable, but it seems to work.
-            if (((routine >> 32) | 0x01) == 0xffffffff):
-                routine32bit = (-(routine >> 2)) & 0xffffffff
-                self.dbgMsg("WoW64-style APC routine decoded %s to %s" % (hex(routine), hex(routine32bit)))
-                routine = routine32bit
-
-            for result in self.examine(process, thread, routine, apc, timer,symbol_table, is_64bit):
-                # make sure this matches FORMAT_LIST
-                yield (
-                    0,
-                    (
-                        result.process.UniqueProcessId,
-                        result.process.ImageFileName.cast(
-                            "string",
-                            max_length=result.process.ImageFileName.vol.count,
-                            errors="replace",
-                        ),
-                        format_hints.Hex(result.routine),
-                        str(result.didAdjustPerms),
-                        str(result.didJumpToAdjusted),
-                        format_hints.Hex(result.probablePayload),
-                        result.prolog
-                    ),
-                )
+        timer_offsets = (timer_data[0] for _, timer_data in timers.Timers(self.context, self.config_path)._generator())
+        timerAPCs = TimerAPCDecoder(self.context, kernel, is_64bit, self.dbgMsg).decodeAll(timer_offsets)
+        if self.config["emulation_workers"] > 0:
+            rows = self.emulateInParallel(timerAPCs, symbol_table, is_64bit)
+        else:
+            rows = (row for _, timerAPC in timerAPCs
+                    for row in self.emulateTimer(kernel, timerAPC, symbol_table, is_64bit))
+        for row in rows:
+            yield 0, row
 
     def run(self):
         return renderers.TreeGrid(
@@ -479,3 +760,45 @@ class Gargoyle(interfaces.plugins.PluginInterface):
             self._generator(),
         )
 
+
+
+# The plugin an emulation worker process emulates timers with, and the configuration and config path to build it from
+_worker_plugin = None
+_worker_setup = None
+
+
+def _init_emulation_worker(config, config_path):
+    # The plugin is only set up by the first task, since a pool whose initializer fails keeps replacing its workers
+    global _worker_setup
+    _worker_setup = config, config_path
+
+
+def _build_worker_plugin(config, config_path) -> Gargoyle:
+    """
+    Builds the plugin on a context of its own, constructing the layers and kernel module from the configuration of the
+    plugin which started the worker, as the live context isn't sent to workers.
+    """
+    context = contexts.Context()
+    context.config = config
+    requirement = requirements.MultiRequirement(name=interfaces.configuration.path_head(config_path))
+    for subrequirement in Gargoyle.get_requirements():
+        requirement.add_requirement(subrequirement)
+    constructor = construct_layers.ConstructionMagic(context, "automagic.ConstructionMagic")
+    constructor(context, interfaces.configuration.parent_path(config_path), requirement)
+    unsatisfied = Gargoyle.unsatisfied(context, config_path)
+    if unsatisfied:
+        raise exceptions.UnsatisfiedException(unsatisfied)
+    return Gargoyle(context, config_path)
+
+
+def _emulate_timers(timerGroup):
+    """Emulates a group of (index, TimerAPC) in a worker, returning the rows of each with the timer's index."""
+    global _worker_plugin
+    if _worker_plugin == None:
+        _worker_plugin = _build_worker_plugin(*_worker_setup)
+        _worker_plugin.startRun()
+    kernel = _worker_plugin.context.modules[_worker_plugin.config["kernel"]]
+    symbol_table = kernel.symbol_table_name
+    is_64bit = symbols.symbol_table_is_64bit(_worker_plugin.context, symbol_table)
+    return [(index, row) for index, timerAPC in timerGroup
+            for row in _worker_plugin.emulateTimer(kernel, timerAPC, symbol_table, is_64bit)]
@@ -2,9 +2,9 @@
 # which is available at https://www.volatilityfoundation.org/license/vsl-v1.0
 #
 import logging
-from typing import NamedTuple, Dict, Generator
+from typing import NamedTuple, Dict, Generator, Iterable, List, Tuple
 
-from volatility3.framework import interfaces, exceptions, constants
+from volatility3.framework import interfaces, exceptions
 from volatility3.framework import renderers
 from volatility3.framework.configuration import requirements
 from volatility3.framework.objects import utility
@@ -36,6 +36,7 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
     """Lists hollowed processes"""
 
     _required_framework_version = (2, 4, 0)
+    _version = (1, 0, 0)
 
     @classmethod
     def get_requirements(cls):
@@ -60,25 +61,24 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
             ),
         ]
 
-    def _get_vads_data(
-        self, proc: interfaces.objects.ObjectInterface
+    @classmethod
+    def get_vads_data(
+        cls,
+        vads: Iterable[interfaces.objects.ObjectInterface],
+        protect_values: List[int],
     ) -> Dict[int, VadData]:
         """
         Returns a dictionary of:
             base address -> (protection string, file name)
-        For each mapped VAD in the process. This is used
-        for quick lookups of data and matching the DLL
+        For each VAD from `vads`, such as a process' `get_vad_index()`.
+        This is used for quick lookups of data and matching the DLL
         at the same base address as the VAD
         """
-        vads = {}
-
-        kernel = self.context.modules[self.config["kernel"]]
+        vads_data = {}
 
-        for vad in proc.get_vad_root().traverse():
+        for vad in vads:
             protection_string = vad.get_protection(
-                vadinfo.VadInfo.protect_values(
-                    self.context, kernel.layer_name, kernel.symbol_table_name
-                ),
+                protect_values,
                 vadinfo.winnt_protections,
             )
 
@@ -86,12 +86,13 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
             if not fn or not isinstance(fn, str):
                 fn = "<Non-File Backed Region>"
 
-            vads[vad.get_start()] = VadData(protection_string, fn)
+            vads_data[vad.get_start()] = VadData(protection_string, fn)
 
-        return vads
+        return vads_data
 
-    def _get_dlls_map(
-        self, proc: interfaces.objects.ObjectInterface
+    @classmethod
+    def get_dlls_map(
+        cls, proc: interfaces.objects.ObjectInterface
     ) -> Dict[int, DLLData]:
         """
         Returns a dictionary of:
@@ -120,39 +121,34 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
 
         return dlls
 
-    def _get_image_base(self, proc: interfaces.objects.ObjectInterface) -> int:
+    @classmethod
+    def get_image_base(cls, proc: interfaces.objects.ObjectInterface) -> int:
         """
         Uses the PEB to get the image base of the process
         """
-        kernel = self.context.modules[self.config["kernel"]]
-
         try:
-            proc_layer_name = proc.add_process_layer()
-            peb = self.context.object(
-                kernel.symbol_table_name + constants.BANG + "_PEB",
-                layer_name=proc_layer_name,
-                offset=proc.Peb,
-            )
-            return peb.ImageBaseAddress
+            return proc.get_peb().ImageBaseAddress
         except exceptions.InvalidAddressException:
             return None
 
-    def _check_load_address(self, proc, _, __) -> Generator[str, None, None]:
+    @classmethod
+    def check_load_address(cls, proc, _, __) -> Generator[Tuple[int, str], None, None]:
         """
         Detects when the image base in the PEB, which is writable by process malware,
         does not match the section base address - whose value lives in kernel memory.
         Many malware samples will manipulate their image base to fool AVs/EDRs and
         as a necessary part of certain hollowing techniques
         """
-        image_base = self._get_image_base(proc)
+        image_base = cls.get_image_base(proc)
         if image_base is not None and image_base != proc.SectionBaseAddress:
-            yield "The ImageBaseAddress reported from the PEB ({:#x}) does not match the process SectionBaseAddress ({:#x})".format(
+            yield proc.SectionBaseAddress, "The ImageBaseAddress reported from the PEB ({:#x}) does not match the process SectionBaseAddress ({:#x})".format(
                 image_base, proc.SectionBaseAddress
             )
 
-    def _check_exe_protection(
-        self, proc, vads: Dict[int, VadData], __
-    ) -> Generator[str, None, None]:
+    @classmethod
+    def check_exe_protection(
+        cls, proc, vads: Dict[int, VadData], __
+    ) -> Generator[Tuple[int, str], None, None]:
         """
         Legitimately mapped application executables and DLLs
         will have a VAD present and its initial protection will be
@@ -161,22 +157,23 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
         unmap the real executable and/or map in executables with
         incorrect permissions.
         This check verifies the VAD for the application exe.
-        `_check_dlls_protection` checks for DLLs mapped in the process.
+        `check_dlls_protection` checks for DLLs mapped in the process.
         """
         base = proc.SectionBaseAddress
 
         if base not in vads:
-            yield "There is no VAD starting at the base address of the process executable ({:#x})".format(
+            yield base, "There is no VAD starting at the base address of the process executable ({:#x})".format(
                 base
             )
         elif vads[base].protection != "PAGE_EXECUTE_WRITECOPY":
-            yield "Unexpected protection ({}) for VAD hosting the process executable ({:#x}) with path {}".format(
+            yield base, "Unexpected protection ({}) for VAD hosting the process executable ({:#x}) with path {}".format(
                 vads[base].protection, base, vads[base].path
             )
 
-    def _check_dlls_protection(
-        self, _, vads: Dict[int, VadData], dlls: Dict[int, DLLData]
-    ) -> Generator[str, None, None]:
+    @classmethod
+    def check_dlls_protection(
+        cls, _, vads: Dict[int, VadData], dlls: Dict[int, DLLData]
+    ) -> Generator[Tuple[int, str], None, None]:
         for dll_base in dlls:
             # could be malicious but triggers too many FPs from smear
             if dll_base not in vads:
@@ -184,37 +181,58 @@ class HollowProcesses(interfaces.plugins.PluginInterface):
 
             # PAGE_EXECUTE_WRITECOPY is the only valid permission for mapped DLLs and .exe files
             if vads[dll_base].protection != "PAGE_EXECUTE_WRITECOPY":
-                yield "Unexpected protection ({}) for DLL in the PEB's load order list ({:#x}) with path {}".format(
+                yield dll_base, "Unexpected protection ({}) for DLL in the PEB's load order list ({:#x}) with path {}".format(
                     vads[dll_base].protection, dll_base, dlls[dll_base].path
                 )
 
-    def _generator(self, procs):
-        checks = [
-            self._check_load_address,
-            self._check_exe_protection,
-            self._check_dlls_protection,
-        ]
+    @classmethod
+    def list_hollowing_notes(
+        cls,
+        proc: interfaces.objects.ObjectInterface,
+        vads: Iterable[interfaces.objects.ObjectInterface],
+        protect_values: List[int],
+    ) -> Generator[Tuple[int, str], None, None]:
+        """
+        Runs each check against a process and its VADs (such as its `get_vad_index()`)
 
-        for proc in procs:
-            # smear and/or terminated process
-            dlls = self._get_dlls_map(proc)
-            if len(dlls) < 3:
-                continue
+        Yields the address each note is about (the executable or DLL base) and the note
+        """
+        # smear and/or terminated process
+        dlls = cls.get_dlls_map(proc)
+        if len(dlls) < 3:
+            return
+
+        vads_data = cls.get_vads_data(vads, protect_values)
+        if len(vads_data) < 5:
+            return
+
+        for check in [
+            cls.check_load_address,
+            cls.check_exe_protection,
+            cls.check_dlls_protection,
+        ]:
+            yield from check(proc, vads_data, dlls)
 
-            vads = self._get_vads_data(proc)
-            if len(vads) < 5:
-                continue
+    def _generator(self, procs):
+        kernel = self.context.modules[self.config["kernel"]]
+        protect_values = list(
+            vadinfo.VadInfo.protect_values(
+                self.context, kernel.layer_name, kernel.symbol_table_name
+            )
+        )
 
+        for proc in procs:
             proc_name = utility.array_to_string(proc.ImageFileName)
             pid = proc.UniqueProcessId
 
-            for check in checks:
-                for note in check(proc, vads, dlls):
-                    yield 0, (
-                        pid,
-                        proc_name,
-                        note,
-                    )
+            for _, note in self.list_hollowing_notes(
+                proc, proc.get_vad_index(), protect_values
+            ):
+                yield 0, (
+                    pid,
+                    proc_name,
+                    note,
+                )
 
     def run(self):
         filter_func = pslist.PsList.create_pid_filter(self.config.get("pid", None))
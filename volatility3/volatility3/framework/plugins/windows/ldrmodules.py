@@ -61,7 +61,7 @@ class LdrModules(interfaces.plugins.PluginInterface):
 
             # Build dictionary of mapped files, where the VAD start address is the key and value is the file name of the mapped file
             mapped_files = {}
-            for vad in vadinfo.VadInfo.list_vads(proc):
+            for vad in proc.get_vad_index():
                 dos_header = self.context.object(
                     pe_table_name + constants.BANG + "_IMAGE_DOS_HEADER",
                     offset=vad.get_start(),
@@ -18,6 +18,7 @@ class Malfind(interfaces.plugins.PluginInterface):
     """Lists process memory ranges that potentially contain injected code."""
 
     _required_framework_version = (2, 4, 0)
+    _version = (1, 0, 0)
 
     @classmethod
     def get_requirements(cls):
@@ -63,20 +64,18 @@ class Malfind(interfaces.plugins.PluginInterface):
             A boolean indicating whether a vad is empty or not
         """
 
-        CHUNK_SIZE = 0x1000
-        all_zero_page = b"\x00" * CHUNK_SIZE
+        CHUNK_SIZE = 0x100000
 
-        offset = 0
-        vad_length = vad.get_size()
-
-        while offset < vad_length:
-            next_addr = vad.get_start() + offset
-            if (
-                proc_layer.is_valid(next_addr, CHUNK_SIZE)
-                and proc_layer.read(next_addr, CHUNK_SIZE) != all_zero_page
-            ):
-                return False
-            offset += CHUNK_SIZE
+        # Map the whole VAD at once, so only its valid pages are read
+        for offset, sublength, _, _, _ in proc_layer.mapping(
+            vad.get_start(), vad.get_size(), ignore_errors=True
+        ):
+            end = offset + sublength
+            while offset < end:
+                data = proc_layer.read(offset, min(CHUNK_SIZE, end - offset))
+                if data.count(0) != len(data):
+                    return False
+                offset += len(data)
 
         return True
 
@@ -114,28 +113,49 @@ class Malfind(interfaces.plugins.PluginInterface):
 
         proc_layer = context.layers[proc_layer_name]
 
-        for vad in proc.get_vad_root().traverse():
+        for vad in proc.get_vad_index():
             protection_string = vad.get_protection(
                 vadinfo.VadInfo.protect_values(
                     context, kernel_layer_name, symbol_table
                 ),
                 vadinfo.winnt_protections,
             )
-            write_exec = "EXECUTE" in protection_string and "WRITE" in protection_string
+            if cls.is_injection(proc_layer, vad, protection_string):
+                data = proc_layer.read(vad.get_start(), 64, pad=True)
+                yield vad, data
 
-            # the write/exec check applies to everything
-            if not write_exec:
-                continue
+    @classmethod
+    def is_injection(
+        cls,
+        proc_layer: interfaces.layers.DataLayerInterface,
+        vad: interfaces.objects.ObjectInterface,
+        protection_string: str,
+    ) -> bool:
+        """Check if a VAD looks like a region of injected code: writable and
+        executable, either private or mapped without copy-on-write, and not
+        empty.
 
-            if (vad.get_private_memory() == 1 and vad.get_tag() == "VadS") or (
-                vad.get_private_memory() == 0
-                and protection_string != "PAGE_EXECUTE_WRITECOPY"
-            ):
-                if cls.is_vad_empty(proc_layer, vad):
-                    continue
+        Args:
+            proc_layer: the process layer
+            vad: the MMVAD structure to test
+            protection_string: the VAD's protection, as returned by its get_protection method
 
-                data = proc_layer.read(vad.get_start(), 64, pad=True)
-                yield vad, data
+        Returns:
+            A boolean indicating whether the vad may contain injected code
+        """
+        write_exec = "EXECUTE" in protection_string and "WRITE" in protection_string
+
+        # the write/exec check applies to everything
+        if not write_exec:
+            return False
+
+        if (vad.get_private_memory() == 1 and vad.get_tag() == "VadS") or (
+            vad.get_private_memory() == 0
+            and protection_string != "PAGE_EXECUTE_WRITECOPY"
+        ):
+            return not cls.is_vad_empty(proc_layer, vad)
+
+        return False
 
     def _generator(self, procs):
         # determine if we're on a 32 or 64 bit kernel
@@ -1,7 +1,12 @@
+import hashlib
+import io
+import json
 import logging
-from volatility3.framework import renderers, interfaces, symbols
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Type
+from volatility3.framework import renderers, interfaces, symbols, exceptions
 from volatility3.framework.configuration import requirements
-from volatility3.plugins.windows import pslist, vadinfo, gargoyle
+from volatility3.plugins.windows import pslist, vadinfo, gargoyle, malfind, hollowprocesses, processghosting, \
+    suspicious_threads, threads, thrdscan
 from volatility3.framework.renderers import format_hints
 from volatility3.framework.symbols import intermed
 from volatility3.framework.symbols.windows.extensions import pe
@@ -21,11 +26,241 @@ winnt_protections = {
     "PAGE_TARGETS_INVALID": 0x40000000,
 }
 
+# Bytes shown in the hexdump and disassembly of a hit
+PREVIEW_SIZE_DEFAULT = 16
+# Detectors run when the scanners option isn't given
+DEFAULT_SCANNERS = ["gargoyle"]
+# Lists each dumped file with its SHA-256, so identical dumps can be linked or skipped across scans.
+# The MED app reads it back by the DUMP_MANIFEST_FILE in its consts.py, which must stay equal to this one
+DUMP_MANIFEST_FILE = "dumps.manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+vollog = logging.getLogger(__name__)
+
+
+class ProcessEntry(NamedTuple):
+    process: interfaces.objects.ObjectInterface
+    layer_name: str
+    architecture: str
+
+
+class ProcessIndex:
+    """The processes of an image, listed once per run and looked up by PID.
+
+    The process layer and architecture of a process are resolved the first time it is looked up.
+    """
+
+    def __init__(self, context: interfaces.context.ContextInterface, kernel: interfaces.context.ModuleInterface):
+        self._processes = {}
+        for proc in pslist.PsList.list_processes(context, kernel.layer_name, kernel.symbol_table_name):
+            self._processes.setdefault(int(proc.UniqueProcessId), proc)
+        self._is_32bit_arch = not symbols.symbol_table_is_64bit(context, kernel.symbol_table_name)
+        self._entries: Dict[int, Optional[ProcessEntry]] = {}
+
+    def __iter__(self) -> Iterator[ProcessEntry]:
+        """Iterates the processes whose layer could be constructed, in process list order."""
+        for pid in self._processes:
+            entry = self.get(pid)
+            if entry is not None:
+                yield entry
+
+    def get(self, pid: int) -> Optional[ProcessEntry]:
+        if pid not in self._entries:
+            process = self._processes.get(pid)
+            if process is None:
+                return None
+            if self._is_32bit_arch or process.get_is_wow64():
+                architecture = "intel"
+            else:
+                architecture = "intel64"
+            try:
+                self._entries[pid] = ProcessEntry(process, process.add_process_layer(), architecture)
+            except exceptions.InvalidAddressException as excp:
+                vollog.debug(f"Process {pid}: invalid address {excp.invalid_address} in layer {excp.layer_name}")
+                self._entries[pid] = None
+        return self._entries[pid]
+
+
+class DumpCache:
+    """Dumps each VAD and process executable at most once per run.
+
+    Later rows reference the file of the first dump, and every file is recorded in a manifest along with the SHA-256 of
+    its content.
+    """
+
+    def __init__(self, plugin: "MED"):
+        self._plugin = plugin
+        self._files: Dict[tuple, str] = {}
+        self.manifest: Dict[str, dict] = {}
+
+    def dump_vad(self, entry: ProcessEntry, vad: interfaces.objects.ObjectInterface) -> str:
+        pid = int(entry.process.UniqueProcessId)
+        return self._dump(("vad", pid, vad.get_start(), vad.get_end()),
+                          lambda: vadinfo.VadInfo.vad_dump(self._plugin.context, entry.process, vad, self._plugin.open),
+                          {"type": "vad", "pid": pid, "start": vad.get_start(), "end": vad.get_end()})
+
+    def dump_process(self, entry: ProcessEntry) -> str:
+        pid = int(entry.process.UniqueProcessId)
+        kernel = self._plugin.context.modules[self._plugin.config["kernel"]]
+        return self._dump(("process", pid),
+                          lambda: pslist.PsList.process_dump(self._plugin.context, kernel.symbol_table_name,
+                                                             self._plugin.pe_table_name, entry.process,
+                                                             self._plugin.open),
+                          {"type": "process", "pid": pid})
+
+    def _dump(self, key: tuple, dump_func, details: dict) -> str:
+        if key not in self._files:
+            file_handle = dump_func()
+            if file_handle is None:
+                self._files[key] = "None"
+            else:
+                sha256 = hashlib.sha256()
+                file_handle.seek(0)
+                for chunk in iter(lambda: file_handle.read(HASH_CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+                file_handle.close()
+                self._files[key] = file_handle.preferred_filename
+                self.manifest[file_handle.preferred_filename] = dict(details, sha256=sha256.hexdigest())
+        return self._files[key]
+
+    def write_manifest(self) -> None:
+        if not self.manifest:
+            return None
+        with self._plugin.open(DUMP_MANIFEST_FILE) as file_data:
+            with io.TextIOWrapper(file_data, write_through=True) as fp:
+                json.dump(self.manifest, fp, sort_keys=True, indent=2)
+
+
+class Finding(NamedTuple):
+    pid: int
+    address: int
+    notes: str
+
+
+class Detector:
+    """A detection technique run by MED.
+
+    Detectors share the run's process index (and so its process layers and VAD indexes). Those that start from
+    processes implement scan_process, which is called for each process during the single pass over the processes;
+    those that start elsewhere (such as timers) implement scan, which is called once per run.
+    """
+
+    name: str = None
+
+    def __init__(self, plugin: "MED", process_index: ProcessIndex):
+        self.plugin = plugin
+        self.context = plugin.context
+        self.process_index = process_index
+
+    def scan(self) -> Iterable[Finding]:
+        return []
+
+    def scan_process(self, entry: ProcessEntry) -> Iterable[Finding]:
+        return []
+
+
+class GargoyleDetector(Detector):
+    """Timers whose APC emulates into a VirtualProtect call and then jumps to the re-protected memory"""
+
+    name = "gargoyle"
+
+    def scan(self) -> Iterable[Finding]:
+        for _, gargoyle_data in gargoyle.Gargoyle(self.context, self.plugin.config_path)._generator():
+            result_dict = {gargoyle.FORMAT_LIST[i][0]: gargoyle_data[i] for i in range(len(gargoyle_data))}
+            yield Finding(int(result_dict["PID"]), int(result_dict["Probable payload"]),
+                          f"Timer handler {int(result_dict['Handler']):#x}, "
+                          f"adjusted page permissions: {result_dict['Adjusted page permissions']}, "
+                          f"branched to code after altering page permission: "
+                          f"{result_dict['Branched to code after altering page permission']}")
+
+
+class MalfindDetector(Detector):
+    """Writable and executable memory that looks like injected code"""
+
+    name = "malfind"
+
+    def scan_process(self, entry: ProcessEntry) -> Iterable[Finding]:
+        proc_layer = self.context.layers[entry.layer_name]
+        for vad in entry.process.get_vad_index():
+            protection_string = vad.get_protection(self.plugin.protect_values, vadinfo.winnt_protections)
+            if malfind.Malfind.is_injection(proc_layer, vad, protection_string):
+                yield Finding(int(entry.process.UniqueProcessId), vad.get_start(),
+                              f"Possibly injected code in a {protection_string} VAD")
+
+
+class HollowProcessesDetector(Detector):
+    """Processes whose executable or DLLs aren't mapped the way the loader maps them"""
+
+    name = "hollowprocesses"
+
+    def scan_process(self, entry: ProcessEntry) -> Iterable[Finding]:
+        proc = entry.process
+        pid = int(proc.UniqueProcessId)
+        for address, note in hollowprocesses.HollowProcesses.list_hollowing_notes(
+                proc, proc.get_vad_index(), self.plugin.protect_values):
+            yield Finding(pid, int(address), note)
+
+
+class ProcessGhostingDetector(Detector):
+    """Processes whose executable file is delete-pending or missing"""
+
+    name = "processghosting"
+
+    def __init__(self, plugin: "MED", process_index: ProcessIndex):
+        super().__init__(plugin, process_index)
+        self._filter_func = pslist.PsList.create_active_process_filter()
+        kernel = self.context.modules[plugin.config["kernel"]]
+        self._is_supported = kernel.get_type("_EPROCESS").has_member("ImageFilePointer")
+        if not self._is_supported:
+            vollog.warning("The processghosting detector only supports Windows 10 builds when the ImageFilePointer "
+                           "member of _EPROCESS is present")
+
+    def scan_process(self, entry: ProcessEntry) -> Iterable[Finding]:
+        # Only active, userland processes are checked, as in the processghosting plugin
+        if not self._is_supported or self._filter_func(entry.process):
+            return
+        ghosting = processghosting.ProcessGhosting.get_ghosting_info(entry.process)
+        if ghosting is not None:
+            file_object, delete_pending, path = ghosting
+            yield Finding(int(entry.process.UniqueProcessId), int(entry.process.SectionBaseAddress),
+                          f"Image FILE_OBJECT {int(file_object):#x}, DeletePending: {delete_pending}, path: {path}")
+
+
+class SuspiciousThreadsDetector(Detector):
+    """Threads that started outside of the executables and DLLs mapped in their process"""
+
+    name = "suspicious_threads"
+
+    def __init__(self, plugin: "MED", process_index: ProcessIndex):
+        super().__init__(plugin, process_index)
+        self._kernel = self.context.modules[plugin.config["kernel"]]
+
+    def scan_process(self, entry: ProcessEntry) -> Iterable[Finding]:
+        proc = entry.process
+        pid = int(proc.UniqueProcessId)
+        for tid, address_context, address, vad_path, note in \
+                suspicious_threads.SupsiciousThreads.list_suspicious_threads(
+                    self._kernel, proc, proc.get_vad_index(), self.plugin.protect_values):
+            yield Finding(pid, int(address), f"Thread {tid} ({address_context}, {vad_path}): {note}")
+
+
+DETECTORS: Dict[str, Type[Detector]] = {
+    detector.name: detector
+    for detector in [
+        GargoyleDetector,
+        MalfindDetector,
+        HollowProcessesDetector,
+        ProcessGhostingDetector,
+        SuspiciousThreadsDetector,
+    ]
+}
+
+
 class MED(interfaces.plugins.PluginInterface):
     """Find detection evasion injections"""
 
     _required_framework_version = (2, 0, 0)
-    _version = (1, 0, 0)
+    _version = (1, 3, 0)
 
     @classmethod
     def get_requirements(cls):
@@ -35,8 +270,21 @@ class MED(interfaces.plugins.PluginInterface):
                 description="Windows kernel",
                 architectures=["Intel32", "Intel64"],
             ),
-            requirements.ListRequirement(name='scanners', element_type=str, description='Detection scanners to run', optional=True),
+            requirements.VersionRequirement(name="pslist", component=pslist.PsList, version=(2, 0, 0)),
+            requirements.VersionRequirement(name="vadinfo", component=vadinfo.VadInfo, version=(2, 0, 0)),
+            requirements.VersionRequirement(name="malfind", component=malfind.Malfind, version=(1, 0, 0)),
+            requirements.VersionRequirement(name="hollowprocesses", component=hollowprocesses.HollowProcesses,
+                                            version=(1, 0, 0)),
+            requirements.VersionRequirement(name="processghosting", component=processghosting.ProcessGhosting,
+                                            version=(1, 0, 0)),
+            requirements.VersionRequirement(name="suspicious_threads",
+                                            component=suspicious_threads.SupsiciousThreads, version=(2, 1, 0)),
+            requirements.PluginRequirement(name="threads", plugin=threads.Threads, version=(1, 0, 0)),
+            requirements.VersionRequirement(name="thrdscan", component=thrdscan.ThrdScan, version=(1, 1, 0)),
+            requirements.ListRequirement(name='scanners', element_type=str, description=f"Detection scanners to run, out of: {', '.join(DETECTORS)} (default: {', '.join(DEFAULT_SCANNERS)})", optional=True),
             requirements.BooleanRequirement(name="dump", description="Extract suspicious processes", default=False, optional=True),
+            requirements.IntRequirement(name="preview_size", description="Number of bytes from the probable payload address shown in the hexdump and disassembly", default=PREVIEW_SIZE_DEFAULT, optional=True),
+            requirements.IntRequirement(name="emulation_workers", description="Number of processes the gargoyle scanner emulates timer routines in (0 to emulate them in this process)", default=0, optional=True),
             requirements.StringRequirement(name='log_file_path', description="Path to the log file", optional=True)
         ]
 
@@ -53,84 +301,96 @@ class MED(interfaces.plugins.PluginInterface):
 
         self.logger.addHandler(file_handler)
 
+    def get_detectors(self, process_index: ProcessIndex) -> List[Detector]:
+        """Constructs the detectors selected by the scanners option."""
+        scanners = self.config.get("scanners") or DEFAULT_SCANNERS
+        unknown_scanners = [scanner for scanner in scanners if scanner not in DETECTORS]
+        if unknown_scanners:
+            raise ValueError(f"Unknown scanners: {', '.join(unknown_scanners)} (available: {', '.join(DETECTORS)})")
+        return [DETECTORS[scanner](self, process_index) for scanner in dict.fromkeys(scanners)]
+
     def _generator(self):
-        """This function calls the Gargoyle plugin and processes its results."""
+        """Runs the selected detectors in a single pass over the processes and reports each finding."""
 
         kernel = self.context.modules[self.config["kernel"]]
-        pe_table_name = intermed.IntermediateSymbolTable.create(
+        self.pe_table_name = intermed.IntermediateSymbolTable.create(
             self.context, self.config_path, "windows", "pe", class_types=pe.class_types
         )
-        for _, gargoyle_data in gargoyle.Gargoyle(self.context, self.config_path)._generator():
-            result_dict = {gargoyle.FORMAT_LIST[i][0]: gargoyle_data[i] for i in range(len(gargoyle_data))}
+        process_index = ProcessIndex(self.context, kernel)
+        # The protection constants don't change during a run, so they are read once instead of per VAD
+        self.protect_values = list(vadinfo.VadInfo.protect_values(self.context, kernel.layer_name, kernel.symbol_table_name))
+        detectors = self.get_detectors(process_index)
+        self.dump_cache = DumpCache(self)
+
+        for detector in detectors:
+            for finding in detector.scan():
+                row = self._build_row(detector, process_index.get(finding.pid), finding)
+                if row:
+                    yield row
 
-            # Fetch the VAD for the probable payload address
-            pid = int(result_dict["PID"])
-            process = next((proc for proc in pslist.PsList.list_processes(self.context, kernel.layer_name, kernel.symbol_table_name) if proc.UniqueProcessId == pid), None)
-
-            if not process:
-                continue
-
-            proc_layer_name = process.add_process_layer()
-            proc_layer = self.context.layers[proc_layer_name]
-
-            process_info = {
-                "Process": result_dict["Process"],
-                "Pid": pid,
-                "Address": hex(result_dict["Probable payload"]),
-                "Vad Tag": "N/A",
-                "Protection": "N/A",
-                "Hexdump": [],
-            }
-            vad_output="None"
-            executable_output = "None"
-            for vad in vadinfo.VadInfo(self.context, self.config_path).list_vads(process):
-                if vad.get_start() <= result_dict["Probable payload"] < vad.get_end():
-                    process_info["Vad Tag"] = str(vad.get_tag())
-                    process_info["Protection"] = vad.get_protection(vadinfo.VadInfo(self.context, self.config_path).protect_values(self.context, kernel.layer_name, kernel.symbol_table_name), winnt_protections)
-                    memory_data = proc_layer.read(vad.get_start(), vad.get_end() - vad.get_start())
-                    process_info["Hexdump"] = format_hints.HexBytes(memory_data[16])
-                    is_32bit_arch = not symbols.symbol_table_is_64bit(
-                        self.context, kernel.symbol_table_name
-                    )
-                    if is_32bit_arch or process.get_is_wow64():
-                        architecture = "intel"
-                    else:
-                        architecture = "intel64"
-
-                    disasm = interfaces.renderers.Disassembly(
-                        memory_data[:16], vad.get_start(), architecture
-                    )
-                    if self.config["dump"]:
-                        f = vadinfo.VadInfo(self.context, self.config_path).vad_dump(self.context, process,vad,self.open)
-                        f.close()
-                        vad_output = f.preferred_filename
-                        f2 = pslist.PsList.process_dump(self.context,
-                                                         kernel.symbol_table_name,
-                                                         pe_table_name,
-                                                         process,
-                                                         self.open,)
-                        f2.close()
-                        executable_output =f2.preferred_filename
-                    break
-
-            yield (0, [
-                str(process.UniqueProcessId),
-                process.ImageFileName.cast(
-                    "string",
-                    max_length=process.ImageFileName.vol.count,
-                    errors="replace",
-                ),
-                renderers.format_hints.Hex(int(process_info["Address"], 16)),
-                str(process_info["Vad Tag"]),
-                str(process_info["Protection"]),
-                process_info["Hexdump"],
-                vad_output,
-                executable_output,
-                disasm
-            ])
+        process_detectors = [detector for detector in detectors if type(detector).scan_process is not Detector.scan_process]
+        if process_detectors:
+            for entry in process_index:
+                for detector in process_detectors:
+                    for finding in detector.scan_process(entry):
+                        yield self._build_row(detector, entry, finding)
+
+        if self.config["dump"]:
+            self.dump_cache.write_manifest()
+
+    def _build_row(self, detector: Detector, process_entry: Optional[ProcessEntry], finding: Finding):
+        if not process_entry:
+            return None
+
+        preview_size = self.config.get("preview_size", PREVIEW_SIZE_DEFAULT)
+        process = process_entry.process
+        proc_layer = self.context.layers[process_entry.layer_name]
+
+        vad_tag = "N/A"
+        protection = "N/A"
+        memory_data = b""
+        vad_output = "None"
+        executable_output = "None"
+        # Fetch the VAD for the finding's address
+        vad = process.get_vad_index().find(finding.address)
+        if vad is not None:
+            vad_tag = str(vad.get_tag())
+            protection = vad.get_protection(self.protect_values, winnt_protections)
+            # Only the preview is read (padded where pages are missing), never the whole VAD
+            preview_length = min(preview_size, vad.get_end() + 1 - finding.address)
+            memory_data = proc_layer.read(finding.address, preview_length, pad=True)
+            if self.config["dump"]:
+                vad_output = self.dump_cache.dump_vad(process_entry, vad)
+                executable_output = self.dump_cache.dump_process(process_entry)
+
+        disasm = interfaces.renderers.Disassembly(
+            memory_data, finding.address, process_entry.architecture
+        )
+
+        return (0, [
+            detector.name,
+            str(process.UniqueProcessId),
+            process.ImageFileName.cast(
+                "string",
+                max_length=process.ImageFileName.vol.count,
+                errors="replace",
+            ),
+            renderers.format_hints.Hex(finding.address),
+            vad_tag,
+            str(protection),
+            format_hints.HexBytes(memory_data),
+            vad_output,
+            executable_output,
+            disasm,
+            finding.notes
+        ])
 
     def run(self):
+        preview_size = self.config.get("preview_size", PREVIEW_SIZE_DEFAULT)
+        if preview_size < 1:
+            raise ValueError(f"preview_size must be at least 1 byte, got {preview_size}")
         return renderers.TreeGrid([
+            ("Detector", str),
             ("PID", str),
             ("Process", str),
             ("Address", renderers.format_hints.Hex),
@@ -139,5 +399,6 @@ class MED(interfaces.plugins.PluginInterface):
             ("Hexdump", format_hints.HexBytes),
             ("Vad Dump File",str),
             ("Executable File",str),
-            ("Disassembly", interfaces.renderers.Disassembly)
+            ("Disassembly", interfaces.renderers.Disassembly),
+            ("Notes", str)
         ], self._generator())
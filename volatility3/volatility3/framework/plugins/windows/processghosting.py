@@ -3,6 +3,7 @@
 #
 import logging
 import contextlib
+from typing import Optional, Tuple, Union
 
 from volatility3.framework import interfaces, exceptions
 from volatility3.framework import renderers
@@ -18,6 +19,7 @@ class ProcessGhosting(interfaces.plugins.PluginInterface):
     """Lists processes whose DeletePending bit is set or whose FILE_OBJECT is set to 0"""
 
     _required_framework_version = (2, 4, 0)
+    _version = (1, 0, 0)
 
     @classmethod
     def get_requirements(cls):
@@ -33,6 +35,52 @@ class ProcessGhosting(interfaces.plugins.PluginInterface):
             ),
         ]
 
+    @classmethod
+    def get_ghosting_info(cls, proc: interfaces.objects.ObjectInterface) -> Optional[
+        Tuple[
+            int,
+            Union[int, interfaces.renderers.BaseAbsentValue],
+            Union[str, interfaces.renderers.BaseAbsentValue],
+        ]
+    ]:
+        """
+        Checks a process' image FILE_OBJECT for signs of process ghosting
+
+        Returns the FILE_OBJECT address, its DeletePending value and path
+        when the FILE_OBJECT is missing or delete-pending, otherwise None.
+        Requires the ImageFilePointer member of _EPROCESS (Windows 10+)
+        """
+        delete_pending = renderers.UnreadableValue()
+        process_name = utility.array_to_string(proc.ImageFileName)
+
+        # if it is 0 then its a side effect of process ghosting
+        if proc.ImageFilePointer.vol.offset != 0:
+            try:
+                file_object = proc.ImageFilePointer
+                delete_pending = file_object.DeletePending
+            except exceptions.InvalidAddressException:
+                file_object = 0
+
+        # ImageFilePointer equal to 0 means process ghosting or similar techniques were used
+        else:
+            file_object = 0
+
+        if isinstance(delete_pending, int) and delete_pending not in [0, 1]:
+            vollog.debug(
+                f"Invalid delete_pending value {delete_pending} found for {process_name} {proc.UniqueProcessId}"
+            )
+
+        # delete_pending besides 0 or 1 = smear
+        if file_object == 0 or delete_pending == 1:
+            path = renderers.UnreadableValue()
+            if file_object:
+                with contextlib.suppress(exceptions.InvalidAddressException):
+                    path = file_object.FileName.String
+
+            return file_object, delete_pending, path
+
+        return None
+
     def _generator(self, procs):
         kernel = self.context.modules[self.config["kernel"]]
 
@@ -43,43 +91,21 @@ class ProcessGhosting(interfaces.plugins.PluginInterface):
             return
 
         for proc in procs:
-            delete_pending = renderers.UnreadableValue()
-            process_name = utility.array_to_string(proc.ImageFileName)
-
-            # if it is 0 then its a side effect of process ghosting
-            if proc.ImageFilePointer.vol.offset != 0:
-                try:
-                    file_object = proc.ImageFilePointer
-                    delete_pending = file_object.DeletePending
-                except exceptions.InvalidAddressException:
-                    file_object = 0
-
-            # ImageFilePointer equal to 0 means process ghosting or similar techniques were used
-            else:
-                file_object = 0
-
-            if isinstance(delete_pending, int) and delete_pending not in [0, 1]:
-                vollog.debug(
-                    f"Invalid delete_pending value {delete_pending} found for {process_name} {proc.UniqueProcessId}"
-                )
-
-            # delete_pending besides 0 or 1 = smear
-            if file_object == 0 or delete_pending == 1:
-                path = renderers.UnreadableValue()
-                if file_object:
-                    with contextlib.suppress(exceptions.InvalidAddressException):
-                        path = file_object.FileName.String
-
-                yield (
-                    0,
-                    (
-                        proc.UniqueProcessId,
-                        process_name,
-                        format_hints.Hex(file_object),
-                        delete_pending,
-                        path,
-                    ),
-                )
+            ghosting = self.get_ghosting_info(proc)
+            if ghosting is None:
+                continue
+
+            file_object, delete_pending, path = ghosting
+            yield (
+                0,
+                (
+                    proc.UniqueProcessId,
+                    utility.array_to_string(proc.ImageFileName),
+                    format_hints.Hex(file_object),
+                    delete_pending,
+                    path,
+                ),
+            )
 
     def run(self):
         filter_func = pslist.PsList.create_active_process_filter()
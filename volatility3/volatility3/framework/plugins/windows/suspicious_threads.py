@@ -3,7 +3,7 @@
 #
 
 import logging
-from typing import List, Dict, Tuple, Generator
+from typing import List, Tuple, Generator, Iterable, Optional
 from volatility3.framework import renderers, interfaces
 from volatility3.framework.configuration import requirements
 from volatility3.framework.objects import utility
@@ -17,7 +17,7 @@ class SupsiciousThreads(interfaces.plugins.PluginInterface):
     """Lists suspicious userland process threads"""
 
     _required_framework_version = (2, 4, 0)
-    _version = (2, 0, 0)
+    _version = (2, 1, 0)
 
     @classmethod
     def get_requirements(cls) -> List[interfaces.configuration.RequirementInterface]:
@@ -42,41 +42,35 @@ class SupsiciousThreads(interfaces.plugins.PluginInterface):
             ),
         ]
 
-    def _get_ranges(
-        self,
-        kernel: interfaces.context.ModuleInterface,
-        all_ranges: Dict[int, List[Tuple[int, int, str, str]]],
-        proc,
-    ) -> Tuple[int, int, str, str]:
+    @classmethod
+    def get_ranges(
+        cls,
+        vads: Iterable[interfaces.objects.ObjectInterface],
+        protect_values: List[int],
+    ) -> List[Tuple[int, int, str, Optional[str]]]:
         """
-        Maintains a hash table so each process' VADs
-        are only enumerated once per plugin run
+        Returns the start, end, protection string and mapped file, if any,
+        of each VAD from `vads`, such as a process' `get_vad_index()`
         """
-        key = proc.vol.offset
-
-        if key not in all_ranges:
-            all_ranges[key] = []
+        ranges = []
 
-            for vad in proc.get_vad_root().traverse():
-                fn = vad.get_file_name()
-                if not isinstance(fn, str) or not fn:
-                    fn = None
+        for vad in vads:
+            fn = vad.get_file_name()
+            if not isinstance(fn, str) or not fn:
+                fn = None
 
-                protection_string = vad.get_protection(
-                    vadinfo.VadInfo.protect_values(
-                        self.context, kernel.layer_name, kernel.symbol_table_name
-                    ),
-                    vadinfo.winnt_protections,
-                )
+            protection_string = vad.get_protection(
+                protect_values,
+                vadinfo.winnt_protections,
+            )
 
-                all_ranges[key].append(
-                    (vad.get_start(), vad.get_end(), protection_string, fn)
-                )
+            ranges.append((vad.get_start(), vad.get_end(), protection_string, fn))
 
-        return all_ranges[key]
+        return ranges
 
-    def _get_range(
-        self, ranges: Dict[int, List[Tuple[int, int, str, str]]], address: int
+    @classmethod
+    def get_range(
+        cls, ranges: List[Tuple[int, int, str, Optional[str]]], address: int
     ) -> Tuple[int, str, str]:
         """
         Walks a process' VADs looking for the one
@@ -90,10 +84,11 @@ class SupsiciousThreads(interfaces.plugins.PluginInterface):
 
         return None, None, None
 
-    def _check_thread_address(
-        self, exe_path: str, ranges, thread_address: int
+    @classmethod
+    def check_thread_address(
+        cls, exe_path: str, ranges, thread_address: int
     ) -> Generator[Tuple[str, str], None, None]:
-        vad_base, prot, vad_path = self._get_range(ranges, thread_address)
+        vad_base, prot, vad_path = cls.get_range(ranges, thread_address)
 
         # threads outside of a VAD means either smear from this thread or this process' VAD tree
         if vad_base is None:
@@ -126,78 +121,92 @@ class SupsiciousThreads(interfaces.plugins.PluginInterface):
                 "VAD at base address ({vad_base:#x}) hosting this thread maps an application executable that is not the process exectuable",
             )
 
-    def _enumerate_processes(
-        self, kernel: interfaces.context.ModuleInterface, all_ranges
-    ):
-        filter_func = pslist.PsList.create_pid_filter(self.config.get("pid", None))
+    @classmethod
+    def list_suspicious_threads(
+        cls,
+        kernel: interfaces.context.ModuleInterface,
+        proc: interfaces.objects.ObjectInterface,
+        vads: Iterable[interfaces.objects.ObjectInterface],
+        protect_values: List[int],
+    ) -> Generator[Tuple[int, str, int, str, str], None, None]:
+        """
+        Checks the start addresses of a process' live threads against its VADs
+        (such as its `get_vad_index()`)
 
-        for proc in pslist.PsList.list_processes(
-            context=self.context,
-            layer_name=kernel.layer_name,
-            symbol_table=kernel.symbol_table_name,
-            filter_func=filter_func,
-        ):
-            ranges = self._get_ranges(kernel, all_ranges, proc)
+        Yields the thread ID, which start address was checked, the address, the VAD path and the note
+        """
+        ranges = cls.get_ranges(vads, protect_values)
+
+        # smeared vads or process is terminating
+        if len(ranges) < 5:
+            return
+
+        _, __, exe_path = cls.get_range(ranges, proc.SectionBaseAddress)
+        if not isinstance(exe_path, str):
+            exe_path = None
 
-            # smeared vads or process is terminating
-            if len(all_ranges[proc.vol.offset]) < 5:
+        # processes often create multiple threads at the same address
+        # there is no benefit to checking the same address more than once per process
+        checked = set()
+
+        for thread in threads.Threads.list_threads(kernel, proc):
+            # do not process if a thread is exited or terminated (4 = Terminated)
+            if thread.ExitTime.QuadPart > 0 or thread.Tcb.State == 4:
                 continue
 
-            pid = proc.UniqueProcessId
-            proc_name = utility.array_to_string(proc.ImageFileName)
+            # bail if accessing the threads members causes a page fault
+            info = thrdscan.ThrdScan.gather_thread_info(thread)
+            if not info:
+                continue
+
+            _, _, tid, start_address, _, _ = info
 
-            _, __, exe_path = self._get_range(ranges, proc.SectionBaseAddress)
-            if not isinstance(exe_path, str):
-                exe_path = None
+            addresses = [
+                (start_address, "Start"),
+                (thread.Win32StartAddress, "Win32Start"),
+            ]
 
-            yield proc, pid, proc_name, exe_path, ranges
+            for address, context in addresses:
+                if address in checked:
+                    continue
+                checked.add(address)
+
+                for vad_path, note in cls.check_thread_address(
+                    exe_path, ranges, address
+                ):
+                    yield tid, context, address, vad_path, note
 
     def _generator(self):
         kernel = self.context.modules[self.config["kernel"]]
+        protect_values = list(
+            vadinfo.VadInfo.protect_values(
+                self.context, kernel.layer_name, kernel.symbol_table_name
+            )
+        )
 
-        all_ranges = {}
+        filter_func = pslist.PsList.create_pid_filter(self.config.get("pid", None))
 
-        for proc, pid, proc_name, exe_path, ranges in self._enumerate_processes(
-            kernel, all_ranges
+        for proc in pslist.PsList.list_processes(
+            context=self.context,
+            layer_name=kernel.layer_name,
+            symbol_table=kernel.symbol_table_name,
+            filter_func=filter_func,
         ):
-            # processes often create multiple threads at the same address
-            # there is no benefit to checking the same address more than once per process
-            checked = set()
-
-            for thread in threads.Threads.list_threads(kernel, proc):
-                # do not process if a thread is exited or terminated (4 = Terminated)
-                if thread.ExitTime.QuadPart > 0 or thread.Tcb.State == 4:
-                    continue
-
-                # bail if accessing the threads members causes a page fault
-                info = thrdscan.ThrdScan.gather_thread_info(thread)
-                if not info:
-                    continue
+            pid = proc.UniqueProcessId
+            proc_name = utility.array_to_string(proc.ImageFileName)
 
-                _, _, tid, start_address, _, _ = info
-
-                addresses = [
-                    (start_address, "Start"),
-                    (thread.Win32StartAddress, "Win32Start"),
-                ]
-
-                for address, context in addresses:
-                    if address in checked:
-                        continue
-                    checked.add(address)
-
-                    for vad_path, note in self._check_thread_address(
-                        exe_path, ranges, address
-                    ):
-                        yield 0, (
-                            proc_name,
-                            pid,
-                            tid,
-                            context,
-                            format_hints.Hex(address),
-                            vad_path,
-                            note,
-                        )
+            for tid, context, address, vad_path, note in self.list_suspicious_threads(
+                kernel, proc, proc.get_vad_index(), protect_values
+            ):
+                yield 0, (
+                    proc_name,
+                    pid,
+                    tid,
+                    context,
+                    format_hints.Hex(address),
+                    vad_path,
+                    note,
+                )
 
     def run(self):
         return renderers.TreeGrid(
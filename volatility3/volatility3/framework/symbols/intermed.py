@@ -5,13 +5,25 @@
 import base64
 import codecs
 import copy
+import functools
 import json
 import logging
 import os
 import pathlib
 import zipfile
 from abc import ABCMeta
-from typing import Any, Dict, Generator, Iterable, List, Mapping, Optional, Tuple, Type
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 from volatility3 import schemas, symbols
 from volatility3.framework import (
@@ -53,6 +65,28 @@ vollog = logging.getLogger(__name__)
 #
 
 
+@functools.lru_cache(maxsize=4)
+def _read_isf_data(isf_url: str) -> bytes:
+    """Reads the (decompressed) JSON text of an ISF file, caching it by URL.
+
+    Fetching and decompressing the file is the bulk of loading it, so this is shared
+    between the symbol tables of different contexts within a long-running process.
+    Kernel ISFs decompress to tens of megabytes, so only the few used by a single
+    image (such as its kernel's and the PE table) are kept.
+    """
+    with resources.ResourceAccessor().open(isf_url) as fp:
+        return fp.read()
+
+
+def _load_isf_json(isf_url: str) -> Any:
+    """Loads the JSON for an ISF file.
+
+    Every call parses a new object from the cached text, so a symbol table that
+    modifies its JSON can't affect any other symbol table.
+    """
+    return json.loads(codecs.decode(_read_isf_data(isf_url), "utf-8"))
+
+
 def _construct_delegate_function(name: str, is_property: bool = False) -> Any:
     def _delegate_function(self, *args, **kwargs):
         if is_property:
@@ -80,6 +114,8 @@ class IntermediateSymbolTable(interfaces.symbols.SymbolTableInterface):
     These are documented in JSONSchema JSON files located in volatility3/schemas.
     """
 
+    _validated_urls: Set[str] = set()
+
     def __init__(
         self,
         context: interfaces.context.ContextInterface,
@@ -112,15 +148,16 @@ class IntermediateSymbolTable(interfaces.symbols.SymbolTableInterface):
         # Check there are no obvious errors
         # Open the file and test the version
         self._versions = dict([(x.version, x) for x in class_subclasses(ISFormatTable)])
-        with resources.ResourceAccessor().open(isf_url) as fp:
-            reader = codecs.getreader("utf-8")
-            json_object = json.load(reader(fp))  # type: ignore
+        json_object = _load_isf_json(isf_url)
 
         # Validation is expensive, but we cache to store the hashes of successfully validated json objects
-        if validate and not schemas.validate(json_object):
-            raise exceptions.SymbolSpaceError(
-                f"File does not pass version validation: {isf_url}"
-            )
+        # (and remember which URLs have already been validated in this process, to avoid rehashing them)
+        if validate and isf_url not in self._validated_urls:
+            if not schemas.validate(json_object):
+                raise exceptions.SymbolSpaceError(
+                    f"File does not pass version validation: {isf_url}"
+                )
+            self._validated_urls.add(isf_url)
 
         metadata = json_object.get("metadata", None)
 
@@ -5,9 +5,11 @@
 import collections.abc
 import contextlib
 import datetime
+import bisect
 import functools
 import logging
 import math
+import weakref
 from typing import Generator, Iterable, Iterator, List, Optional, Tuple, Union
 
 from volatility3.framework import (
@@ -76,69 +78,67 @@ class MMVAD_SHORT(objects.StructType):
     def traverse(self, visited=None, depth=0):
         """Traverse the VAD tree, determining each underlying VAD node type by
         looking up the pool tag for the structure and then casting into a new
-        object."""
+        object.
 
-        # TODO: this is an arbitrary limit chosen based on past observations
-        if depth > 100:
-            vollog.log(
-                constants.LOGLEVEL_VVV, "Vad tree is too deep, something went wrong!"
-            )
-            raise RuntimeError("Vad tree is too deep")
+        The tree is walked iteratively (in pre-order, left subtree first), so
+        deep trees don't cost a generator per level."""
 
         if visited is None:
             visited = set()
 
-        vad_address = self.vol.offset
+        # Right children are pushed before left ones, so left subtrees are visited first
+        stack = [(self, depth)]
+        while stack:
+            vad, vad_depth = stack.pop()
 
-        if vad_address in visited:
-            vollog.log(constants.LOGLEVEL_VVV, "VAD node already seen!")
-            return None
+            # TODO: this is an arbitrary limit chosen based on past observations
+            if vad_depth > 100:
+                vollog.log(
+                    constants.LOGLEVEL_VVV,
+                    "Vad tree is too deep, something went wrong!",
+                )
+                raise RuntimeError("Vad tree is too deep")
 
-        visited.add(vad_address)
-        tag = self.get_tag()
-
-        if tag in ["VadS", "VadF"]:
-            target = "_MMVAD_SHORT"
-        elif tag is not None and tag.startswith("Vad"):
-            target = "_MMVAD"
-        elif depth == 0:
-            # the root node at depth 0 is allowed to not have a tag
-            # but we still want to continue and access its right & left child
-            target = None
-        else:
-            # any node other than the root that doesn't have a recognized tag
-            # is just garbage and we skip the node entirely
-            vollog.log(
-                constants.LOGLEVEL_VVV,
-                f"Skipping VAD at {self.vol.offset} depth {depth} with tag {tag}",
-            )
-            return None
+            vad_address = vad.vol.offset
 
-        if target:
-            vad_object = self.cast(target)
-            yield vad_object
+            if vad_address in visited:
+                vollog.log(constants.LOGLEVEL_VVV, "VAD node already seen!")
+                continue
 
-        try:
-            for vad_node in (
-                self.get_left_child().dereference().traverse(visited, depth + 1)
-            ):
-                yield vad_node
-        except exceptions.InvalidAddressException as excp:
-            vollog.log(
-                constants.LOGLEVEL_VVV,
-                f"Invalid address on LeftChild: {excp.invalid_address:#x}",
-            )
+            visited.add(vad_address)
+            tag = vad.get_tag()
+
+            if tag in ["VadS", "VadF"]:
+                target = "_MMVAD_SHORT"
+            elif tag is not None and tag.startswith("Vad"):
+                target = "_MMVAD"
+            elif vad_depth == 0:
+                # the root node at depth 0 is allowed to not have a tag
+                # but we still want to continue and access its right & left child
+                target = None
+            else:
+                # any node other than the root that doesn't have a recognized tag
+                # is just garbage and we skip the node entirely
+                vollog.log(
+                    constants.LOGLEVEL_VVV,
+                    f"Skipping VAD at {vad.vol.offset} depth {vad_depth} with tag {tag}",
+                )
+                continue
 
-        try:
-            for vad_node in (
-                self.get_right_child().dereference().traverse(visited, depth + 1)
+            if target:
+                yield vad.cast(target)
+
+            for child_name, get_child in (
+                ("RightChild", vad.get_right_child),
+                ("LeftChild", vad.get_left_child),
             ):
-                yield vad_node
-        except exceptions.InvalidAddressException as excp:
-            vollog.log(
-                constants.LOGLEVEL_VVV,
-                f"Invalid address on RightChild: {excp.invalid_address:#x}",
-            )
+                try:
+                    stack.append((get_child().dereference(), vad_depth + 1))
+                except exceptions.InvalidAddressException as excp:
+                    vollog.log(
+                        constants.LOGLEVEL_VVV,
+                        f"Invalid address on {child_name}: {excp.invalid_address:#x}",
+                    )
 
     def get_right_child(self):
         """Get the right child member."""
@@ -367,6 +367,82 @@ class MMVAD(MMVAD_SHORT):
         return file_name
 
 
+class VadIndex:
+    """An interval index of the VADs of a process.
+
+    VADs don't overlap, so once they are sorted by their starting address the
+    VAD containing an address, or those overlapping a range, are found with a
+    binary search.
+
+    Only the location of each VAD is kept, along with a weak reference to the
+    context, and the VAD objects are rebuilt when they are looked up.  This lets
+    indexes be cached against a context without keeping that context alive.
+    """
+
+    def __init__(
+        self,
+        context: interfaces.context.ContextInterface,
+        vads: Iterable[MMVAD_SHORT],
+    ) -> None:
+        self._context = weakref.ref(context)
+        entries = sorted(
+            (
+                (
+                    vad.get_start(),
+                    vad.get_end(),
+                    (
+                        vad.vol.type_name,
+                        vad.vol.layer_name,
+                        vad.vol.offset,
+                        vad.vol.native_layer_name,
+                    ),
+                )
+                for vad in vads
+            ),
+            key=lambda entry: entry[0],
+        )
+        self._starts = [start for start, _, _ in entries]
+        self._ends = [end for _, end, _ in entries]
+        self._locations = [location for _, _, location in entries]
+
+    def _vad(self, index: int) -> MMVAD_SHORT:
+        context = self._context()
+        if context is None:
+            raise ReferenceError("The context of this VAD index no longer exists")
+        type_name, layer_name, offset, native_layer_name = self._locations[index]
+        return context.object(
+            type_name,
+            layer_name=layer_name,
+            offset=offset,
+            native_layer_name=native_layer_name,
+        )
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __iter__(self) -> Iterator[MMVAD_SHORT]:
+        """Iterates the VADs in order of their starting address."""
+        for index in range(len(self._locations)):
+            yield self._vad(index)
+
+    def find(self, address: int) -> Optional[MMVAD_SHORT]:
+        """Returns the VAD that contains an address, or None if it isn't in any
+        VAD."""
+        index = bisect.bisect_right(self._starts, address) - 1
+        if index >= 0 and address <= self._ends[index]:
+            return self._vad(index)
+        return None
+
+    def find_range(self, start: int, end: int) -> List[MMVAD_SHORT]:
+        """Returns the VADs that overlap the range [start, end), in order of
+        their starting address."""
+        first = bisect.bisect_right(self._starts, start) - 1
+        if first < 0 or self._ends[first] < start:
+            first += 1
+        last = bisect.bisect_left(self._starts, end)
+        return [self._vad(index) for index in range(first, last)]
+
+
 class EX_FAST_REF(objects.StructType):
     """This is a standard Windows structure that stores a pointer to an object
     but also leverages the least significant bits to encode additional details.
@@ -854,6 +930,28 @@ class EPROCESS(generic.GenericIntelProcess, pool.ExecutiveObject):
 
         return False
 
+    # VAD indexes by context, then by process (type, layer, offset and native layer)
+    _vad_indexes: (
+        "weakref.WeakKeyDictionary[interfaces.context.ContextInterface, dict]"
+    ) = weakref.WeakKeyDictionary()
+
+    def get_vad_index(self) -> VadIndex:
+        """Returns an interval index of the process's VADs.
+
+        The index is built once per process (by its layer and offset) and kept
+        for as long as the context exists.
+        """
+        indexes = self._vad_indexes.setdefault(self._context, {})
+        key = (
+            self.vol.type_name,
+            self.vol.layer_name,
+            self.vol.offset,
+            self.vol.native_layer_name,
+        )
+        if key not in indexes:
+            indexes[key] = VadIndex(self._context, self.get_vad_root().traverse())
+        return indexes[key]
+
     def get_vad_root(self):
         # windows 8 and 2012 (_MM_AVL_TABLE)
         if self.VadRoot.has_member("BalancedRoot"):